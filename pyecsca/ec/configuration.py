@@ -8,7 +8,7 @@ from public import public
 from .coordinates import CoordinateModel
 from .formula import Formula
 from .model import CurveModel
-from .mult import ScalarMultiplier
+from .mult import ScalarMultiplier, MultiScalarMultiplier
 
 
 @public
@@ -191,7 +191,8 @@ def all_configurations(**kwargs) -> Generator[Configuration, Configuration, None
                 if coords != kwargs["coords"]:
                     continue
             coords_formulas = coords.formulas.values()
-            mult_classes = leaf_subclasses(ScalarMultiplier)
+            mult_classes = [mult_cls for mult_cls in leaf_subclasses(ScalarMultiplier) if
+                            not issubclass(mult_cls, MultiScalarMultiplier)]
             if "scalarmult" in kwargs:
                 if isinstance(kwargs["scalarmult"], ScalarMultiplier):
                     mults = [kwargs["scalarmult"]]
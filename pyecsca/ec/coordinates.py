@@ -1,6 +1,6 @@
 from ast import parse, Expression, Module
 from os.path import join
-from typing import List, Any, MutableMapping
+from typing import List, Any, MutableMapping, Optional
 
 from pkg_resources import resource_listdir, resource_isdir, resource_stream
 from public import public
@@ -9,6 +9,7 @@ from .formula import (Formula, EFDFormula, AdditionEFDFormula, DoublingEFDFormul
                       TriplingEFDFormula,
                       DifferentialAdditionEFDFormula, LadderEFDFormula, ScalingEFDFormula,
                       NegationEFDFormula)
+from .op import CodeOp
 
 
 @public
@@ -23,6 +24,20 @@ class CoordinateModel(object):
     assumptions: List[Module]
     neutral: List[Module]
     formulas: MutableMapping[str, Formula]
+    _satisfying_ops: Optional[List[CodeOp]] = None
+
+    @property
+    def satisfying_ops(self) -> List[CodeOp]:
+        """The assignments among the `satisfying` lines, compiled into operations (once)."""
+        if self._satisfying_ops is None:
+            ops = []
+            for line in self.satisfying:
+                try:
+                    ops.append(CodeOp(line))
+                except Exception:
+                    pass
+            self._satisfying_ops = ops
+        return self._satisfying_ops
 
     def __repr__(self):
         return f"{self.__class__.__name__}(\"{self.name}\" on {self.curve_model.name})"
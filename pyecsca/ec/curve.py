@@ -1,6 +1,5 @@
-from ast import Module
 from copy import copy
-from typing import MutableMapping, Union, List, Optional
+from typing import MutableMapping, Union, Optional, Tuple, Dict
 
 from public import public
 
@@ -38,53 +37,114 @@ class EllipticCurve(object):
             self.parameters[name] = value
         self.neutral = neutral
 
-    def _execute_base_formulas(self, formulas: List[Module], *points: Point) -> Point:
+    @property
+    def _int_parameters(self) -> Dict[str, int]:
+        return {name: value.x for name, value in self.parameters.items()}
+
+    def _check_affine(self, point: Point):
+        if point.coordinate_model.curve_model != self.model:
+            raise ValueError
+        if not isinstance(point.coordinate_model, AffineCoordinateModel):
+            raise ValueError
+
+    def _execute_base_formulas(self, formulas: str, *points: Point) -> Point:
         for point in points:
-            if point.coordinate_model.curve_model != self.model:
-                raise ValueError
-            if not isinstance(point.coordinate_model, AffineCoordinateModel):
-                raise ValueError
-        locals = {var + str(i + 1): point.coords[var]
+            self._check_affine(point)
+        locals = {var + str(i + 1): int(point.coords[var])
                   for i, point in enumerate(points) for var in point.coords}
-        locals.update(self.parameters)
-        for line in formulas:
-            exec(compile(line, "", mode="exec"), None, locals)
-        if not isinstance(locals["x"], Mod):
-            locals["x"] = Mod(locals["x"], self.prime)
-        if not isinstance(locals["y"], Mod):
-            locals["y"] = Mod(locals["y"], self.prime)
-        return Point(AffineCoordinateModel(self.model), x=locals["x"], y=locals["y"])
+        x, y = self.model.function(formulas)(p=self.prime, **locals, **self._int_parameters)
+        return Point(AffineCoordinateModel(self.model), x=Mod(x, self.prime), y=Mod(y, self.prime))
 
     def affine_add(self, one: Point, other: Point) -> Point:
-        return self._execute_base_formulas(self.model.base_addition, one, other)
+        """
+        Add two affine points using the base addition formulas of the curve model.
+
+        The formulas are evaluated as a single fraction per coordinate (see
+        :py:meth:`CurveModel.function <pyecsca.ec.model.CurveModel.function>`). The formulas are
+        incomplete: for inputs where a denominator is zero (e.g. `P + P` or `P + (-P)` on short
+        Weierstrass curves) the zero is "inverted" to zero, so the result is the meaningless
+        point with both coordinates zero (not what the formulas evaluated term by term give).
+
+        :param one: The first affine point.
+        :param other: The second affine point.
+        :return: The affine sum.
+        """
+        return self._execute_base_formulas("base_addition", one, other)
 
     def affine_double(self, one: Point) -> Point:
-        return self._execute_base_formulas(self.model.base_doubling, one)
+        """
+        Double an affine point using the base doubling formulas of the curve model.
 
-    def affine_negate(self, one: Point) -> Point:
-        return self._execute_base_formulas(self.model.base_negation, one)
+        Like in :py:meth:`affine_add`, if a denominator is zero (e.g. for a point of order two on
+        short Weierstrass curves) the result has both coordinates zero.
 
-    def affine_multiply(self, point: Point, scalar: int) -> Point:
-        if point.coordinate_model.curve_model != self.model:
-            raise ValueError
-        if not isinstance(point.coordinate_model, AffineCoordinateModel):
-            raise ValueError
-        q = copy(point)
-        r = copy(point)
+        :param one: The affine point.
+        :return: The doubled affine point.
+        """
+        return self._execute_base_formulas("base_doubling", one)
 
-        for i in range(scalar.bit_length() - 2, -1, -1):
-            r = self.affine_double(r)
-            if scalar & (1 << i) != 0:
-                r = self.affine_add(r, q)
-        return r
+    def affine_negate(self, one: Point) -> Point:
+        return self._execute_base_formulas("base_negation", one)
+
+    def affine_multiply(self, point: Point, scalar: int, width: int = 4) -> Point:
+        """
+        Multiply the affine `point` by the `scalar`, using a sliding window of `width` bits
+        over the precomputed odd multiples of the point.
+
+        The base formulas are incomplete, the intermediate points are assumed to be
+        neither equal nor inverse.
+
+        :param point: The affine point.
+        :param scalar: The scalar.
+        :param width: The width of the window.
+        :return: The resulting affine point.
+        """
+        self._check_affine(point)
+        if scalar <= 1:
+            return copy(point)
+        params = {"p": self.prime, **self._int_parameters}
+        add = self.model.function("base_addition")
+        dbl = self.model.function("base_doubling")
+
+        def double(one: Tuple[int, int]) -> Tuple[int, int]:
+            return dbl(x1=one[0], y1=one[1], **params)
+
+        def plus(one: Tuple[int, int], other: Tuple[int, int]) -> Tuple[int, int]:
+            return add(x1=one[0], y1=one[1], x2=other[0], y2=other[1], **params)
+
+        q = (int(point.x), int(point.y))
+        width = max(min(width, scalar.bit_length() - 1), 1)
+        # The odd multiples q, 3q, ..., (2^width - 1)q.
+        table = [q]
+        if width > 1:
+            q2 = double(q)
+            for _ in range(2 ** (width - 1) - 1):
+                table.append(plus(table[-1], q2))
+        r: Optional[Tuple[int, int]] = None
+        i = scalar.bit_length() - 1
+        while i >= 0:
+            if not scalar & (1 << i):
+                r = double(r)  # type: ignore[arg-type]
+                i -= 1
+                continue
+            low = max(i - width + 1, 0)
+            while not scalar & (1 << low):
+                low += 1
+            if r is not None:
+                for _ in range(i - low + 1):
+                    r = double(r)
+            window = (scalar >> low) & ((1 << (i - low + 1)) - 1)
+            r = table[window // 2] if r is None else plus(r, table[window // 2])
+            i = low - 1
+        return Point(AffineCoordinateModel(self.model), x=Mod(r[0], self.prime),  # type: ignore[index]
+                     y=Mod(r[1], self.prime))  # type: ignore[index]
 
     @property
     def affine_neutral(self) -> Optional[Point]:
         if not self.neutral_is_affine:
             return None
         locals = {**self.parameters}
-        for line in self.model.base_neutral:
-            exec(compile(line, "", mode="exec"), None, locals)
+        exec(self.model.compiled("base_neutral"), None, locals)
         if not isinstance(locals["x"], Mod):
             locals["x"] = Mod(locals["x"], self.prime)
         if not isinstance(locals["y"], Mod):
@@ -107,7 +167,7 @@ class EllipticCurve(object):
         if self.is_neutral(point):
             return True
         loc = {**self.parameters, **point.to_affine().coords}
-        return eval(compile(self.model.equation, "", mode="eval"), loc)
+        return eval(self.model.compiled("equation"), loc)
 
     def to_affine(self) -> "EllipticCurve":
         """Convert this curve into the affine coordinate model, if possible."""
@@ -135,10 +195,11 @@ class EllipticCurve(object):
                     raise ValueError("Encoded point has bad length")
                 x = Mod(int.from_bytes(data, "big"), self.prime)
                 loc = {**self.parameters, "x": x}
-                rhs = eval(compile(self.model.ysquared, "", mode="eval"), loc)
-                if not rhs.is_residue():
+                rhs = eval(self.model.compiled("ysquared"), loc)
+                try:
+                    sqrt = rhs.sqrt()
+                except ValueError:
                     raise ValueError("Point not on curve")
-                sqrt = rhs.sqrt()
                 yp = encoded[0] & 0x01
                 if int(sqrt) & 0x01 == yp:
                     y = sqrt
@@ -155,13 +216,15 @@ class EllipticCurve(object):
         while True:
             x = Mod.random(self.prime)
             loc = {**self.parameters, "x": x}
-            ysquared = eval(compile(self.model.ysquared, "", mode="eval"), loc)
-            if ysquared.is_residue():
+            ysquared = eval(self.model.compiled("ysquared"), loc)
+            try:
                 y = ysquared.sqrt()
-                b = Mod.random(2)
-                if b == 1:
-                    y = -y
-                return Point(AffineCoordinateModel(self.model), x=x, y=y)
+            except ValueError:
+                continue
+            b = Mod.random(2)
+            if b == 1:
+                y = -y
+            return Point(AffineCoordinateModel(self.model), x=x, y=y)
 
     def __eq__(self, other):
         if not isinstance(other, EllipticCurve):
@@ -1,6 +1,7 @@
 import random
 import secrets
 from functools import wraps, lru_cache
+from typing import Sequence, List, Optional
 
 from public import public
 
@@ -40,6 +41,51 @@ def extgcd(a, b):
     return x2, y2, a
 
 
+def _batch_inverse(n: int, values: Sequence[int]) -> List[int]:
+    """
+    Invert the integers `values` (reduced modulo `n`) using a single inversion (Montgomery's trick).
+
+    Zero values are inverted to zero. If the product of the other values is not invertible (the
+    modulus is not a prime), the values are inverted one by one, like by :py:meth:`Mod.inverse`.
+    """
+    products = []
+    acc = 1
+    for value in values:
+        if value != 0:
+            acc = (acc * value) % n
+        products.append(acc)
+    try:
+        inv = pow(acc, -1, n)
+    except ValueError:
+        return [Mod(value, n).inverse().x for value in values]
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        value = values[i]
+        if value == 0:
+            continue
+        result[i] = (inv * products[i - 1]) % n if i > 0 else inv
+        inv = (inv * value) % n
+    return result
+
+
+@public
+def batch_inverse(elements: Sequence["Mod"]) -> List["Mod"]:
+    """
+    Invert all of the `elements` using a single inversion (Montgomery's trick).
+
+    Zero elements are inverted to zero, like by :py:meth:`Mod.inverse`.
+
+    :param elements: The elements, with the same modulus.
+    :return: The inverses.
+    """
+    if not elements:
+        return []
+    n = elements[0].n
+    if any(element.n != n for element in elements):
+        raise ValueError("The elements have different moduli.")
+    return [Mod(value, n) for value in _batch_inverse(n, [element.x for element in elements])]
+
+
 @public
 @lru_cache
 def miller_rabin(n: int, rounds: int = 50) -> bool:
@@ -68,6 +114,137 @@ def miller_rabin(n: int, rounds: int = 50) -> bool:
     return True
 
 
+@public
+class SquareRoot(object):
+    """
+    Square roots modulo a prime `p`, with the precomputation for the prime done once.
+
+    Uses the exponentiation shortcuts for `p ≡ 3 (mod 4)` and for `p ≡ 5 (mod 8)` (Atkin's
+    algorithm), otherwise the `Tonelli-Shanks <https://en.wikipedia.org/wiki/Tonelli–Shanks_algorithm>`_
+    algorithm with the 2-adic decomposition of `p - 1` and a quadratic non-residue precomputed.
+    Use :py:meth:`of` to get the (cached) instance for a prime.
+    """
+    p: int
+    method: str
+    q: int
+    s: int
+    z: Optional[int] = None
+    c: Optional[int] = None
+
+    def __init__(self, p: int):
+        """
+        :param p: The prime.
+        :raises NotImplementedError: If `p` is not a prime.
+        """
+        if not miller_rabin(p):
+            raise NotImplementedError
+        self.p = p
+        self.q = p - 1
+        self.s = 0
+        while self.q and self.q % 2 == 0:
+            self.q //= 2
+            self.s += 1
+        if p == 2:
+            self.method = "trivial"
+        elif p % 4 == 3:
+            self.method = "3 mod 4"
+        elif p % 8 == 5:
+            self.method = "5 mod 8"
+        else:
+            self.method = "tonelli-shanks"
+            z = 2
+            while self.is_residue(z):
+                z += 1
+            self.z = z
+            self.c = pow(z, self.q, p)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def of(p: int) -> "SquareRoot":
+        """
+        Get the square roots modulo the prime `p`, the instances are cached.
+
+        :param p: The prime.
+        :return: The square roots modulo `p`.
+        """
+        return SquareRoot(p)
+
+    def is_residue(self, x: int) -> bool:
+        """
+        Whether `x` is a quadratic residue modulo `p` (Euler's criterion).
+
+        :param x: The element.
+        :return: Whether `x` is a quadratic residue.
+        """
+        x %= self.p
+        if x == 0 or self.p == 2:
+            return True
+        return pow(x, (self.p - 1) // 2, self.p) == 1
+
+    def sqrt(self, x: int) -> int:
+        """
+        A square root of `x` modulo `p`.
+
+        :param x: The element.
+        :return: A square root of `x`.
+        :raises ValueError: If `x` is not a quadratic residue.
+        """
+        p = self.p
+        x %= p
+        if x == 0 or self.method == "trivial":
+            return x
+        if self.method == "3 mod 4":
+            r = pow(x, (p + 1) // 4, p)
+        elif self.method == "5 mod 8":
+            t = pow(2 * x, (p - 5) // 8, p)
+            i = (2 * x * t * t) % p
+            r = (x * t * (i - 1)) % p
+        else:
+            m = self.s
+            c = self.c
+            t = pow(x, self.q, p)
+            r = pow(x, (self.q + 1) // 2, p)
+            while t != 1:
+                i = 0
+                t2 = t
+                while t2 != 1:
+                    t2 = (t2 * t2) % p
+                    i += 1
+                    if i == m:
+                        raise ValueError(f"{x} is not a quadratic residue modulo {p}.")
+                b = pow(c, 1 << (m - i - 1), p)  # type: ignore[arg-type]
+                m = i
+                c = (b * b) % p
+                t = (t * c) % p
+                r = (r * b) % p
+        if (r * r) % p != x:
+            raise ValueError(f"{x} is not a quadratic residue modulo {p}.")
+        return r
+
+
+@public
+def batch_sqrt(elements: Sequence["Mod"]) -> List[Optional["Mod"]]:
+    """
+    Compute square roots of all of the `elements`, using the precomputation for their modulus once.
+
+    :param elements: The elements, with the same prime modulus.
+    :return: The square roots, `None` for the elements that are not quadratic residues.
+    """
+    if not elements:
+        return []
+    n = elements[0].n
+    root = SquareRoot.of(n)
+    result: List[Optional[Mod]] = []
+    for element in elements:
+        if element.n != n:
+            raise ValueError
+        try:
+            result.append(Mod(root.sqrt(element.x), n))
+        except ValueError:
+            result.append(None)
+    return result
+
+
 def check(func):
     @wraps(func)
     def method(self, other):
@@ -122,58 +299,29 @@ class Mod(object):
         return Mod(self.n - self.x, self.n)
 
     def inverse(self):
-        x, y, d = extgcd(self.x, self.n)
-        return Mod(x, self.n)
+        try:
+            return Mod(pow(self.x, -1, self.n), self.n)
+        except ValueError:
+            # Not invertible, keep the result of the extended Euclidean algorithm.
+            x, y, d = extgcd(self.x, self.n)
+            return Mod(x, self.n)
 
     def __invert__(self):
         return self.inverse()
 
     def is_residue(self):
         """Whether this element is a quadratic residue (only implemented for prime modulus)."""
-        if not miller_rabin(self.n):
-            raise NotImplementedError
-        if self.x == 0:
-            return True
-        if self.n == 2:
-            return self.x in (0, 1)
-        legendre = self ** ((self.n - 1) // 2)
-        return legendre == 1
+        return SquareRoot.of(self.n).is_residue(self.x)
 
     def sqrt(self):
         """
         The modular square root of this element (only implemented for prime modulus).
 
-        Uses the `Tonelli-Shanks <https://en.wikipedia.org/wiki/Tonelli–Shanks_algorithm>`_ algorithm.
+        See :py:class:`SquareRoot` for the algorithms used.
+
+        :raises ValueError: If this element is not a quadratic residue.
         """
-        if not miller_rabin(self.n):
-            raise NotImplementedError
-        q = self.n - 1
-        s = 0
-        while q % 2 == 0:
-            q //= 2
-            s += 1
-
-        z = 2
-        while Mod(z, self.n).is_residue():
-            z += 1
-
-        m = s
-        c = Mod(z, self.n) ** q
-        t = self ** q
-        r_exp = (q + 1) // 2
-        r = self ** r_exp
-
-        while t != 1:
-            i = 1
-            while not (t ** (2**i)) == 1:
-                i += 1
-            two_exp = m - (i + 1)
-            b = c ** int(Mod(2, self.n)**two_exp)
-            m = int(Mod(i, self.n))
-            c = b ** 2
-            t *= c
-            r *= b
-        return r
+        return Mod(SquareRoot.of(self.n).sqrt(self.x), self.n)
 
     @check
     def __mul__(self, other):
@@ -1,11 +1,44 @@
-from ast import parse, Expression, Module
+from ast import (parse, Expression, Module, BinOp, UnaryOp, Add, Sub, Mult, Div, Pow, Mod as ModOp, Call,
+                 Name, Load, Store, Assign, Return, Tuple, FunctionDef, arguments, arg, expr, walk,
+                 dump, fix_missing_locations)
 from os.path import join
-from typing import List, MutableMapping
+from types import CodeType
+from typing import List, MutableMapping, Union, Callable, Optional, Dict, Any, Tuple as TupleType
 
 from pkg_resources import resource_listdir, resource_isdir, resource_stream
 from public import public
 
 from .coordinates import EFDCoordinateModel, CoordinateModel
+from .mod import _batch_inverse
+
+
+def _mul(one: expr, other: Optional[expr]) -> expr:
+    return one if other is None else BinOp(left=one, op=Mult(), right=other)
+
+
+def _fraction(node: expr) -> TupleType[expr, Optional[expr]]:
+    """Rewrite the expression `node` into a single fraction, a numerator and a denominator (or `None`)."""
+    if isinstance(node, BinOp):
+        na, da = _fraction(node.left)
+        if isinstance(node.op, Pow):
+            return BinOp(left=na, op=Pow(), right=node.right), \
+                   None if da is None else BinOp(left=da, op=Pow(), right=node.right)
+        nb, db = _fraction(node.right)
+        if isinstance(node.op, (Add, Sub)):
+            if da is None and db is None:
+                return BinOp(left=na, op=node.op, right=nb), None
+            if da is not None and db is not None and dump(da) == dump(db):
+                return BinOp(left=na, op=node.op, right=nb), da
+            num = BinOp(left=_mul(na, db), op=node.op, right=_mul(nb, da))
+            return num, _mul(da, db) if da is not None else db
+        if isinstance(node.op, Mult):
+            return _mul(na, nb), _mul(da, db) if da is not None else db
+        if isinstance(node.op, Div):
+            return _mul(na, db), _mul(nb, da) if da is not None else nb
+    elif isinstance(node, UnaryOp):
+        n, d = _fraction(node.operand)
+        return UnaryOp(op=node.op, operand=n), d
+    return node, None
 
 
 class CurveModel(object):
@@ -24,6 +57,106 @@ class CurveModel(object):
     full_weierstrass: List[Module]
     to_weierstrass: List[Module]
     from_weierstrass: List[Module]
+    _compiled: MutableMapping[str, CodeType]
+    _functions: MutableMapping[str, Callable[..., TupleType[int, int]]]
+
+    def compiled(self, name: str) -> CodeType:
+        """
+        Get the equation or the formulas in the attribute `name` (e.g. `equation` or
+        `base_addition`) compiled. The lines of formulas are compiled into a single code object.
+        The code is compiled only once for the model.
+
+        :param name: The name of the attribute.
+        :return: The compiled code, to be evaluated (for expressions) or executed (for formulas).
+        """
+        cls = self.__class__
+        if "_compiled" not in cls.__dict__:
+            cls._compiled = {}
+        if name not in cls._compiled:
+            value: Union[Expression, List[Module]] = getattr(self, name)
+            if isinstance(value, Expression):
+                cls._compiled[name] = compile(value, "", mode="eval")
+            else:
+                module = Module(body=[stmt for line in value for stmt in line.body], type_ignores=[])
+                cls._compiled[name] = compile(module, "", mode="exec")
+        return cls._compiled[name]
+
+    def function(self, name: str) -> Callable[..., TupleType[int, int]]:
+        """
+        Get the affine formulas in the attribute `name` (e.g. `base_addition`) as a function on
+        integers, which takes the coordinates (e.g. `x1`, `y1`, `x2` and `y2`), the curve parameters
+        and the prime `p` as keyword arguments and returns the `x` and `y` coordinates of the
+        result, reduced modulo `p`. Each formula is rewritten into a single fraction and all of the
+        denominators are inverted at once, so the function performs a single modular inversion.
+        The function is generated only once for the model.
+
+        :param name: The name of the attribute.
+        :return: The function.
+        """
+        cls = self.__class__
+        if "_functions" not in cls.__dict__:
+            cls._functions = {}
+        if name not in cls._functions:
+            cls._functions[name] = self.__generate_function(name)
+        return cls._functions[name]
+
+    def __generate_function(self, name: str) -> Callable[..., TupleType[int, int]]:
+        def load(var: str) -> Name:
+            return Name(id=var, ctx=Load())
+
+        def store(var: str, value: expr) -> Assign:
+            return Assign(targets=[Name(id=var, ctx=Store())],
+                          value=BinOp(left=value, op=ModOp(), right=load("p")))
+
+        body: list = []
+        pending: list = []
+        loaded = set()
+        stored = set()
+
+        def flush():
+            # Invert the denominators of the pending statements at once and assign them.
+            denominators = [(i, var) for i, (var, den) in enumerate(pending) if den]
+            if denominators:
+                body.append(Assign(targets=[Tuple(elts=[Name(id=f"_i{i}", ctx=Store()) for i, _ in denominators],
+                                                  ctx=Store())],
+                                   value=Call(func=load("_batch_inverse"),
+                                              args=[load("p"), Tuple(elts=[load(f"_d{i}") for i, _ in denominators],
+                                                                     ctx=Load())],
+                                              keywords=[])))
+            for i, (var, den) in enumerate(pending):
+                if den:
+                    body.append(store(var, BinOp(left=load(f"_n{i}"), op=Mult(), right=load(f"_i{i}"))))
+                else:
+                    body.append(Assign(targets=[Name(id=var, ctx=Store())], value=load(f"_n{i}")))
+            pending.clear()
+
+        for line in getattr(self, name):
+            for stmt in line.body:
+                names = {node.id for node in walk(stmt.value) if isinstance(node, Name)}
+                if names & {var for var, _ in pending}:
+                    flush()
+                loaded.update(names)
+                var = stmt.targets[0].id
+                stored.add(var)
+                num, den = _fraction(stmt.value)
+                i = len(pending)
+                body.append(store(f"_n{i}", num))
+                if den is not None:
+                    body.append(store(f"_d{i}", den))
+                pending.append((var, den is not None))
+        flush()
+        body.append(Return(value=Tuple(elts=[load("x"), load("y")], ctx=Load())))
+        params = sorted(loaded - stored)
+        func = FunctionDef(name=name,
+                           args=arguments(posonlyargs=[], args=[], vararg=None,
+                                          kwonlyargs=[arg(arg=param, annotation=None) for param in params + ["p"]],
+                                          kw_defaults=[None] * (len(params) + 1),
+                                          kwarg=arg(arg="_", annotation=None), defaults=[]),
+                           body=body, decorator_list=[], returns=None)
+        module = fix_missing_locations(Module(body=[func], type_ignores=[]))
+        namespace: Dict[str, Any] = {"_batch_inverse": _batch_inverse}
+        exec(compile(module, "", mode="exec"), namespace)
+        return namespace[name]
 
 
 class EFDCurveModel(CurveModel):
@@ -1,15 +1,22 @@
 from abc import ABC, abstractmethod
+from ast import Assign, Name, UnaryOp, USub
+from collections import OrderedDict
+from contextlib import nullcontext
 from copy import copy
-from typing import Mapping, Tuple, Optional, MutableMapping, ClassVar, Set, Type
+from typing import (Mapping, Tuple, Optional, MutableMapping, ClassVar, Set, Type, List, Hashable, Callable,
+                    Dict, FrozenSet, Any)
 
 from public import public
 
-from .context import ResultAction
+from .context import ResultAction, NullContext, getcontext, local
+from .coordinates import AffineCoordinateModel, CoordinateModel
 from .formula import (Formula, AdditionFormula, DoublingFormula, DifferentialAdditionFormula,
                       ScalingFormula, LadderFormula, NegationFormula)
+from .mod import Mod
 from .naf import naf, wnaf
+from .op import OpType, CodeOp
 from .params import DomainParameters
-from .point import Point
+from .point import Point, InfinityPoint, batch_to_affine
 
 
 @public
@@ -27,16 +34,43 @@ class ScalarMultiplicationAction(ResultAction):
         return f"{self.__class__.__name__}({self.point}, {self.scalar})"
 
 
+@public
+class MultiScalarMultiplicationAction(ResultAction):
+    """A multi-scalar multiplication of points on a curve by scalars (a sum of their multiples)."""
+    points: Tuple[Point, ...]
+    scalars: Tuple[int, ...]
+
+    def __init__(self, points: Tuple[Point, ...], scalars: Tuple[int, ...]):
+        super().__init__()
+        self.points = points
+        self.scalars = scalars
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.points}, {self.scalars})"
+
+
 class ScalarMultiplier(ABC):
     """
     A scalar multiplication algorithm.
 
+    Multipliers that precompute points on init (e.g. :py:class:`WindowNAFMultiplier`) cache the
+    precomputed points per domain parameters, point, formulas and multiplier parameters, so repeated
+    init with the same point computes them only once. The cache,
+    :py:attr:`ScalarMultiplier.precomputation_cache`, is a bounded LRU cache holding only plain
+    integers, so it can be pickled and loaded into other processes. Points taken from the cache are
+    not computed using the formulas, so the cache is only used when no tracing context is active
+    (i.e. the current context is a :py:class:`NullContext`), the precomputation is always traced.
+    Set `cache_precomputation` to `False` on the multiplier (or its class) to disable the cache.
+
     :param short_circuit: Whether the use of formulas will be guarded by short-circuit on inputs
                           of the point at infinity.
     :param formulas: Formulas this instance will use.
     """
     requires: ClassVar[Set[Type]]  # Type[Formula] but mypy has a false positive
     optionals: ClassVar[Set[Type]]  # Type[Formula] but mypy has a false positive
+    precomputation_cache: ClassVar[MutableMapping[Hashable, List[Optional[Tuple[Tuple[str, int], ...]]]]] = OrderedDict()
+    precomputation_cache_size: ClassVar[int] = 32
+    cache_precomputation: bool = True
     short_circuit: bool
     formulas: Mapping[str, Formula]
     _params: DomainParameters
@@ -98,6 +132,49 @@ class ScalarMultiplier(ABC):
             raise NotImplementedError
         return self.formulas["neg"](point, **self._params.curve.parameters)[0]
 
+    def _precomputed(self, compute: Callable[[], List[Point]], *key: Hashable,
+                     point: Optional[Point] = None) -> List[Point]:
+        """
+        Get the points computed by `compute`, from the precomputation cache if possible.
+
+        :param compute: The function computing the points, using the formulas.
+        :param key: The parameters of the multiplier the points depend on.
+        :param point: The point the points are computed from, the point of the multiplier if `None`.
+        :return: The points.
+        """
+        if not self.cache_precomputation or not isinstance(getcontext(), NullContext):
+            return compute()
+        if point is None:
+            point = self._point
+        curve = self._params.curve
+        full_key = (self.__class__.__name__, key, self.short_circuit,
+                    curve.model.__class__.__name__, curve.coordinate_model.name, curve.prime,
+                    tuple(sorted((name, int(value)) for name, value in curve.parameters.items())),
+                    self._params.order,
+                    tuple(sorted((name, int(value)) for name, value in point.coords.items())),
+                    tuple(sorted((name, formula.name) for name, formula in self.formulas.items())))
+        cache = ScalarMultiplier.precomputation_cache
+        if full_key in cache:
+            cache.move_to_end(full_key)  # type: ignore
+            return [self.__from_raw(raw) for raw in cache[full_key]]
+        points = compute()
+        cache[full_key] = [self.__to_raw(point) for point in points]
+        while len(cache) > self.precomputation_cache_size:
+            cache.popitem(last=False)  # type: ignore
+        return points
+
+    def __to_raw(self, point: Point) -> Optional[Tuple[Tuple[str, int], ...]]:
+        if isinstance(point, InfinityPoint):
+            return None
+        return tuple((name, int(value)) for name, value in point.coords.items())
+
+    def __from_raw(self, raw: Optional[Tuple[Tuple[str, int], ...]]) -> Point:
+        model = self._params.curve.coordinate_model
+        if raw is None:
+            return InfinityPoint(model)
+        prime = self._params.curve.prime
+        return Point(model, **{name: Mod(value, prime) for name, value in raw})
+
     def init(self, params: DomainParameters, point: Point):
         """Initialize the scalar multiplier with params and a point."""
         coord_model = set(self.formulas.values()).pop().coordinate_model
@@ -403,15 +480,25 @@ class WindowNAFMultiplier(ScalarMultiplier):
 
     def init(self, params: DomainParameters, point: Point):
         super().init(params, point)
-        self._points = {}
-        self._points_neg = {}
-        current_point = point
-        double_point = self._dbl(point)
+        count = 2**(self.width - 2)
+        points = self._precomputed(self._precompute, self.width, self.precompute_negation)
+        self._points = {2 * i + 1: points[i] for i in range(count)}
+        if self.precompute_negation:
+            self._points_neg = {2 * i + 1: points[count + i] for i in range(count)}
+        else:
+            self._points_neg = {}
+
+    def _precompute(self) -> List[Point]:
+        points = []
+        negs = []
+        current_point = self._point
+        double_point = self._dbl(self._point)
         for i in range(0, 2**(self.width - 2)):
-            self._points[2 * i + 1] = current_point
+            points.append(current_point)
             if self.precompute_negation:
-                self._points_neg[2 * i + 1] = self._neg(current_point)
+                negs.append(self._neg(current_point))
             current_point = self._add(current_point, double_point)
+        return points + negs
 
     def multiply(self, scalar: int) -> Point:
         if not self._initialized:
@@ -434,3 +521,447 @@ class WindowNAFMultiplier(ScalarMultiplier):
             if "scl" in self.formulas:
                 q = self._scl(q)
             return action.exit(q)
+
+
+class FixedBaseMultiplier(ScalarMultiplier, ABC):
+    """
+    A scalar multiplier which precomputes a table of multiples of the point on init, so it is
+    fast when the same point (like the generator) is multiplied by many scalars.
+
+    The precomputed tables are cached, see :py:class:`ScalarMultiplier`.
+
+    :param width: The width of the window or comb.
+    """
+    width: int
+    _table: List[Point]
+
+    def init(self, params: DomainParameters, point: Point):
+        super().init(params, point)
+        self._table = self._precomputed(self._precompute, self.width)
+
+    @abstractmethod
+    def _precompute(self) -> List[Point]:
+        """Compute the table of multiples of the point."""
+        ...
+
+    def _check(self, scalar: int, bits: int):
+        if scalar.bit_length() > bits:
+            raise ValueError("Scalar too large for the precomputed table.")
+
+
+@public
+class CombMultiplier(FixedBaseMultiplier):
+    """
+    Lim-Lee comb fixed-base multiplier, with a single table of `2^width` points, from:
+
+    More Flexible Exponentiation with Precomputation
+
+    https://link.springer.com/content/pdf/10.1007/3-540-48658-5_11.pdf
+
+    The scalar is split into `width` rows of `d = ceil(bits / width)` bits, the columns of the rows
+    select the table entries added in each of the `d` steps.
+    """
+    requires = {AdditionFormula, DoublingFormula}
+    optionals = {ScalingFormula}
+    always: bool
+
+    def __init__(self, add: AdditionFormula, dbl: DoublingFormula, width: int,
+                 scl: ScalingFormula = None, always: bool = False, short_circuit: bool = True):
+        super().__init__(short_circuit=short_circuit, add=add, dbl=dbl, scl=scl)
+        self.width = width
+        self.always = always
+
+    @property
+    def _d(self) -> int:
+        return -(-self._params.order.bit_length() // self.width)
+
+    def _precompute(self) -> List[Point]:
+        d = self._d
+        rows = [self._point]
+        for _ in range(1, self.width):
+            row = rows[-1]
+            for _ in range(d):
+                row = self._dbl(row)
+            rows.append(row)
+        table = [copy(self._params.curve.neutral)]
+        for j, row in enumerate(rows):
+            for u in range(1 << j):
+                table.append(self._add(table[u], row))
+        return table
+
+    def multiply(self, scalar: int) -> Point:
+        if not self._initialized:
+            raise ValueError("ScalaMultiplier not initialized.")
+        with ScalarMultiplicationAction(self._point, scalar) as action:
+            if scalar == 0:
+                return action.exit(copy(self._params.curve.neutral))
+            d = self._d
+            self._check(scalar, d * self.width)
+            q = copy(self._params.curve.neutral)
+            for i in range(d - 1, -1, -1):
+                q = self._dbl(q)
+                u = 0
+                for j in range(self.width):
+                    u |= ((scalar >> (j * d + i)) & 1) << j
+                if u != 0:
+                    q = self._add(q, self._table[u])
+                elif self.always:
+                    self._add(q, self._table[0])
+            if "scl" in self.formulas:
+                q = self._scl(q)
+            return action.exit(q)
+
+
+@public
+class BGMWMultiplier(FixedBaseMultiplier):
+    """
+    Brickell-Gordon-McCurley-Wilson fixed-base windowed multiplier, from:
+
+    Fast Exponentiation with Precomputation
+
+    https://link.springer.com/content/pdf/10.1007/3-540-47555-9_18.pdf
+
+    The table contains the points `2^(width * i) * P`, the multiplication uses only additions.
+    """
+    requires = {AdditionFormula, DoublingFormula}
+    optionals = {ScalingFormula}
+
+    def __init__(self, add: AdditionFormula, dbl: DoublingFormula, width: int,
+                 scl: ScalingFormula = None, short_circuit: bool = True):
+        super().__init__(short_circuit=short_circuit, add=add, dbl=dbl, scl=scl)
+        self.width = width
+
+    def _precompute(self) -> List[Point]:
+        count = -(-self._params.order.bit_length() // self.width)
+        table = [self._point]
+        for _ in range(1, count):
+            point = table[-1]
+            for _ in range(self.width):
+                point = self._dbl(point)
+            table.append(point)
+        return table
+
+    def multiply(self, scalar: int) -> Point:
+        if not self._initialized:
+            raise ValueError("ScalaMultiplier not initialized.")
+        with ScalarMultiplicationAction(self._point, scalar) as action:
+            if scalar == 0:
+                return action.exit(copy(self._params.curve.neutral))
+            self._check(scalar, len(self._table) * self.width)
+            mask = (1 << self.width) - 1
+            digits = [(scalar >> (self.width * i)) & mask for i in range(len(self._table))]
+            neutral = self._params.curve.neutral
+            a = copy(neutral)
+            b = copy(neutral)
+            # Whether a equals b, so that a + b has to be computed as a doubling.
+            same = False
+            for j in range(mask, 0, -1):
+                for i, digit in enumerate(digits):
+                    if digit == j:
+                        b = self._add(b, self._table[i])
+                        same = False
+                if same:
+                    a = self._dbl(a)
+                    same = False
+                else:
+                    same = a == neutral and b != neutral
+                    a = self._add(a, b)
+            if "scl" in self.formulas:
+                a = self._scl(a)
+            return action.exit(a)
+
+
+def _negated_coordinates(model: Any) -> Optional[FrozenSet[str]]:
+    """
+    Get the affine coordinates negated by the negation formulas of the curve `model`, or `None` if
+    the negation is not a sign change of some of the coordinates.
+    """
+    negated = set()
+    for line in model.base_negation:
+        for stmt in line.body:
+            if not isinstance(stmt, Assign) or not isinstance(stmt.targets[0], Name):
+                return None
+            var = stmt.targets[0].id
+            value = stmt.value
+            if isinstance(value, UnaryOp) and isinstance(value.op, USub):
+                negated.add(var)
+                value = value.operand
+            if not isinstance(value, Name) or value.id != var + "1":
+                return None
+    return frozenset(negated)
+
+
+class MultiScalarMultiplier(ScalarMultiplier, ABC):
+    """
+    A multi-scalar multiplication algorithm, computing the sum `k_1 * P_1 + ... + k_n * P_n`
+    faster than `n` separate scalar multiplications, e.g. `u1 * G + u2 * Q` in ECDSA verification.
+
+    It is initialized with the points and multiplies them by as many scalars, initialized with
+    a single point it is a scalar multiplier.
+
+    The points (and so the intermediate sums) might be equal or inverse, which the (possibly
+    incomplete) addition formulas do not handle, so the additions check their operands: equal
+    operands are doubled and inverse operands sum to the neutral point. The check compares the
+    affine coordinates of the operands as fractions of their coordinates (by cross-multiplying,
+    without an inversion) and is not traced.
+    """
+    _points: Tuple[Point, ...]
+    _negated: Optional[FrozenSet[str]]
+    _ops: Optional[List[Tuple[CodeOp, Optional[Tuple[str, str]]]]]
+
+    def _fraction_ops(self, model: CoordinateModel) -> Optional[List[Tuple[CodeOp, Optional[Tuple[str, str]]]]]:
+        """
+        Get the `satisfying` relations of the coordinate `model` which express the affine
+        coordinates as fractions of the coordinates, with the names of the numerator and the
+        denominator of the fractions (`None` for intermediate values), or `None` if the affine
+        coordinates are not simple fractions.
+        """
+        affine_vars = AffineCoordinateModel(model.curve_model).variables
+        known = set(model.variables)
+        fractions: Set[str] = set()
+        ops: List[Tuple[CodeOp, Optional[Tuple[str, str]]]] = []
+        for op in model.satisfying_ops:
+            if not (op.variables | op.parameters) <= known or op.variables & fractions:
+                if op.result in affine_vars:
+                    return None
+                continue
+            if op.operator == OpType.Div and isinstance(op.left, str) and isinstance(op.right, str):
+                fractions.add(op.result)
+                ops.append((op, (op.left, op.right)))
+            else:
+                ops.append((op, None))
+            known.add(op.result)
+        if not fractions.issuperset(affine_vars):
+            return None
+        return ops
+
+    def _fractions(self, point: Point, ops: List[Tuple[CodeOp, Optional[Tuple[str, str]]]]) -> Dict[str, Tuple[Mod, Mod]]:
+        """Get the affine coordinates of the `point` as fractions (numerators and denominators)."""
+        prime = self._params.curve.prime
+        values: Dict[str, Mod] = {var: value if isinstance(value, Mod) else Mod(int(value), prime)
+                                  for var, value in point.coords.items()}
+        fractions = {}
+        for op, fraction in ops:
+            if fraction is not None:
+                fractions[op.result] = (values[fraction[0]], values[fraction[1]])
+            else:
+                result = op(**values)
+                values[op.result] = result if isinstance(result, Mod) else Mod(int(result), prime)
+        return fractions
+
+    def _compare(self, one: Point, other: Point) -> Tuple[bool, bool]:
+        """Check whether the points `one` and `other` are equal and whether they are inverse."""
+        negated, ops = self._negated, self._ops
+        if negated is None or ops is None:
+            untraced = isinstance(getcontext(), NullContext)
+            with nullcontext() if untraced else local(NullContext()):
+                one_affine, other_affine = batch_to_affine([one, other])
+                if one_affine == other_affine:
+                    return True, False
+                return False, one_affine == self._params.curve.affine_negate(other_affine)
+        other_fractions = self._fractions(other, ops)
+        equal = inverse = True
+        for var, (num, den) in self._fractions(one, ops).items():
+            other_num, other_den = other_fractions[var]
+            left = num * other_den
+            right = other_num * den
+            if left != right:
+                equal = False
+            if left != (-right if var in negated else right):
+                inverse = False
+        return equal, not equal and inverse
+
+    def _add(self, one: Point, other: Point) -> Point:
+        if not isinstance(one, InfinityPoint) and not isinstance(other, InfinityPoint):
+            equal, inverse = self._compare(one, other)
+            if equal:
+                return self._dbl(one)
+            if inverse:
+                return copy(self._params.curve.neutral)
+        return super()._add(one, other)
+
+    def _scl(self, point: Point) -> Point:
+        # The sum might be the neutral point, e.g. for inverse points, which cannot be scaled.
+        if point == self._params.curve.neutral:
+            return copy(point)
+        return super()._scl(point)
+
+    def init(self, params: DomainParameters, *points: Point):
+        """Initialize the multi-scalar multiplier with params and the points."""
+        if not points:
+            raise ValueError("No points given.")
+        super().init(params, points[0])
+        coord_model = params.curve.coordinate_model
+        if any(point.coordinate_model != coord_model for point in points):
+            raise ValueError
+        self._points = points
+        self._negated = _negated_coordinates(params.curve.model)
+        self._ops = self._fraction_ops(coord_model)
+
+    def _check(self, scalars: Tuple[int, ...]):
+        if not self._initialized:
+            raise ValueError("ScalaMultiplier not initialized.")
+        if len(scalars) != len(self._points):
+            raise ValueError("The number of scalars does not match the number of points.")
+
+    @abstractmethod
+    def multiply(self, *scalars: int) -> Point:
+        """Multiply the points with the scalars and sum the results."""
+        ...
+
+
+@public
+class ShamirMultiplier(MultiScalarMultiplier):
+    """
+    Shamir's trick, a joint left-to-right double and add, with a table of the sums of all of the
+    subsets of the points (`2^n - 1` points, so it is meant for a few points).
+    """
+    requires = {AdditionFormula, DoublingFormula}
+    optionals = {ScalingFormula}
+    _table: List[Point]
+
+    def __init__(self, add: AdditionFormula, dbl: DoublingFormula, scl: ScalingFormula = None,
+                 short_circuit: bool = True):
+        super().__init__(short_circuit=short_circuit, add=add, dbl=dbl, scl=scl)
+
+    def init(self, params: DomainParameters, *points: Point):
+        super().init(params, *points)
+        self._table = [copy(params.curve.neutral)]
+        for j, point in enumerate(points):
+            for u in range(1 << j):
+                self._table.append(self._add(self._table[u], point))
+
+    def multiply(self, *scalars: int) -> Point:
+        self._check(scalars)
+        with MultiScalarMultiplicationAction(self._points, scalars) as action:
+            q = copy(self._params.curve.neutral)
+            top = max(scalar.bit_length() for scalar in scalars)
+            for i in range(top - 1, -1, -1):
+                q = self._dbl(q)
+                u = 0
+                for j, scalar in enumerate(scalars):
+                    u |= ((scalar >> i) & 1) << j
+                if u != 0:
+                    q = self._add(q, self._table[u])
+            if "scl" in self.formulas:
+                q = self._scl(q)
+            return action.exit(q)
+
+
+@public
+class StrausMultiplier(MultiScalarMultiplier):
+    """
+    Straus' interleaved window NAF multiplier, left-to-right, see :py:class:`WindowNAFMultiplier`.
+
+    The doublings are shared by all of the points, each has its own table of odd multiples (and
+    their negations), which are cached like those of :py:class:`WindowNAFMultiplier`.
+    """
+    requires = {AdditionFormula, DoublingFormula, NegationFormula}
+    optionals = {ScalingFormula}
+    width: int
+    _tables: List[MutableMapping[int, Point]]
+
+    def __init__(self, add: AdditionFormula, dbl: DoublingFormula,
+                 neg: NegationFormula, width: int, scl: ScalingFormula = None,
+                 short_circuit: bool = True):
+        super().__init__(short_circuit=short_circuit, add=add, dbl=dbl, neg=neg, scl=scl)
+        self.width = width
+
+    def init(self, params: DomainParameters, *points: Point):
+        super().init(params, *points)
+        count = 2**(self.width - 2)
+        self._tables = []
+        for point in points:
+            multiples = self._precomputed(lambda: self._precompute(point), self.width, point=point)
+            table = {}
+            for i in range(count):
+                table[2 * i + 1] = multiples[i]
+                table[-(2 * i + 1)] = multiples[count + i]
+            self._tables.append(table)
+
+    def _precompute(self, point: Point) -> List[Point]:
+        points = []
+        current_point = point
+        double_point = self._dbl(point)
+        for i in range(0, 2**(self.width - 2)):
+            points.append(current_point)
+            current_point = self._add(current_point, double_point)
+        return points + [self._neg(multiple) for multiple in points]
+
+    def multiply(self, *scalars: int) -> Point:
+        self._check(scalars)
+        with MultiScalarMultiplicationAction(self._points, scalars) as action:
+            nafs = [wnaf(scalar, self.width) for scalar in scalars]
+            length = max(len(digits) for digits in nafs)
+            nafs = [[0] * (length - len(digits)) + digits for digits in nafs]
+            q = copy(self._params.curve.neutral)
+            for i in range(length):
+                q = self._dbl(q)
+                for digits, table in zip(nafs, self._tables):
+                    if digits[i] != 0:
+                        q = self._add(q, table[digits[i]])
+            if "scl" in self.formulas:
+                q = self._scl(q)
+            return action.exit(q)
+
+
+@public
+class PippengerMultiplier(MultiScalarMultiplier):
+    """
+    Pippenger's bucket multiplier, for many points, from:
+
+    On the evaluation of powers and related problems
+
+    https://doi.org/10.1109/SFCS.1976.21
+
+    The scalars are split into windows of `width` bits, the points are added into buckets by their
+    digits in a window and the buckets are summed using running sums. The width is chosen by the
+    number of points by default.
+    """
+    requires = {AdditionFormula, DoublingFormula}
+    optionals = {ScalingFormula}
+    width: Optional[int]
+
+    def __init__(self, add: AdditionFormula, dbl: DoublingFormula, width: Optional[int] = None,
+                 scl: ScalingFormula = None, short_circuit: bool = True):
+        super().__init__(short_circuit=short_circuit, add=add, dbl=dbl, scl=scl)
+        self.width = width
+
+    def multiply(self, *scalars: int) -> Point:
+        self._check(scalars)
+        with MultiScalarMultiplicationAction(self._points, scalars) as action:
+            width = self.width
+            if width is None:
+                width = max(len(scalars).bit_length() - 3, 2)
+            mask = (1 << width) - 1
+            windows = -(-max(scalar.bit_length() for scalar in scalars) // width)
+            neutral = self._params.curve.neutral
+            q = copy(neutral)
+            for w in range(windows - 1, -1, -1):
+                for _ in range(width):
+                    q = self._dbl(q)
+                buckets: List[Optional[Point]] = [None] * (mask + 1)
+                for point, scalar in zip(self._points, scalars):
+                    digit = (scalar >> (w * width)) & mask
+                    if digit != 0:
+                        bucket = buckets[digit]
+                        buckets[digit] = point if bucket is None else self._add(bucket, point)
+                # Sum j * buckets[j] as the sum of the running sums, see BGMWMultiplier.
+                a = copy(neutral)
+                b = copy(neutral)
+                same = False
+                for j in range(mask, 0, -1):
+                    bucket = buckets[j]
+                    if bucket is not None:
+                        b = self._add(b, bucket)
+                        same = False
+                    if same:
+                        a = self._dbl(a)
+                        same = False
+                    else:
+                        same = a == neutral and b != neutral
+                        a = self._add(a, b)
+                q = self._add(q, a)
+            if "scl" in self.formulas:
+                q = self._scl(q)
+            return action.exit(q)
@@ -1,12 +1,12 @@
 from copy import copy
-from typing import Mapping, Any
+from typing import Mapping, Any, Sequence, List, Optional, MutableMapping, Tuple
 
 from public import public
 
 from .context import ResultAction
 from .coordinates import AffineCoordinateModel, CoordinateModel
-from .mod import Mod, Undefined
-from .op import CodeOp
+from .mod import Mod, Undefined, batch_inverse
+from .op import OpType
 
 
 @public
@@ -47,62 +47,29 @@ class Point(object):
 
     def to_affine(self) -> "Point":
         """Convert this point into the affine coordinate model, if possible."""
-        affine_model = AffineCoordinateModel(self.coordinate_model.curve_model)
-        with CoordinateMappingAction(self.coordinate_model, affine_model, self) as action:
-            if isinstance(self.coordinate_model, AffineCoordinateModel):
-                return action.exit(copy(self))
-            ops = []
-            for s in self.coordinate_model.satisfying:
-                try:
-                    ops.append(CodeOp(s))
-                except Exception:
-                    pass
-            result_variables = set(map(lambda x: x.result, ops))
-            if not result_variables.issuperset(affine_model.variables):
-                raise NotImplementedError
-            result = {}
-            locls = {**self.coords}
-            for op in ops:
-                try:
-                    locls[op.result] = op(**locls)
-                except NameError as e:
-                    if op.result in affine_model.variables:
-                        raise e
-                    else:
-                        continue
-                if op.result in affine_model.variables:
-                    result[op.result] = locls[op.result]
-            return action.exit(Point(affine_model, **result))
+        return batch_to_affine([self])[0]
 
     def to_model(self, coordinate_model: CoordinateModel, curve: "EllipticCurve") -> "Point":
         """Convert an affine point into a given coordinate model, if possible."""
         if not isinstance(self.coordinate_model, AffineCoordinateModel):
             raise ValueError
         with CoordinateMappingAction(self.coordinate_model, coordinate_model, self) as action:
-            ops = []
-            for s in coordinate_model.satisfying:
-                try:
-                    ops.append(CodeOp(s))
-                except Exception:
-                    pass
             locls = {**self.coords, **curve.parameters, "Z": Mod(1, curve.prime)}
-            for op in ops:
-                try:
+            for op in coordinate_model.satisfying_ops:
+                if (op.variables | op.parameters).issubset(locls.keys()):
                     locls[op.result] = op(**locls)
-                except:
-                    continue
             result = {}
-            for var in coordinate_model.variables:  
+            for var in coordinate_model.variables:
                 if var in locls:  # Try this first.
                     result[var] = locls[var]
-                elif var == "X":  #  XXX: This just works for the stuff currently in EFD.
+                elif var == "X":  # XXX: This just works for the stuff currently in EFD.
                     result[var] = self.coords["x"]
                 elif var == "Y":
                     result[var] = self.coords["y"]
                 elif var.startswith("Z"):
                     result[var] = Mod(1, curve.prime)
                 elif var == "T":
-                    result[var] = Mod(int(affine_point.coords["x"] * affine_point.coords["y"]), curve.prime)
+                    result[var] = Mod(int(self.coords["x"] * self.coords["y"]), curve.prime)
                 else:
                     raise NotImplementedError
             return action.exit(Point(coordinate_model, **result))
@@ -170,3 +137,65 @@ class InfinityPoint(Point):
 
     def __repr__(self):
         return f"InfinityPoint({self.coordinate_model})"
+
+
+def _to_mod(value: Any, coords: Mapping[str, Any]) -> Mod:
+    """Get the `value` as an element of the field of the coordinates (formulas may set integers)."""
+    if isinstance(value, Mod):
+        return value
+    n = next(coord.n for coord in coords.values() if isinstance(coord, Mod))
+    return Mod(value, n)
+
+
+@public
+def batch_to_affine(points: Sequence[Point]) -> List[Point]:
+    """
+    Convert the points into the affine coordinate model, like :py:meth:`Point.to_affine`.
+
+    The divisions in the mapping are batched over all of the points with the same coordinate
+    model and prime, using a single inversion for each (Montgomery's trick).
+
+    :param points: The points.
+    :return: The affine points.
+    """
+    result: List[Optional[Point]] = [None] * len(points)
+    groups: MutableMapping[Tuple[CoordinateModel, Optional[int]], List[int]] = {}
+    for i, point in enumerate(points):
+        if isinstance(point, InfinityPoint):
+            result[i] = point.to_affine()
+        elif isinstance(point.coordinate_model, AffineCoordinateModel):
+            affine_model = point.coordinate_model
+            with CoordinateMappingAction(affine_model, affine_model, point) as action:
+                result[i] = action.exit(copy(point))
+        else:
+            prime = next((coord.n for coord in point.coords.values() if isinstance(coord, Mod)), None)
+            groups.setdefault((point.coordinate_model, prime), []).append(i)
+    for (model, _), indices in groups.items():
+        affine_model = AffineCoordinateModel(model.curve_model)
+        ops = model.satisfying_ops
+        if not set(op.result for op in ops).issuperset(affine_model.variables):
+            raise NotImplementedError
+        locls = [{**points[i].coords} for i in indices]
+        for op in ops:
+            missing = (op.variables | op.parameters) - locls[0].keys()
+            if missing:
+                if op.result in affine_model.variables:
+                    raise NameError(f"name '{next(iter(missing))}' is not defined")
+                continue
+            if op.operator in (OpType.Div, OpType.Inv) and isinstance(op.right, str):
+                inverses = batch_inverse([_to_mod(values[op.right], values) for values in locls])
+                for values, inverse in zip(locls, inverses):
+                    if op.operator == OpType.Inv:
+                        values[op.result] = inverse
+                    elif isinstance(op.left, str):
+                        values[op.result] = values[op.left] * inverse
+                    else:
+                        values[op.result] = inverse * op.left
+            else:
+                for values in locls:
+                    values[op.result] = op(**values)
+        for i, values in zip(indices, locls):
+            coords = {op.result: values[op.result] for op in ops if op.result in affine_model.variables}
+            with CoordinateMappingAction(model, affine_model, points[i]) as action:
+                result[i] = action.exit(Point(affine_model, **coords))
+    return result  # type: ignore
@@ -1,16 +1,16 @@
 import hashlib
 import secrets
-from typing import Optional, Any
+from typing import Optional, Any, Sequence as SequenceType, List, Tuple, Dict
 
 from asn1crypto.core import Sequence, SequenceOf, Integer
 from public import public
 
 from .context import Action
-from .formula import AdditionFormula
+from .formula import AdditionFormula, DoublingFormula
 from .mod import Mod
-from .mult import ScalarMultiplier
+from .mult import ScalarMultiplier, MultiScalarMultiplier, PippengerMultiplier
 from .params import DomainParameters
-from .point import Point
+from .point import Point, batch_to_affine
 
 
 @public
@@ -100,7 +100,12 @@ class ECDSAVerifyAction(ECDSAAction):
 
 @public
 class Signature(object):
-    """An EC based signature primitive. (ECDSA)"""
+    """
+    An EC based signature primitive. (ECDSA)
+
+    If the scalar multiplier is a :py:class:`MultiScalarMultiplier <pyecsca.ec.mult.MultiScalarMultiplier>`,
+    verification computes `u1 * G + u2 * Q` using a single multi-scalar multiplication.
+    """
     mult: ScalarMultiplier
     params: DomainParameters
     add: Optional[AdditionFormula]
@@ -173,24 +178,73 @@ class Signature(object):
                 digest = self.hash_algo(data).digest()
             return self._do_sign(k, digest)
 
-    def _do_verify(self, signature: SignatureResult, digest: bytes) -> bool:
-        if self.pubkey is None or self.add is None:
-            return False
+    def _verify_scalars(self, signature: SignatureResult, digest: bytes) -> Tuple[Mod, Mod]:
         z = int.from_bytes(digest, byteorder="big")
         if len(digest) * 8 > self.params.order.bit_length():
             z >>= len(digest) * 8 - self.params.order.bit_length()
         c = Mod(signature.s, self.params.order).inverse()
         u1 = Mod(z, self.params.order) * c
         u2 = Mod(signature.r, self.params.order) * c
-        self.mult.init(self.params, self.params.generator)
-        p1 = self.mult.multiply(int(u1))
-        self.mult.init(self.params, self.pubkey)
-        p2 = self.mult.multiply(int(u2))
-        p = self.add(p1, p2, **self.params.curve.parameters)[0]
+        return u1, u2
+
+    def _do_verify(self, signature: SignatureResult, digest: bytes,
+                   pubkey: Optional[Point] = None) -> bool:
+        if pubkey is None:
+            pubkey = self.pubkey
+        if pubkey is None or self.add is None:
+            return False
+        u1, u2 = self._verify_scalars(signature, digest)
+        if isinstance(self.mult, MultiScalarMultiplier):
+            self.mult.init(self.params, self.params.generator, pubkey)
+            p = self.mult.multiply(int(u1), int(u2))
+        else:
+            self.mult.init(self.params, self.params.generator)
+            p1 = self.mult.multiply(int(u1))
+            self.mult.init(self.params, pubkey)
+            p2 = self.mult.multiply(int(u2))
+            p = self.add(p1, p2, **self.params.curve.parameters)[0]
+        if p == self.params.curve.neutral:
+            return False
         affine = p.to_affine()
         v = Mod(int(affine.x), self.params.order)
         return signature.r == int(v)
 
+    def _combination(self, mult: MultiScalarMultiplier,
+                     terms: Dict[Tuple[int, ...], Tuple[Point, int]]) -> Optional[Point]:
+        terms = {key: term for key, term in terms.items() if term[1] != 0}
+        if not terms:
+            return None
+        mult.init(self.params, *(point for point, _ in terms.values()))
+        return mult.multiply(*(coeff for _, coeff in terms.values()))
+
+    def _do_verify_batch(self, mult: MultiScalarMultiplier,
+                         entries: List[Tuple[Mod, Mod, Point, Point]]) -> bool:
+        n = self.params.order
+
+        def add_term(terms: Dict[Tuple[int, ...], Tuple[Point, int]], point: Point, affine: Point,
+                     coeff: int):
+            # Equal points are merged, so that the multiplication does not add a point to itself.
+            key = tuple(int(value) for value in affine.coords.values())
+            prev = terms.get(key, (point, 0))[1]
+            terms[key] = (point, (prev + coeff) % n)
+
+        generator = self.params.generator
+        affine = batch_to_affine([generator] + [point for entry in entries for point in entry[2:]])
+        lhs: Dict[Tuple[int, ...], Tuple[Point, int]] = {}
+        rhs: Dict[Tuple[int, ...], Tuple[Point, int]] = {}
+        for i, (u1, u2, pubkey, point) in enumerate(entries):
+            a = secrets.randbits(64) | 1
+            add_term(lhs, generator, affine[0], a * int(u1))
+            add_term(lhs, pubkey, affine[2 * i + 1], a * int(u2))
+            add_term(rhs, point, affine[2 * i + 2], a)
+        left = self._combination(mult, lhs)
+        right = self._combination(mult, rhs)
+        if left is None or right is None:
+            return left is None and right is None
+        left_affine, right_affine = batch_to_affine([left, right])
+        # A degenerate result of incomplete formulas is not on the curve.
+        return left_affine == right_affine and self.params.curve.is_on_curve(left_affine)
+
     def verify_hash(self, signature: SignatureResult, digest: bytes) -> bool:
         """Verify already hashed data."""
         if not self.can_verify:
@@ -208,6 +262,77 @@ class Signature(object):
                 digest = self.hash_algo(data).digest()
             return self._do_verify(signature, digest)
 
+    def verify_batch(self, signatures: SequenceType[SignatureResult], digests: SequenceType[bytes],
+                     pubkeys: Optional[SequenceType[Point]] = None,
+                     points: Optional[SequenceType[Optional[Point]]] = None) -> List[bool]:
+        """
+        Verify a batch of signatures of already hashed data.
+
+        The signatures with a known point `R = k * G` are verified together, by checking that
+        `sum(a_i * u1_i) * G + sum(a_i * u2_i * Q_i) = sum(a_i * R_i)` for random 64-bit `a_i`,
+        using multi-scalar multiplications (by the multiplier of this instance if it is a
+        :py:class:`MultiScalarMultiplier <pyecsca.ec.mult.MultiScalarMultiplier>`, otherwise by
+        a :py:class:`PippengerMultiplier <pyecsca.ec.mult.PippengerMultiplier>`). If the check
+        fails, the batch is split in halves which are checked recursively, down to a few signatures
+        which are verified as usual, to find the invalid ones. The other signatures are verified
+        one by one, as `R` cannot be recovered from `r` alone (its sign is unknown).
+
+        :param signatures: The signatures.
+        :param digests: The digests of the signed data.
+        :param pubkeys: The public keys, the public key of this instance for all of the signatures if `None`.
+        :param points: The points `R` of the signatures, `None` for those where it is not known.
+        :return: Whether each of the signatures is valid.
+        """
+        if pubkeys is None:
+            if self.pubkey is None:
+                raise RuntimeError("This instance cannot verify.")
+            pubkeys = [self.pubkey] * len(signatures)
+        if points is None:
+            points = [None] * len(signatures)
+        if not len(signatures) == len(digests) == len(pubkeys) == len(points):
+            raise ValueError("The numbers of signatures, digests, public keys and points differ.")
+        if self.add is None:
+            raise RuntimeError("This instance cannot verify.")
+        n = self.params.order
+        result = [False] * len(signatures)
+        batch = []
+        known: Dict[int, Point] = {i: point for i, point in enumerate(points) if point is not None}
+        affine = dict(zip(known.keys(), batch_to_affine(list(known.values()))))
+        for i, (signature, digest, pubkey) in enumerate(zip(signatures, digests, pubkeys)):
+            if i in affine and 0 < signature.r < n and 0 < signature.s < n and \
+                    int(affine[i].x) % n == signature.r:
+                batch.append(i)
+            else:
+                result[i] = self._do_verify(signature, digest, pubkey)
+        batch_mult: Optional[MultiScalarMultiplier] = None
+        dbl = self.mult.formulas.get("dbl")
+        if isinstance(self.mult, MultiScalarMultiplier):
+            batch_mult = self.mult
+        elif isinstance(dbl, DoublingFormula):
+            batch_mult = PippengerMultiplier(self.add, dbl)
+
+        def verify(indices: List[int], invalid: bool = False) -> bool:
+            if len(indices) <= 4 or batch_mult is None:
+                for i in indices:
+                    result[i] = self._do_verify(signatures[i], digests[i], pubkeys[i])
+                return all(result[i] for i in indices)
+            if not invalid:
+                entries = [(*self._verify_scalars(signatures[i], digests[i]), pubkeys[i], known[i])
+                           for i in indices]
+                if self._do_verify_batch(batch_mult, entries):
+                    for i in indices:
+                        result[i] = True
+                    return True
+            half = len(indices) // 2
+            # If the first half is valid, the invalid signatures are in the second one.
+            first = verify(indices[:half])
+            verify(indices[half:], first)
+            return False
+
+        if batch:
+            verify(batch)
+        return result
+
 
 @public
 class ECDSA_NONE(Signature):
@@ -4,3 +4,4 @@ from .scope import *
 from .target import *
 from .trace import *
 from .trace_set import *
+from .acquisition import *
@@ -0,0 +1,288 @@
+"""
+This module provides a pipelined acquisition loop, which overlaps driving the target, collecting
+the traces from the scope and storing them.
+
+The acquisition runs in three threads connected by bounded queues:
+
+ 1. The target stage arms the scope for a batch of traces (see :py:meth:`Scope.setup_segments
+    <pyecsca.sca.scope.base.Scope.setup_segments>`) and runs the operation on the target once
+    per trace.
+ 2. The collection stage retrieves the batch from the scope and creates the traces. The scope is
+    handed back to the target stage as soon as the batch is retrieved.
+ 3. The storage stage appends the traces to a streaming trace set writer.
+
+When a later stage cannot keep up, the queue in front of it fills and blocks the earlier stages.
+"""
+from functools import wraps
+from pathlib import Path
+from queue import Queue, Empty, Full
+from threading import Thread, Event, Semaphore
+from time import perf_counter
+from typing import Callable, Optional, Mapping, Any, Union, List, MutableMapping, Tuple
+
+import numpy as np
+from public import public
+
+from .scope import Scope, SampleType
+from .trace import Trace
+from .trace_set.convert import TraceSetWriter, WRITERS, guess_format
+
+
+@public
+class StageStats(object):
+    """The latencies of one stage of the acquisition, in seconds."""
+    name: str
+    durations: List[float]
+
+    def __init__(self, name: str):
+        self.name = name
+        self.durations = []
+
+    def record(self, duration: float):
+        self.durations.append(duration)
+
+    @property
+    def total(self) -> float:
+        return sum(self.durations)
+
+    def percentile(self, q: float) -> float:
+        """
+        Get a percentile of the latencies.
+
+        :param q: The percentile, between 0 and 100.
+        :return: The latency.
+        """
+        return float(np.percentile(self.durations, q)) if self.durations else 0.0
+
+    def histogram(self, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a histogram of the latencies, with logarithmically spaced bins.
+
+        :param bins: The number of bins.
+        :return: The counts and the bin edges, like :py:func:`numpy.histogram`.
+        """
+        if not self.durations:
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+        durations = np.asarray(self.durations)
+        low = max(durations.min(), 1e-9)
+        high = max(durations.max(), low * (1 + 1e-9))
+        return np.histogram(durations, bins=np.geomspace(low, high, bins + 1))
+
+    def __str__(self):
+        return (f"{self.name}: {len(self.durations)}x, total {self.total:.3f} s, "
+                f"median {self.percentile(50) * 1e3:.3f} ms, p99 {self.percentile(99) * 1e3:.3f} ms")
+
+    def __repr__(self):
+        return f"StageStats({self})"
+
+
+@public
+class AcquisitionStats(object):
+    """The statistics of an acquisition."""
+    traces: int
+    duration: float
+    stages: MutableMapping[str, StageStats]
+
+    def __init__(self):
+        self.traces = 0
+        self.duration = 0.0
+        self.stages = {name: StageStats(name)
+                       for name in ("target", "capture", "retrieve", "collect", "store")}
+
+    @property
+    def traces_per_hour(self) -> float:
+        return self.traces * 3600 / self.duration if self.duration else 0.0
+
+    def __str__(self):
+        lines = [f"{self.traces} traces in {self.duration:.2f} s ({self.traces_per_hour:.0f} traces/h)"]
+        lines.extend(str(stage) for stage in self.stages.values())
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"AcquisitionStats({self.traces} traces in {self.duration:.2f} s)"
+
+
+class _Stopped(Exception):
+    pass
+
+
+@public
+class Acquisition(object):
+    """
+    A pipelined acquisition of traces.
+
+    The `operation` is called with the index of the trace, it should make the target perform the
+    measured operation (e.g. using :py:class:`SimpleSerialTarget <pyecsca.sca.target.simpleserial.SimpleSerialTarget>`)
+    and return the metadata of the trace (e.g. the plaintext and ciphertext). The scope needs to be
+    set up (frequency, channel and trigger) beforehand.
+    """
+    scope: Scope
+    channel: str
+    operation: Callable[[int], Optional[Mapping[str, Any]]]
+    num_traces: int
+    batch_size: int
+    queue_size: int
+    type: SampleType
+    dtype: Any
+    timeout: Optional[int]
+
+    def __init__(self, scope: Scope, channel: str,
+                 operation: Callable[[int], Optional[Mapping[str, Any]]], num_traces: int,
+                 batch_size: int = 1, queue_size: int = 8, type: SampleType = SampleType.Volt,
+                 dtype=np.float32, timeout: Optional[int] = None):
+        """
+        :param scope: The scope, set up for capture.
+        :param channel: The channel to capture.
+        :param operation: The operation to run on the target per trace.
+        :param num_traces: The number of traces to acquire.
+        :param batch_size: The number of traces captured per arm of the scope.
+        :param queue_size: The number of batches that can wait for storage.
+        :param type: The type of the captured samples.
+        :param dtype: The data type of the captured samples.
+        :param timeout: The timeout of a capture in milliseconds.
+        """
+        self.scope = scope
+        self.channel = channel
+        self.operation = operation
+        self.num_traces = num_traces
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.type = type
+        self.dtype = dtype
+        self.timeout = timeout
+
+    def run(self, output: Union[str, Path, TraceSetWriter], format: Optional[str] = None,
+            **kwargs) -> AcquisitionStats:
+        """
+        Run the acquisition, storing the traces into `output`.
+
+        :param output: A path, or a streaming trace set writer (see :py:mod:`convert <pyecsca.sca.trace_set.convert>`).
+        :param format: The format of the output path, guessed from the path if `None`.
+        :param kwargs: Trace set attributes stored with the traces.
+        :return: The statistics of the acquisition.
+        """
+        if isinstance(output, (str, Path)):
+            if format is None:
+                format = guess_format(output)
+            writer = WRITERS[format](output, self.num_traces, kwargs)
+        else:
+            writer = output
+        stats = AcquisitionStats()
+        batch_size = self.scope.setup_segments(self.batch_size, [self.channel], self.type, self.dtype)
+
+        stop = Event()
+        scope_free = Semaphore(1)
+        captured: Queue = Queue(maxsize=1)
+        collected: Queue = Queue(maxsize=self.queue_size)
+        errors: List[BaseException] = []
+
+        def put(queue: Queue, item):
+            while True:
+                if stop.is_set():
+                    raise _Stopped
+                try:
+                    queue.put(item, timeout=0.05)
+                    return
+                except Full:
+                    continue
+
+        def get(queue: Queue):
+            while True:
+                if stop.is_set():
+                    raise _Stopped
+                try:
+                    return queue.get(timeout=0.05)
+                except Empty:
+                    continue
+
+        def acquire():
+            while not scope_free.acquire(timeout=0.05):
+                if stop.is_set():
+                    raise _Stopped
+
+        def stage(func):
+            @wraps(func)
+            def wrapper():
+                try:
+                    func()
+                except _Stopped:
+                    pass
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+            return wrapper
+
+        @stage
+        def target_stage():
+            for start in range(0, self.num_traces, batch_size):
+                count = min(batch_size, self.num_traces - start)
+                acquire()
+                if count != batch_size:
+                    self.scope.setup_segments(count, [self.channel], self.type, self.dtype)
+                self.scope.arm_batch()
+                metas = []
+                for index in range(start, start + count):
+                    begin = perf_counter()
+                    meta = self.operation(index)
+                    stats.stages["target"].record(perf_counter() - begin)
+                    metas.append(dict(meta) if meta is not None else {})
+                    begin = perf_counter()
+                    if not self.scope.capture_segment(self.timeout):
+                        raise TimeoutError(f"Capture of trace {index} timed out.")
+                    stats.stages["capture"].record(perf_counter() - begin)
+                begin = perf_counter()
+                if not self.scope.capture_batch(self.timeout):
+                    raise TimeoutError(f"Capture of batch at trace {start} timed out.")
+                stats.stages["capture"].record(perf_counter() - begin)
+                put(captured, metas)
+            put(captured, None)
+
+        @stage
+        def collect_stage():
+            while True:
+                metas = get(captured)
+                if metas is None:
+                    break
+                begin = perf_counter()
+                samples = self.scope.retrieve_batch(self.channel)
+                scope_free.release()
+                stats.stages["retrieve"].record(perf_counter() - begin)
+                if samples is None or len(samples) != len(metas):
+                    raise ValueError("The scope did not capture the whole batch.")
+                begin = perf_counter()
+                traces = [Trace(samples[i], {**meta, "channel": self.channel}) for i, meta in enumerate(metas)]
+                stats.stages["collect"].record(perf_counter() - begin)
+                put(collected, traces)
+            put(collected, None)
+
+        @stage
+        def store_stage():
+            while True:
+                traces = get(collected)
+                if traces is None:
+                    break
+                begin = perf_counter()
+                writer.append(traces)
+                stats.stages["store"].record(perf_counter() - begin)
+                stats.traces += len(traces)
+
+        start = perf_counter()
+        threads = [Thread(target=func, name=f"acquisition-{func.__name__}", daemon=True)
+                   for func in (target_stage, collect_stage, store_stage)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+        finally:
+            stop.set()
+            writer.close()
+            stats.duration = perf_counter() - start
+        if errors:
+            raise errors[0]
+        return stats
@@ -1,6 +1,8 @@
 from enum import Enum, auto
-from typing import Tuple, Sequence, Optional
+from time import perf_counter, sleep
+from typing import Tuple, Sequence, Optional, MutableMapping, List, Callable
 
+import numpy as np
 from public import public
 
 from ..trace import Trace
@@ -12,9 +14,51 @@ class SampleType(Enum):
     Volt = auto()
 
 
+@public
+class WaitType(Enum):
+    """
+    How a scope waits for a capture to finish: polling it every millisecond (the default), sleeping for the
+    expected capture duration and then polling with an exponentially increasing period (backoff),
+    or waiting for a notification from the scope driver (event), if supported.
+    """
+    Poll = auto()
+    Backoff = auto()
+    Event = auto()
+
+
 @public
 class Scope(object):
-    """An oscilloscope."""
+    """
+    An oscilloscope.
+
+    Besides capturing one trace per arm, a scope can capture a batch of traces into segments of its
+    memory (e.g. PicoScope rapid block mode), with one arm and one retrieval per batch::
+
+        scope.setup_segments(100, ["A"])
+        scope.arm_batch()
+        for _ in range(100):
+            target.run()
+            scope.capture_segment()
+        scope.capture_batch()
+        samples = scope.retrieve_batch("A")
+
+    Scopes without segmented memory emulate this by capturing, retrieving and re-arming for
+    every segment.
+    """
+    segments: int
+    wait_type: WaitType
+    _batch_channels: Sequence[str]
+    _batch_type: SampleType
+    _batch_dtype: np.dtype
+    _batch: MutableMapping[str, List[np.ndarray]]
+
+    def __init__(self):
+        self.segments = 1
+        self.wait_type = WaitType.Poll
+        self._batch_channels = []
+        self._batch_type = SampleType.Volt
+        self._batch_dtype = np.dtype(np.float32)
+        self._batch = {}
 
     def open(self) -> None:
         """Open the connection to the scope."""
@@ -77,6 +121,45 @@ class Scope(object):
         """
         raise NotImplementedError
 
+    def setup_wait(self, type: WaitType) -> WaitType:
+        """
+        Setup how the scope waits for a capture to finish in :py:meth:`capture`. The scope might
+        not support the requested type and will fall back to a supported one.
+
+        :param type: The requested wait type.
+        :return: The actual wait type.
+        """
+        self.wait_type = WaitType.Backoff if type == WaitType.Event else type
+        return self.wait_type
+
+    def _wait_ready(self, is_ready: Callable[[], bool], timeout: Optional[int] = None,
+                    ready_at: Optional[float] = None) -> bool:
+        """
+        Wait until `is_ready` returns `True`, according to the wait type.
+
+        :param is_ready: The readiness check.
+        :param timeout: A time in milliseconds to wait, returns `False` if it runs out.
+        :param ready_at: The earliest time (:py:func:`time.perf_counter`) the capture can finish,
+                         e.g. the arm time plus the capture duration, if known.
+        :return: Whether the scope got ready.
+        """
+        start = perf_counter()
+        deadline = start + timeout / 1000 if timeout is not None else None
+        period = 20e-6 if self.wait_type == WaitType.Backoff else 0.001
+        if self.wait_type == WaitType.Backoff and ready_at is not None and ready_at > start:
+            if deadline is not None:
+                ready_at = min(ready_at, deadline)
+            sleep(ready_at - start)
+        while not is_ready():
+            now = perf_counter()
+            if deadline is not None and now >= deadline:
+                return False
+            sleep(period if deadline is None else min(period, deadline - now))
+            if self.wait_type == WaitType.Backoff:
+                # The sleep never exceeds the time waited so far, at most doubling the latency.
+                period = min(period * 2, 0.001, max(now - start, 20e-6))
+        return True
+
     def arm(self) -> None:
         """Arm the scope, it will listen for the trigger after this point."""
         raise NotImplementedError
@@ -101,6 +184,69 @@ class Scope(object):
         """
         raise NotImplementedError
 
+    def setup_segments(self, segments: int, channels: Sequence[str],
+                       type: SampleType = SampleType.Volt, dtype=np.float32) -> int:
+        """
+        Setup the number of segments (traces) captured in one batch and the channels that will be
+        retrieved, after the frequency and channels are set up. The scope might not support the
+        requested number of segments and will adjust it.
+
+        :param segments: The requested number of segments.
+        :param channels: The channels to capture and retrieve in a batch.
+        :param type: The type of returned samples.
+        :param dtype: The data type of the returned samples, should be numpy dtype-like.
+        :return: The actual number of segments.
+        """
+        self.segments = segments
+        self._batch_channels = list(channels)
+        self._batch_type = type
+        self._batch_dtype = np.dtype(dtype)
+        return segments
+
+    def arm_batch(self) -> None:
+        """Arm the scope for the capture of a batch, it will capture a segment per trigger."""
+        self._batch = {channel: [] for channel in self._batch_channels}
+        self.arm()
+
+    def capture_segment(self, timeout: Optional[int] = None) -> bool:
+        """
+        Wait for the capture of the current segment of a batch, call this after each triggering
+        operation. Scopes with segmented memory re-arm on their own and return immediately.
+
+        :param timeout: A time in milliseconds to wait for the segment.
+        :return: Whether the capture was successful (or it timed out).
+        """
+        if not self.capture(timeout):
+            return False
+        for channel in self._batch_channels:
+            trace = self.retrieve(channel, self._batch_type, self._batch_dtype)
+            if trace is not None:
+                self._batch[channel].append(trace.samples)
+        if any(len(captured) < self.segments for captured in self._batch.values()):
+            self.arm()
+        return True
+
+    def capture_batch(self, timeout: Optional[int] = None) -> bool:
+        """
+        Wait for the capture of all segments of a batch.
+
+        :param timeout: A time in milliseconds to wait for the batch.
+        :return: Whether the capture was successful (or it timed out).
+        """
+        return all(len(captured) == self.segments for captured in self._batch.values())
+
+    def retrieve_batch(self, channel: str) -> Optional[np.ndarray]:
+        """
+        Retrieve the captured batch of a channel.
+
+        :param channel: The channel to retrieve the batch from.
+        :return: The samples, one segment per row (segments x samples), if any.
+        """
+        captured = self._batch.get(channel)
+        if not captured:
+            return None
+        return np.stack(captured)
+
     def stop(self) -> None:
         """Stop the capture, if any."""
         raise NotImplementedError
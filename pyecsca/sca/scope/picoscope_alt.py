@@ -1,4 +1,4 @@
-from time import time_ns, sleep
+from time import perf_counter
 import numpy as np
 from typing import Optional, Tuple, Sequence, Union
 
@@ -20,6 +20,9 @@ class PicoScopeAlt(Scope):  # pragma: no cover
         self.ps = ps
         self.trig_ratio: float = 0.0
         self.frequency: Optional[float] = None
+        self.samples: Optional[int] = None
+        self._rapid_block = False
+        self._armed_at: Optional[float] = None
 
     def open(self) -> None:
         self.ps.open()
@@ -35,6 +38,7 @@ class PicoScopeAlt(Scope):  # pragma: no cover
             self.trig_ratio = (pretrig / samples)
             samples = max_samples
         self.frequency = actual_frequency
+        self.samples = samples
         return actual_frequency, samples
 
     def setup_channel(self, channel: str, coupling: str, range: float, offset: float, enable: bool) -> None:
@@ -48,15 +52,20 @@ class PicoScopeAlt(Scope):  # pragma: no cover
         pass
 
     def arm(self) -> None:
+        if self._rapid_block:
+            self.teardown_segments()
+        self._run_block()
+
+    def _run_block(self) -> None:
         self.ps.runBlock()
+        self._armed_at = perf_counter()
 
     def capture(self, timeout: Optional[int] = None) -> bool:
-        start = time_ns()
-        while not self.ps.isReady():
-            sleep(0.001)
-            if timeout is not None and (time_ns() - start) / 1e6 >= timeout:
-                return False
-        return True
+        ready_at = None
+        if self._armed_at is not None and self.samples and self.frequency:
+            segments = self.segments if self._rapid_block else 1
+            ready_at = self._armed_at + segments * self.samples / self.frequency
+        return self._wait_ready(self.ps.isReady, timeout, ready_at)
 
     def retrieve(self, channel: str, type: SampleType, dtype=np.float32) -> Optional[Trace]:
         if type == SampleType.Raw:
@@ -67,6 +76,52 @@ class PicoScopeAlt(Scope):  # pragma: no cover
             return None
         return Trace(data, {"sampling_frequency": self.frequency, "channel": channel, "sample_type": type})
 
+    def setup_segments(self, segments: int, channels: Sequence[str],
+                       type: SampleType = SampleType.Volt, dtype=np.float32) -> int:
+        self._set_segments(segments)
+        self._rapid_block = True
+        return super().setup_segments(segments, channels, type, dtype)
+
+    def _set_segments(self, segments: int) -> None:
+        if self.samples is None:
+            raise ValueError
+        max_samples = self.ps.memorySegments(segments)
+        if max_samples < self.samples:
+            raise ValueError(f"Segments of {max_samples} samples cannot hold {self.samples} samples.")
+        self.ps.setNoOfCaptures(segments)
+
+    def teardown_segments(self) -> None:
+        """
+        Leave the rapid block mode set up by :py:meth:`setup_segments`, restoring a single memory
+        segment and capture. This is done automatically by :py:meth:`arm`, while
+        :py:meth:`arm_batch` returns to the rapid block mode.
+        """
+        if not self._rapid_block:
+            return
+        self._rapid_block = False
+        self._set_segments(1)
+
+    def arm_batch(self) -> None:
+        if not self._rapid_block:
+            self._set_segments(self.segments)
+            self._rapid_block = True
+        self._run_block()
+
+    def capture_segment(self, timeout: Optional[int] = None) -> bool:
+        return True
+
+    def capture_batch(self, timeout: Optional[int] = None) -> bool:
+        return self.capture(timeout)
+
+    def retrieve_batch(self, channel: str) -> Optional[np.ndarray]:
+        if channel not in self._batch_channels:
+            return None
+        data, _, _ = self.ps.getDataRawBulk(channel, self.samples, 0, self.segments - 1)
+        if self._batch_type == SampleType.Raw:
+            return data.astype(dtype=self._batch_dtype, copy=False)
+        return self.ps.rawToV(channel, data, np.empty(data.shape, dtype=self._batch_dtype),
+                              dtype=self._batch_dtype)
+
     def stop(self) -> None:
         self.ps.stop()
 
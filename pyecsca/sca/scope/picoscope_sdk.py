@@ -1,9 +1,11 @@
 import ctypes
 from math import log2, floor
-from time import time_ns, sleep
-from typing import Mapping, Optional, MutableMapping, Union, Tuple
+from threading import Event
+from time import perf_counter
+from typing import Mapping, Optional, MutableMapping, Union, Tuple, Sequence, overload
 
 import numpy as np
+from picosdk.ctypes_wrapper import C_CALLBACK_FUNCTION_FACTORY
 from picosdk.errors import CannotFindPicoSDKError
 from picosdk.functions import assert_pico_ok
 from picosdk.library import Library
@@ -25,16 +27,31 @@ except CannotFindPicoSDKError as exc:
     ps6000 = exc
 from public import public
 
-from .base import Scope, SampleType
+from .base import Scope, SampleType, WaitType
 from ..trace import Trace
 
+BlockReadyType = C_CALLBACK_FUNCTION_FACTORY(None, ctypes.c_int16, ctypes.c_uint32, ctypes.c_void_p)
+
+
+@overload
+def adc2volt(adc: np.ndarray, volt_range: float, adc_minmax: int, dtype=np.float32,
+             out: Optional[np.ndarray] = None) -> np.ndarray:  # pragma: no cover
+    ...
+
+
+@overload
+def adc2volt(adc: ctypes.c_int16, volt_range: float, adc_minmax: int, dtype=np.float32,
+             out: Optional[np.ndarray] = None) -> float:  # pragma: no cover
+    ...
+
 
 def adc2volt(adc: Union[np.ndarray, ctypes.c_int16],
-             volt_range: float, adc_minmax: int, dtype=np.float32) -> Union[np.ndarray, float]:  # pragma: no cover
+             volt_range: float, adc_minmax: int, dtype=np.float32,
+             out: Optional[np.ndarray] = None) -> Union[np.ndarray, float]:  # pragma: no cover
     if isinstance(adc, ctypes.c_int16):
         return (adc.value / adc_minmax) * volt_range
     if isinstance(adc, np.ndarray):
-        return ((adc / adc_minmax) * volt_range).astype(dtype=dtype, copy=False)
+        return np.multiply(adc, volt_range / adc_minmax, out=out, dtype=dtype if out is None else out.dtype)
     raise ValueError
 
 
@@ -64,6 +81,8 @@ class PicoScopeSdk(Scope):  # pragma: no cover
         "rising": 2,
         "falling": 3
     }
+    RAPID_BLOCK: bool = True
+    BLOCK_READY: bool = True
     _variant: Optional[str]
 
     def __init__(self, variant: Optional[str] = None):
@@ -74,9 +93,16 @@ class PicoScopeSdk(Scope):  # pragma: no cover
         self.posttrig: Optional[int] = None
         self.samples: Optional[int] = None
         self.timebase: Optional[int] = None
-        self.buffers: MutableMapping = {}
+        self.buffers: MutableMapping[str, np.ndarray] = {}
+        self.volt_buffers: MutableMapping[str, np.ndarray] = {}
+        self.bulk_buffers: MutableMapping[str, np.ndarray] = {}
         self.ranges: MutableMapping = {}
         self._variant = variant
+        self._bulk_retrieved = False
+        self._rapid_block = False
+        self._armed_at: Optional[float] = None
+        self._ready = Event()
+        self._block_ready = BlockReadyType(lambda handle, status, parameter: self._ready.set())
 
     def open(self) -> None:
         assert_pico_ok(self.__dispatch_call("OpenUnit", ctypes.byref(self.handle)))
@@ -157,42 +183,82 @@ class PicoScopeSdk(Scope):  # pragma: no cover
     def set_buffer(self, channel: str, enable: bool):
         if self.samples is None:
             raise ValueError
+        if self._rapid_block:
+            self.teardown_segments()
         if enable:
-            if channel in self.buffers:
-                del self.buffers[channel]
-            buffer = (ctypes.c_int16 * self.samples)()
-            assert_pico_ok(
-                    self.__dispatch_call("SetDataBuffer", self.handle, self.CHANNELS[channel],
-                                         ctypes.byref(buffer), self.samples))
+            buffer = self.buffers.get(channel)
+            if buffer is None or len(buffer) != self.samples:
+                buffer = np.zeros(self.samples, dtype=np.int16)
+                self.volt_buffers.pop(channel, None)
+            self.set_data_buffer(channel, np.ctypeslib.as_ctypes(buffer), self.samples)
             self.buffers[channel] = buffer
         else:
-            assert_pico_ok(
-                    self.__dispatch_call("SetDataBuffer", self.handle, self.CHANNELS[channel],
-                                         None, self.samples))
+            self.set_data_buffer(channel, None, self.samples)
             del self.buffers[channel]
+            self.volt_buffers.pop(channel, None)
+
+    def set_data_buffer(self, channel: str, buffer: Optional[ctypes.Array], length: int):
+        assert_pico_ok(
+                self.__dispatch_call("SetDataBuffer", self.handle, self.CHANNELS[channel],
+                                     buffer, length))
+
+    def setup_wait(self, type: WaitType) -> WaitType:
+        if type == WaitType.Event and self.BLOCK_READY:
+            self.wait_type = type
+            return type
+        return super().setup_wait(type)
 
     def arm(self):
+        if self._rapid_block:
+            self.teardown_segments()
+        self._run_block()
+
+    def _run_block(self):
         if self.samples is None or self.timebase is None:
             raise ValueError
+        callback = None
+        if self.wait_type == WaitType.Event:
+            self._ready.clear()
+            callback = self._block_ready
         assert_pico_ok(
                 self.__dispatch_call("RunBlock", self.handle, self.pretrig, self.posttrig,
                                      self.timebase, 0,
-                                     None, 0, None, None))
+                                     None, 0, callback, None))
+        self._armed_at = perf_counter()
 
     def capture(self, timeout: Optional[int] = None) -> bool:
-        start = time_ns()
         if self.samples is None:
             raise ValueError
+        if self.wait_type == WaitType.Event:
+            return self._ready.wait(timeout / 1000 if timeout is not None else None)
         ready = ctypes.c_int16(0)
-        check = ctypes.c_int16(0)
-        while ready.value == check.value:
-            sleep(0.001)
-            assert_pico_ok(self.__dispatch_call("IsReady", self.handle, ctypes.byref(ready)))
-            if timeout is not None and (time_ns() - start) / 1e6 >= timeout:
-                return False
-        return True
 
-    def retrieve(self, channel: str, type: SampleType, dtype=np.float32) -> Optional[Trace]:
+        def is_ready():
+            assert_pico_ok(self.__dispatch_call("IsReady", self.handle, ctypes.byref(ready)))
+            return ready.value != 0
+
+        ready_at = None
+        if self._armed_at is not None and self.frequency:
+            segments = self.segments if self._rapid_block else 1
+            ready_at = self._armed_at + segments * self.samples / self.frequency
+        return self._wait_ready(is_ready, timeout, ready_at)
+
+    def retrieve(self, channel: str, type: SampleType, dtype=np.float32,
+                 copy: bool = True) -> Optional[Trace]:
+        """
+        Retrieve a captured trace of a channel.
+
+        The samples are transferred into a buffer registered once per channel. With `copy` set to
+        `False` no new arrays are allocated, raw samples are a view of that buffer (the dtype is
+        ignored) and samples in volts are converted into a reused per-channel buffer, both get
+        overwritten by the next retrieval.
+
+        :param channel: The channel to retrieve the trace from.
+        :param type: The type of returned samples.
+        :param dtype: The data type of the returned samples, should be numpy dtype-like.
+        :param copy: Whether to return samples that are not overwritten by later retrievals.
+        :return: The captured trace (if any).
+        """
         if self.samples is None:
             raise ValueError
         actual_samples = ctypes.c_int32(self.samples)
@@ -200,13 +266,107 @@ class PicoScopeSdk(Scope):  # pragma: no cover
         assert_pico_ok(
                 self.__dispatch_call("GetValues", self.handle, 0, ctypes.byref(actual_samples), 1,
                                      0, 0, ctypes.byref(overflow)))
-        arr = np.array(self.buffers[channel], dtype=dtype)
+        arr = self.buffers[channel][:actual_samples.value]
         if type == SampleType.Raw:
-            data = arr
-        else:
+            data = arr.astype(dtype) if copy else arr
+        elif copy:
             data = adc2volt(arr, self.ranges[channel], self.MAX_ADC_VALUE, dtype=dtype)
+        else:
+            out = self.volt_buffers.get(channel)
+            if out is None or out.dtype != np.dtype(dtype) or len(out) != self.samples:
+                out = np.empty(self.samples, dtype=dtype)
+                self.volt_buffers[channel] = out
+            data = adc2volt(arr, self.ranges[channel], self.MAX_ADC_VALUE, out=out[:len(arr)])
         return Trace(data, {"sampling_frequency": self.frequency, "channel": channel, "sample_type": type})
 
+    def setup_segments(self, segments: int, channels: Sequence[str],
+                       type: SampleType = SampleType.Volt, dtype=np.float32) -> int:
+        if not self.RAPID_BLOCK:
+            return super().setup_segments(segments, channels, type, dtype)
+        if self.samples is None:
+            raise ValueError
+        self.set_segments(segments)
+        super().setup_segments(segments, channels, type, dtype)
+        self.bulk_buffers = {channel: np.empty((segments, self.samples), dtype=np.int16)
+                             for channel in channels}
+        self._register_bulk()
+        return segments
+
+    def set_segments(self, segments: int):
+        if self.samples is None:
+            raise ValueError
+        max_samples = ctypes.c_int32()
+        assert_pico_ok(self.__dispatch_call("MemorySegments", self.handle, segments,
+                                            ctypes.byref(max_samples)))
+        if max_samples.value < self.samples:
+            raise ValueError(f"Segments of {max_samples.value} samples cannot hold {self.samples} samples.")
+        assert_pico_ok(self.__dispatch_call("SetNoOfCaptures", self.handle, segments))
+
+    def _register_bulk(self):
+        for channel, buffer in self.bulk_buffers.items():
+            for segment in range(self.segments):
+                self.set_buffer_bulk(channel, buffer[segment], segment)
+        self._rapid_block = True
+
+    def teardown_segments(self):
+        """
+        Leave the rapid block mode set up by :py:meth:`setup_segments`: restore a single memory
+        segment and capture, and register the single capture buffers again. This is done
+        automatically by :py:meth:`arm` and :py:meth:`setup_capture`, while :py:meth:`arm_batch`
+        returns to the rapid block mode.
+        """
+        if not self._rapid_block:
+            return
+        self._rapid_block = False
+        self.set_segments(1)
+        for channel, buffer in self.buffers.items():
+            self.set_data_buffer(channel, np.ctypeslib.as_ctypes(buffer), len(buffer))
+
+    def set_buffer_bulk(self, channel: str, buffer: np.ndarray, segment: int):
+        assert_pico_ok(
+                self.__dispatch_call("SetDataBufferBulk", self.handle, self.CHANNELS[channel],
+                                     np.ctypeslib.as_ctypes(buffer),
+                                     len(buffer), segment))
+
+    def get_values_bulk(self):
+        actual_samples = ctypes.c_uint32(self.samples)
+        overflow = (ctypes.c_int16 * self.segments)()
+        assert_pico_ok(
+                self.__dispatch_call("GetValuesBulk", self.handle, ctypes.byref(actual_samples), 0,
+                                     self.segments - 1, ctypes.byref(overflow)))
+
+    def arm_batch(self):
+        if not self.RAPID_BLOCK:
+            return super().arm_batch()
+        if not self._rapid_block:
+            self.set_segments(self.segments)
+            self._register_bulk()
+        self._bulk_retrieved = False
+        self._run_block()
+
+    def capture_segment(self, timeout: Optional[int] = None) -> bool:
+        if not self.RAPID_BLOCK:
+            return super().capture_segment(timeout)
+        return True
+
+    def capture_batch(self, timeout: Optional[int] = None) -> bool:
+        if not self.RAPID_BLOCK:
+            return super().capture_batch(timeout)
+        return self.capture(timeout)
+
+    def retrieve_batch(self, channel: str) -> Optional[np.ndarray]:
+        if not self.RAPID_BLOCK:
+            return super().retrieve_batch(channel)
+        if channel not in self.bulk_buffers:
+            return None
+        if not self._bulk_retrieved:
+            self.get_values_bulk()
+            self._bulk_retrieved = True
+        arr = self.bulk_buffers[channel]
+        if self._batch_type == SampleType.Raw:
+            return arr.astype(self._batch_dtype)
+        return adc2volt(arr, self.ranges[channel], self.MAX_ADC_VALUE, dtype=self._batch_dtype)
+
     def stop(self):
         assert_pico_ok(self.__dispatch_call("Stop"))
 
@@ -231,6 +391,8 @@ else:  # pragma: no cover
     class PS3000Scope(PicoScopeSdk):  # type: ignore
         MODULE = ps3000
         PREFIX = "ps3000"
+        RAPID_BLOCK = False
+        BLOCK_READY = False
         CHANNELS = {
             "A": ps3000.PS3000_CHANNEL["PS3000_CHANNEL_A"],
             "B": ps3000.PS3000_CHANNEL["PS3000_CHANNEL_B"],
@@ -424,22 +586,22 @@ else:  # pragma: no cover
                                                    self.COUPLING[coupling], self.RANGES[range], offset,
                                                    ps6000.PS6000_BANDWIDTH_LIMITER["PS6000_BW_FULL"]))
 
-        def set_buffer(self, channel: str, enable: bool):
-            if self.samples is None:
-                raise ValueError
-            if enable:
-                if channel in self.buffers:
-                    del self.buffers[channel]
-                buffer = (ctypes.c_int16 * self.samples)()
-                assert_pico_ok(
-                        ps6000.ps6000SetDataBuffer(self.handle, self.CHANNELS[channel],
-                                                   ctypes.byref(buffer), self.samples, 0))
-                self.buffers[channel] = buffer
-            else:
-                assert_pico_ok(
-                        ps6000.ps6000SetDataBuffer(self.handle, self.CHANNELS[channel],
-                                                   None, self.samples, 0))
-                del self.buffers[channel]
+        def set_data_buffer(self, channel: str, buffer: Optional[ctypes.Array], length: int):
+            assert_pico_ok(
+                    ps6000.ps6000SetDataBuffer(self.handle, self.CHANNELS[channel], buffer, length, 0))
+
+        def set_buffer_bulk(self, channel: str, buffer: np.ndarray, segment: int):
+            assert_pico_ok(
+                    ps6000.ps6000SetDataBufferBulk(self.handle, self.CHANNELS[channel],
+                                                   np.ctypeslib.as_ctypes(buffer),
+                                                   len(buffer), segment, 0))
+
+        def get_values_bulk(self):
+            actual_samples = ctypes.c_uint32(self.samples)
+            overflow = (ctypes.c_int16 * self.segments)()
+            assert_pico_ok(
+                    ps6000.ps6000GetValuesBulk(self.handle, ctypes.byref(actual_samples), 0,
+                                               self.segments - 1, 1, 0, ctypes.byref(overflow)))
 
         def set_frequency(self, frequency: int, pretrig: int, posttrig: int):
             return self._set_freq(frequency, pretrig, posttrig, 3.2e-9, 4, 5_000_000_000, 156_250_000,
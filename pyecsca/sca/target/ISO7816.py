@@ -51,6 +51,8 @@ class ResponseAPDU(object):
     """A response APDU that can be received from an ISO7816-4 target."""
     data: bytes
     sw: int
+    time: Optional[int] = None
+    """The round-trip time of the command in nanoseconds, if measured."""
 
 
 @public
@@ -6,6 +6,7 @@ from .serial import *
 from .simpleserial import *
 from .binary import *
 from .flash import *
+from .timing import *
 
 has_chipwhisperer = False
 has_pyscard = False
@@ -1,6 +1,11 @@
+import struct
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty
 from subprocess import Popen
-from typing import Optional, Union, List
+from threading import Thread
+from time import perf_counter
+from typing import Optional, Union, List, Sequence, Callable, TypeVar, Generic, Iterable, BinaryIO
 
 from public import public
 
@@ -9,6 +14,13 @@ from .serial import SerialTarget
 
 @public
 class BinaryTarget(SerialTarget):
+    """
+    A target that is a binary running on the host, communicating over its stdin and stdout.
+
+    The pipes are in binary mode and the stdout is read by a background thread, so reads with a
+    timeout do not block past it. Besides raw reads and writes, the target supports a framed
+    protocol, where each message is prefixed by its length as a 4-byte little-endian integer.
+    """
     binary: List[str]
     process: Optional[Popen] = None
     debug_output: bool
@@ -21,38 +33,181 @@ class BinaryTarget(SerialTarget):
             binary = [binary]
         self.binary = binary
         self.debug_output = debug_output
+        self._queue: Queue = Queue()
+        self._pending = bytearray()
+        self._eof = False
+        self._reader: Optional[Thread] = None
 
     def connect(self):
-        self.process = Popen(self.binary, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-                             text=True, bufsize=1)
+        self.process = Popen(self.binary, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._queue = Queue()
+        self._pending = bytearray()
+        self._eof = False
+        self._reader = Thread(target=BinaryTarget.__reader, args=(self.process.stdout, self._queue),
+                              daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def __reader(stdout: BinaryIO, queue: Queue):
+        while True:
+            try:
+                data = stdout.read(65536)
+            except (OSError, ValueError):
+                data = b""
+            queue.put(data)
+            if not data:
+                break
 
     def write(self, data: bytes):
         if self.process is None:
             raise ValueError
         if self.debug_output:
-            print(">>", data.decode())
+            print(">>", data.decode(errors="backslashreplace"))
         if self.process.stdin:
-            self.process.stdin.write(data.decode())
-            self.process.stdin.flush()
+            self.process.stdin.write(data)
 
     def read(self, num: int = 0, timeout: int = 0) -> bytes:
+        """
+        Read the data available from the target, waiting for some if there is none.
+
+        :param num: The maximum number of bytes to read, all available if 0.
+        :param timeout: The time to wait for data in milliseconds, forever if 0.
+        :return: The data, empty if the timeout ran out or the target exited.
+        """
         if self.process is None:
             raise ValueError
-        if self.process.stdout:
-            if num != 0:
-                read = self.process.stdout.readline(num)
-            else:
-                read = self.process.stdout.readline()
+        if not self._pending and not self._eof:
+            try:
+                self.__receive(self._queue.get(timeout=timeout / 1000 if timeout > 0 else None))
+            except Empty:
+                pass
+        while not self._eof:
+            try:
+                self.__receive(self._queue.get_nowait())
+            except Empty:
+                break
+        if num == 0 or num >= len(self._pending):
+            read = bytes(self._pending)
+            self._pending.clear()
         else:
-            read = bytes()  # pragma: no cover
+            read = bytes(self._pending[:num])
+            del self._pending[:num]
         if self.debug_output:
-            print("<<", read, end="")
-        return read.encode()
+            print("<<", read.decode(errors="backslashreplace"), end="")
+        return read
+
+    def __receive(self, data: bytes):
+        if data:
+            self._pending += data
+        else:
+            self._eof = True
+
+    def read_exact(self, num: int, timeout: int = 0) -> bytes:
+        """
+        Read exactly `num` bytes from the target.
+
+        :param num: The number of bytes.
+        :param timeout: The timeout in milliseconds, no timeout if 0.
+        :return: The data.
+        :raises TimeoutError: If the timeout runs out or the target exits before.
+        """
+        result = bytearray()
+        deadline = perf_counter() + timeout / 1000 if timeout > 0 else None
+        while len(result) < num:
+            wait = 0
+            if deadline is not None:
+                wait = int((deadline - perf_counter()) * 1000)
+                if wait <= 0:
+                    raise TimeoutError
+            data = self.read(num - len(result), wait)
+            if not data and (self._eof or deadline is not None):
+                raise TimeoutError
+            result += data
+        return bytes(result)
+
+    def write_frame(self, data: bytes):
+        """
+        Write a framed message.
+
+        :param data: The message.
+        """
+        self.write(struct.pack("<I", len(data)) + data)
+
+    def write_frames(self, datas: Sequence[bytes]):
+        """
+        Write several framed messages in one write.
+
+        :param datas: The messages.
+        """
+        self.write(b"".join(struct.pack("<I", len(data)) + data for data in datas))
+
+    def read_frame(self, timeout: int = 0) -> bytes:
+        """
+        Read a framed message.
+
+        :param timeout: The timeout in milliseconds, no timeout if 0.
+        :return: The message.
+        :raises TimeoutError: If the timeout runs out or the target exits before.
+        """
+        length = struct.unpack("<I", self.read_exact(4, timeout))[0]
+        return self.read_exact(length, timeout)
 
     def disconnect(self):
         if self.process is None:
             return
         self.process.stdin.close()
-        self.process.stdout.close()
         self.process.terminate()
         self.process.wait()
+        # The reader gets EOF once the process exits, the pipe can only be closed after that.
+        if self._reader is not None:
+            self._reader.join()
+            self._reader = None
+        self.process.stdout.close()
+
+
+T = TypeVar("T", bound=BinaryTarget)
+A = TypeVar("A")
+R = TypeVar("R")
+
+
+@public
+class BinaryTargetPool(Generic[T]):
+    """A pool of binary targets, each running in its own process, for parallel execution."""
+    targets: List[T]
+
+    def __init__(self, factory: Callable[[], T], size: int):
+        """
+        :param factory: A function creating a new (not connected) target.
+        :param size: The number of targets.
+        """
+        self.targets = [factory() for _ in range(size)]
+
+    def connect(self):
+        for target in self.targets:
+            target.connect()
+
+    def map(self, func: Callable[[T, A], R], items: Iterable[A]) -> List[R]:
+        """
+        Run `func` with a free target on each of the `items`.
+
+        :param func: The function, called with the target and the item.
+        :param items: The items.
+        :return: The results, in the order of the items.
+        """
+        free: Queue = Queue()
+        for target in self.targets:
+            free.put(target)
+
+        def run(item: A) -> R:
+            target = free.get()
+            try:
+                return func(target, item)
+            finally:
+                free.put(target)
+
+        with ThreadPoolExecutor(len(self.targets)) as executor:
+            return list(executor.map(run, items))
+
+    def disconnect(self):
+        for target in self.targets:
+            target.disconnect()
@@ -4,7 +4,8 @@ from enum import IntEnum, IntFlag
 from functools import reduce
 from math import ceil, log
 from operator import or_
-from typing import Optional, Mapping, List, Union
+from time import perf_counter_ns
+from typing import Optional, Mapping, List, Union, Sequence, Callable, Dict
 
 from public import public
 from smartcard.CardConnection import CardConnection
@@ -240,6 +241,11 @@ class Response(ABC):  # pragma: no cover
             self.params[i] = resp.data[offset:offset + param_len]
             offset += param_len
 
+    @property
+    def time(self) -> Optional[int]:
+        """The round-trip time of the command in nanoseconds, if measured."""
+        return self.resp.time
+
     def __repr__(self):
         return f"{self.__class__.__name__}(sws=[{', '.join(list(map(hex, self.sws)))}], sw={hex(self.resp.sw)}, success={self.success}, error={self.error})"
 
@@ -479,25 +485,61 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
             self.connection.connect(CardConnection.T0_protocol)
             self.chunking = True
 
+    def _encode(self, apdu: CommandAPDU) -> List[List[int]]:
+        """Encode the command into the transmissions to send, chunked into the applet buffer if needed."""
+        data = bytes(apdu)
+        if not self.chunking:
+            return [list(data)]
+        result = []
+        for chunk_start in range(0, len(data), 255):
+            chunk = data[chunk_start:chunk_start + 255]
+            result.append(list(bytes(CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_BUFFER, 0, 0, chunk))))
+        result.append(list(bytes(CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_PERFORM, 0, 0))))
+        return result
+
     def send_apdu(self, apdu: CommandAPDU) -> ResponseAPDU:
-        if self.chunking:
-            data = bytes(apdu)
-            num_chunks = (len(data) + 254) // 255
-            for i in range(num_chunks):
-                chunk_start = i * 255
-                chunk_length = 255
-                if chunk_start + chunk_length > len(data):
-                    chunk_length = len(data) - chunk_start
-                chunk = data[chunk_start: chunk_start + chunk_length]
-                chunk_apdu = CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_BUFFER, 0, 0, chunk)
-                resp = super().send_apdu(chunk_apdu)
-                if resp.sw != 0x9000:
+        return self.send_apdus([apdu])[0]
+
+    def send_apdus(self, apdus: Sequence[CommandAPDU], timed: bool = False) -> List[ResponseAPDU]:
+        """
+        Send several APDUs back-to-back.
+
+        The APDUs are encoded (and chunked, if the connection requires it) upfront, each distinct APDU
+        only once, so that the per-command overhead is just the transmission.
+
+        :param apdus: The APDUs to send.
+        :param timed: Whether to measure the round-trip time of each command.
+        :return: The responses, in order.
+        """
+        encoded: Dict[bytes, List[List[int]]] = {}
+        transmissions = []
+        for apdu in apdus:
+            key = bytes(apdu)
+            if key not in encoded:
+                encoded[key] = self._encode(apdu)
+            transmissions.append(encoded[key])
+        transmit = self.connection.transmit
+        result = []
+        for transmission in transmissions:
+            start = perf_counter_ns()
+            for chunk in transmission[:-1]:
+                _, sw1, sw2 = transmit(chunk)
+                if sw1 << 8 | sw2 != ISO7816.SW_NO_ERROR:
                     raise ChunkingException()
-            apdu = CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_PERFORM, 0, 0)
-        resp = super().send_apdu(apdu)
-        if resp.sw & 0xff00 == ISO7816.SW_BYTES_REMAINING_00:
-            resp = super().send_apdu(CommandAPDU(0x00, 0xc0, 0x00, 0x00, None, resp.sw & 0xff))
-        return resp
+            data, sw1, sw2 = transmit(transmission[-1])
+            if sw1 == ISO7816.SW_BYTES_REMAINING_00 >> 8:
+                data, sw1, sw2 = transmit([0x00, 0xc0, 0x00, 0x00, sw2])
+            end = perf_counter_ns()
+            result.append(ResponseAPDU(bytes(data), sw1 << 8 | sw2, end - start if timed else None))
+        return result
+
+    def batch(self) -> "ECTesterBatch":
+        """
+        Start a batch of commands, see :py:class:`ECTesterBatch`.
+
+        :return: The empty batch.
+        """
+        return ECTesterBatch(self)
 
     def select_applet(self, latest_version: bytes = AID_CURRENT_VERSION):
         """Select the *ECTester* applet, with a specified version or older."""
@@ -700,12 +742,32 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
         :param ka_type: The key-agreement type to use.
         :return: The response.
         """
-        resp = self.send_apdu(
-                CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDH, pubkey, privkey,
-                            bytes([ExportEnum.from_bool(export)]) + transformation.to_bytes(
-                                    2, "big") + bytes([ka_type])))
+        resp = self.send_apdu(self._ecdh_apdu(pubkey, privkey, export, transformation, ka_type))
         return ECDHResponse(resp, export)
 
+    def _ecdh_apdu(self, pubkey: KeypairEnum, privkey: KeypairEnum, export: bool,
+                   transformation: TransformationEnum, ka_type: KeyAgreementEnum) -> CommandAPDU:
+        return CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDH, pubkey, privkey,
+                           bytes([ExportEnum.from_bool(export)]) + transformation.to_bytes(
+                                   2, "big") + bytes([ka_type]))
+
+    def ecdh_repeat(self, pubkey: KeypairEnum, privkey: KeypairEnum, export: bool,
+                    transformation: TransformationEnum, ka_type: KeyAgreementEnum,
+                    count: int) -> List[ECDHResponse]:
+        """
+        Send the ECDH command `count` times, measuring the round-trip time of each.
+
+        :param pubkey: Which keypair to use the pubkey from, in the key-agreement.
+        :param privkey: Which keypair to use the privkey from, in the key-agreement.
+        :param export: Whether to export the shared secret.
+        :param transformation: The transformation to apply to the pubkey before key-agreement.
+        :param ka_type: The key-agreement type to use.
+        :param count: The number of repetitions.
+        :return: The responses, with their :py:attr:`~Response.time` set.
+        """
+        apdu = self._ecdh_apdu(pubkey, privkey, export, transformation, ka_type)
+        return [ECDHResponse(resp, export) for resp in self.send_apdus([apdu] * count, timed=True)]
+
     def ecdh_direct(self, privkey: KeypairEnum, export: bool, transformation: TransformationEnum,
                     ka_type: KeyAgreementEnum, pubkey: bytes) -> ECDHResponse:
         """
@@ -718,13 +780,16 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
         :param pubkey: The raw bytes that will be used as a pubkey in the key-agreement.
         :return: The response.
         """
-        resp = self.send_apdu(
-                CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDH_DIRECT, privkey,
-                            ExportEnum.from_bool(export),
-                            transformation.to_bytes(2, "big") + bytes([ka_type]) + len(
-                                    pubkey).to_bytes(2, "big") + pubkey))
+        resp = self.send_apdu(self._ecdh_direct_apdu(privkey, export, transformation, ka_type, pubkey))
         return ECDHResponse(resp, export)
 
+    def _ecdh_direct_apdu(self, privkey: KeypairEnum, export: bool, transformation: TransformationEnum,
+                          ka_type: KeyAgreementEnum, pubkey: bytes) -> CommandAPDU:
+        return CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDH_DIRECT, privkey,
+                           ExportEnum.from_bool(export),
+                           transformation.to_bytes(2, "big") + bytes([ka_type]) + len(
+                                   pubkey).to_bytes(2, "big") + pubkey)
+
     def ecdsa(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum,
               data: bytes) -> ECDSAResponse:
         """
@@ -736,11 +801,30 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
         :param data: The data to sign and verify.
         :return: The response.
         """
-        resp = self.send_apdu(CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA, keypair,
-                                          ExportEnum.from_bool(export),
-                                          bytes([sig_type]) + len(data).to_bytes(2, "big") + data))
+        resp = self.send_apdu(self._ecdsa_apdu(keypair, export, sig_type, data))
         return ECDSAResponse(resp, export)
 
+    def _ecdsa_apdu(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum,
+                    data: bytes) -> CommandAPDU:
+        return CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA, keypair,
+                           ExportEnum.from_bool(export),
+                           bytes([sig_type]) + len(data).to_bytes(2, "big") + data)
+
+    def ecdsa_repeat(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum,
+                     data: bytes, count: int) -> List[ECDSAResponse]:
+        """
+        Send the ECDSA command `count` times, measuring the round-trip time of each.
+
+        :param keypair: The keypair to use.
+        :param export: Whether to export the signature.
+        :param sig_type: The Signature type to use.
+        :param data: The data to sign and verify.
+        :param count: The number of repetitions.
+        :return: The responses, with their :py:attr:`~Response.time` set.
+        """
+        apdu = self._ecdsa_apdu(keypair, export, sig_type, data)
+        return [ECDSAResponse(resp, export) for resp in self.send_apdus([apdu] * count, timed=True)]
+
     def ecdsa_sign(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum,
                    data: bytes) -> ECDSAResponse:
         """
@@ -752,12 +836,15 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
         :param data: The data to sign.
         :return: The response.
         """
-        resp = self.send_apdu(
-                CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA_SIGN, keypair,
-                            ExportEnum.from_bool(export),
-                            bytes([sig_type]) + len(data).to_bytes(2, "big") + data))
+        resp = self.send_apdu(self._ecdsa_sign_apdu(keypair, export, sig_type, data))
         return ECDSAResponse(resp, export)
 
+    def _ecdsa_sign_apdu(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum,
+                         data: bytes) -> CommandAPDU:
+        return CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA_SIGN, keypair,
+                           ExportEnum.from_bool(export),
+                           bytes([sig_type]) + len(data).to_bytes(2, "big") + data)
+
     def ecdsa_verify(self, keypair: KeypairEnum, sig_type: SignatureEnum, sig: bytes,
                      data: bytes) -> ECDSAResponse:
         """
@@ -769,12 +856,14 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
         :param data: The data.
         :return: The response.
         """
-        resp = self.send_apdu(CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA_VERIFY,
-                                          keypair, sig_type,
-                                          len(data).to_bytes(2, "big") + data + len(sig).to_bytes(2,
-                                                                                                  "big") + sig))
+        resp = self.send_apdu(self._ecdsa_verify_apdu(keypair, sig_type, sig, data))
         return ECDSAResponse(resp, False)
 
+    def _ecdsa_verify_apdu(self, keypair: KeypairEnum, sig_type: SignatureEnum, sig: bytes,
+                           data: bytes) -> CommandAPDU:
+        return CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_ECDSA_VERIFY, keypair, sig_type,
+                           len(data).to_bytes(2, "big") + data + len(sig).to_bytes(2, "big") + sig)
+
     def cleanup(self) -> CleanupResponse:
         """
         Send the Cleanup command.
@@ -805,3 +894,77 @@ class ECTesterTarget(PCSCTarget):  # pragma: no cover
                 CommandAPDU(self.CLA_ECTESTER, InstructionEnum.INS_SET_DRY_RUN_MODE, run_mode, 0,
                             None))
         return RunModeResponse(resp)
+
+
+@public
+class ECTesterBatch(object):  # pragma: no cover
+    """
+    A batch of ECTester commands, queued and then sent back-to-back by :py:meth:`perform`.
+
+    The responses are parsed in bulk, after all of the commands were sent.
+    """
+    target: ECTesterTarget
+    apdus: List[CommandAPDU]
+    parsers: List[Callable[[ResponseAPDU], Response]]
+
+    def __init__(self, target: ECTesterTarget):
+        self.target = target
+        self.apdus = []
+        self.parsers = []
+
+    def add(self, apdu: CommandAPDU, parser: Callable[[ResponseAPDU], Response], count: int = 1):
+        """
+        Queue a command.
+
+        :param apdu: The command APDU.
+        :param parser: The function to parse the response.
+        :param count: The number of times to queue the command.
+        """
+        self.apdus.extend([apdu] * count)
+        self.parsers.extend([parser] * count)
+
+    def ecdh(self, pubkey: KeypairEnum, privkey: KeypairEnum, export: bool,
+             transformation: TransformationEnum, ka_type: KeyAgreementEnum, count: int = 1):
+        """Queue the ECDH command, see :py:meth:`ECTesterTarget.ecdh`."""
+        self.add(self.target._ecdh_apdu(pubkey, privkey, export, transformation, ka_type),
+                 lambda resp: ECDHResponse(resp, export), count)
+
+    def ecdh_direct(self, privkey: KeypairEnum, export: bool, transformation: TransformationEnum,
+                    ka_type: KeyAgreementEnum, pubkey: bytes, count: int = 1):
+        """Queue the ECDH direct command, see :py:meth:`ECTesterTarget.ecdh_direct`."""
+        self.add(self.target._ecdh_direct_apdu(privkey, export, transformation, ka_type, pubkey),
+                 lambda resp: ECDHResponse(resp, export), count)
+
+    def ecdsa(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum, data: bytes,
+              count: int = 1):
+        """Queue the ECDSA command, see :py:meth:`ECTesterTarget.ecdsa`."""
+        self.add(self.target._ecdsa_apdu(keypair, export, sig_type, data),
+                 lambda resp: ECDSAResponse(resp, export), count)
+
+    def ecdsa_sign(self, keypair: KeypairEnum, export: bool, sig_type: SignatureEnum, data: bytes,
+                   count: int = 1):
+        """Queue the ECDSA sign command, see :py:meth:`ECTesterTarget.ecdsa_sign`."""
+        self.add(self.target._ecdsa_sign_apdu(keypair, export, sig_type, data),
+                 lambda resp: ECDSAResponse(resp, export), count)
+
+    def ecdsa_verify(self, keypair: KeypairEnum, sig_type: SignatureEnum, sig: bytes, data: bytes,
+                     count: int = 1):
+        """Queue the ECDSA verify command, see :py:meth:`ECTesterTarget.ecdsa_verify`."""
+        self.add(self.target._ecdsa_verify_apdu(keypair, sig_type, sig, data),
+                 lambda resp: ECDSAResponse(resp, False), count)
+
+    def perform(self, timed: bool = False) -> List[Response]:
+        """
+        Send the queued commands and clear the batch.
+
+        :param timed: Whether to measure the round-trip time of each command.
+        :return: The parsed responses, in order.
+        """
+        resps = self.target.send_apdus(self.apdus, timed)
+        result = [parser(resp) for parser, resp in zip(self.parsers, resps)]
+        self.apdus = []
+        self.parsers = []
+        return result
+
+    def __len__(self):
+        return len(self.apdus)
@@ -1,5 +1,5 @@
 from time import time_ns, sleep
-from typing import Mapping, Union
+from typing import Mapping, Union, Optional, Sequence, List
 
 from public import public
 
@@ -33,38 +33,103 @@ class SimpleSerialMessage(object):
 
 @public
 class SimpleSerialTarget(SerialTarget):
+    """
+    A target communicating using the SimpleSerial protocol.
+
+    Commands are sent in chunks of `chunk_size` bytes, each preceded by a `chunk_delay` (in seconds),
+    so that targets with small receive buffers do not drop bytes. Targets (or transports) with flow
+    control, like SimpleSerial v2 firmware or the ChipWhisperer-Lite, can set `flow_control` to send
+    whole commands at once.
+    """
+    chunk_size: int = 64
+    chunk_delay: float = 0.010
+    flow_control: bool = False
+    _recv_buffer: Optional[bytearray] = None
 
     def recv_msgs(self, timeout: int) -> Mapping[str, SimpleSerialMessage]:
+        """
+        Receive the messages of a response, up to and including the ack ("z") message.
+
+        Bytes received after the ack are kept for the next response.
+
+        :param timeout: The timeout in milliseconds.
+        :return: The received messages, by their command character.
+        """
+        if self._recv_buffer is None:
+            self._recv_buffer = bytearray()
+        buffer = self._recv_buffer
         start = time_ns() // 1000000
-        buffer = bytes()
-        while not buffer.endswith(b"z00\n"):
+        result = {}
+        parsed = 0
+        while True:
+            newline = buffer.find(b"\n", parsed)
+            while newline != -1:
+                if newline != parsed:
+                    msg = SimpleSerialMessage.from_raw(bytes(buffer[parsed:newline]))
+                    result[msg.char] = msg
+                    if msg.char == "z":
+                        del buffer[:newline + 1]
+                        return result
+                parsed = newline + 1
+                newline = buffer.find(b"\n", parsed)
             wait = timeout - ((time_ns() // 1000000) - start)
             if wait <= 0:
                 break
-            buffer += self.read(1 if not buffer else 0, wait)
-        if not buffer:
-            return {}
-        msgs = buffer.split(b"\n")
-        if buffer.endswith(b"\n"):
-            msgs.pop()
-
-        result = {}
-        for raw in msgs:
-            msg = SimpleSerialMessage.from_raw(raw)
+            buffer += self.read(1 if len(buffer) == parsed else 0, wait)
+        if parsed != len(buffer):
+            msg = SimpleSerialMessage.from_raw(bytes(buffer[parsed:]))
             result[msg.char] = msg
+        buffer.clear()
         return result
 
-    def send_cmd(self, cmd: SimpleSerialMessage, timeout: int) -> Mapping[str, SimpleSerialMessage]:
+    def send(self, cmd: SimpleSerialMessage):
         """
+        Send a command, without waiting for the response.
 
-        :param cmd:
-        :param timeout:
-        :return:
+        :param cmd: The command.
         """
         data = bytes(cmd)
-        for i in range(0, len(data), 64):
-            chunk = data[i:i + 64]
-            sleep(0.010)
+        if self.flow_control:
+            self.write(data + b"\n")
+            return
+        for i in range(0, len(data), self.chunk_size):
+            chunk = data[i:i + self.chunk_size]
+            if self.chunk_delay > 0:
+                sleep(self.chunk_delay)
             self.write(chunk)
         self.write(b"\n")
+
+    def send_cmd(self, cmd: SimpleSerialMessage, timeout: int) -> Mapping[str, SimpleSerialMessage]:
+        """
+        Send a command and receive the response.
+
+        :param cmd: The command.
+        :param timeout: The timeout of the response in milliseconds.
+        :return: The received messages, by their command character.
+        """
+        self.send(cmd)
         return self.recv_msgs(timeout)
+
+    def send_cmds(self, cmds: Sequence[SimpleSerialMessage], timeout: int,
+                  depth: int = 2) -> List[Mapping[str, SimpleSerialMessage]]:
+        """
+        Send commands pipelined, with up to `depth` commands sent ahead of the received responses,
+        so that the next command is queued at the target while the previous response is arriving.
+        The target needs to be able to buffer the queued commands.
+
+        :param cmds: The commands.
+        :param timeout: The timeout of each response in milliseconds.
+        :param depth: The number of commands in flight.
+        :return: The responses, in the order of the commands.
+        """
+        results: List[Mapping[str, SimpleSerialMessage]] = []
+        sent = 0
+        while sent < min(depth, len(cmds)):
+            self.send(cmds[sent])
+            sent += 1
+        while len(results) < len(cmds):
+            results.append(self.recv_msgs(timeout))
+            if sent < len(cmds):
+                self.send(cmds[sent])
+                sent += 1
+        return results
@@ -0,0 +1,153 @@
+"""
+This module provides a harness for measuring the execution time of operations on targets.
+
+The measured operation is any callable taking the index of the measurement, e.g. a wrapper around
+:py:meth:`SimpleSerialTarget.send_cmd <pyecsca.sca.target.simpleserial.SimpleSerialTarget.send_cmd>`
+or :py:meth:`ECTesterTarget.send_apdu <pyecsca.sca.target.ectester.ECTesterTarget.send_apdu>`::
+
+    harness = TimingHarness(lambda i: target.send_cmd(cmd, 500), warmup=100)
+    result = harness.measure(10000).reject_outliers()
+"""
+from time import perf_counter_ns
+from typing import Callable, Any, Optional, Tuple
+
+import numpy as np
+from public import public
+
+TIMING_DTYPE = np.dtype([("index", np.uint32), ("time", np.int64), ("reported", np.int64),
+                         ("outlier", np.bool_)])
+"""
+The data type of the timing measurements:
+
+ - `index`: The index of the measurement.
+ - `time`: The time measured on the host, in nanoseconds.
+ - `reported`: The time extracted from the result of the operation (see :py:func:`reported_time`),
+   in nanoseconds, -1 if there is none. This is not necessarily measured by the target itself, e.g.
+   for :py:class:`ECTesterTarget <pyecsca.sca.target.ectester.ECTesterTarget>` it is the APDU
+   round-trip time measured on the host.
+ - `outlier`: Whether the measurement was rejected as an outlier.
+"""
+
+
+def reported_time(result: Any) -> Optional[int]:
+    """
+    Get the time attached to the `result` of an operation (its `time` attribute), like the
+    round-trip time of an :py:class:`ECTesterTarget <pyecsca.sca.target.ectester.ECTesterTarget>`
+    command sent with timing, which is measured on the host around the APDU exchange (see
+    :py:meth:`ECTesterTarget.send_apdus <pyecsca.sca.target.ectester.ECTesterTarget.send_apdus>`).
+
+    :param result: The result of the operation.
+    :return: The time in nanoseconds, or `None`.
+    """
+    return getattr(result, "time", None)
+
+
+@public
+class TimingResult(object):
+    """The result of timing measurements, a structured array of :py:data:`TIMING_DTYPE`."""
+    samples: np.ndarray
+
+    def __init__(self, samples: np.ndarray):
+        self.samples = samples
+
+    @property
+    def inliers(self) -> np.ndarray:
+        """The measurements that are not outliers."""
+        return self.samples[~self.samples["outlier"]]
+
+    def reject_outliers(self, threshold: float = 3.5, field: str = "time") -> "TimingResult":
+        """
+        Mark outliers using the modified z-score, based on the median absolute deviation (MAD).
+
+        If the MAD is zero (more than half of the measurements are equal), the mean absolute
+        deviation is used instead, scaled to be comparable to the MAD.
+
+        :param threshold: The modified z-score above which a measurement is an outlier.
+        :param field: The field to use, "time" or "reported".
+        :return: This result.
+        """
+        values = self.samples[field].astype(np.float64)
+        median = np.median(values)
+        deviations = np.abs(values - median)
+        mad = np.median(deviations)
+        if mad != 0:
+            self.samples["outlier"] = 0.6745 * deviations / mad > threshold
+        else:
+            mean_ad = np.mean(deviations) if len(deviations) else 0
+            if mean_ad != 0:
+                self.samples["outlier"] = deviations / (1.253314 * mean_ad) > threshold
+            else:
+                self.samples["outlier"] = False
+        return self
+
+    def median(self, field: str = "time") -> float:
+        """The median of the inliers."""
+        return float(np.median(self.inliers[field]))
+
+    def mean(self, field: str = "time") -> float:
+        """The mean of the inliers."""
+        return float(np.mean(self.inliers[field]))
+
+    def std(self, field: str = "time") -> float:
+        """The standard deviation of the inliers."""
+        return float(np.std(self.inliers[field]))
+
+    def histogram(self, bins: int = 50, field: str = "time") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a histogram of the inliers.
+
+        :param bins: The number of bins.
+        :param field: The field to use, "time" or "reported".
+        :return: The counts and the bin edges, like :py:func:`numpy.histogram`.
+        """
+        return np.histogram(self.inliers[field], bins=bins)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def __repr__(self):
+        return f"TimingResult({len(self.samples)} measurements, {int(self.samples['outlier'].sum())} outliers)"
+
+
+@public
+class TimingHarness(object):
+    """A harness measuring the execution time of an operation using a high-resolution clock."""
+    operation: Callable[[int], Any]
+    warmup: int
+    extract: Optional[Callable[[Any], Optional[int]]]
+
+    def __init__(self, operation: Callable[[int], Any], warmup: int = 10,
+                 extract: Optional[Callable[[Any], Optional[int]]] = reported_time):
+        """
+        :param operation: The operation to measure, called with the index of the measurement.
+        :param warmup: The number of unmeasured runs of the operation before measuring.
+        :param extract: A function getting the time reported by the target from the result of the
+                        operation, or `None`.
+        """
+        self.operation = operation
+        self.warmup = warmup
+        self.extract = extract
+
+    def measure(self, count: int) -> TimingResult:
+        """
+        Run the operation `count` times, measuring each run.
+
+        :param count: The number of measurements.
+        :return: The measurements.
+        """
+        for i in range(self.warmup):
+            self.operation(i)
+        samples = np.zeros(count, dtype=TIMING_DTYPE)
+        samples["index"] = np.arange(count)
+        samples["reported"] = -1
+        operation = self.operation
+        for i in range(count):
+            start = perf_counter_ns()
+            result = operation(i)
+            end = perf_counter_ns()
+            samples["time"][i] = end - start
+            if self.extract is not None:
+                reported = self.extract(result)
+                if reported is not None:
+                    samples["reported"][i] = reported
+        return TimingResult(samples)
@@ -8,5 +8,6 @@ from .match import *
 from .plot import *
 from .process import *
 from .sampling import *
+from .segment import *
 from .test import *
 from .trace import *
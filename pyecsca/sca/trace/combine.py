@@ -1,4 +1,4 @@
-from typing import Callable, Optional, Tuple
+from typing import Callable, Optional, Tuple, Sequence
 
 import numpy as np
 from public import public
@@ -6,6 +6,11 @@ from public import public
 from .trace import Trace, CombinedTrace
 
 
+def _batch(traces: Sequence[Trace]) -> Optional[np.ndarray]:
+    from ..trace_set.array import batch_samples
+    return batch_samples(traces)
+
+
 @public
 def average(*traces: Trace) -> Optional[CombinedTrace]:
     """
@@ -18,11 +23,14 @@ def average(*traces: Trace) -> Optional[CombinedTrace]:
         return None
     if len(traces) == 1:
         return CombinedTrace(traces[0].samples.copy())
+    batch = _batch(traces)
+    if batch is not None:
+        return CombinedTrace(np.mean(batch, axis=0, dtype=np.float64))
     min_samples = min(map(len, traces))
     s = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         s = np.add(s, t.samples[:min_samples])
-    avg = ((1 / len(traces)) * s)
+    avg = s / len(traces)
     del s
     return CombinedTrace(avg)
 
@@ -51,11 +59,14 @@ def standard_deviation(*traces: Trace) -> Optional[CombinedTrace]:
         return None
     if len(traces) == 1:
         return CombinedTrace(np.zeros(len(traces[0]), dtype=np.float64))
+    batch = _batch(traces)
+    if batch is not None:
+        return CombinedTrace(np.std(batch, axis=0, dtype=np.float64, ddof=1))
     min_samples = min(map(len, traces))
     s = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         s = np.add(s, t.samples[:min_samples])
-    s = (1 / len(traces)) * s
+    s = s / len(traces)
     ts = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         d = np.subtract(t.samples[:min_samples], s)
@@ -78,11 +89,14 @@ def variance(*traces: Trace) -> Optional[CombinedTrace]:
         return None
     if len(traces) == 1:
         return CombinedTrace(np.zeros(len(traces[0]), dtype=np.float64))
+    batch = _batch(traces)
+    if batch is not None:
+        return CombinedTrace(np.var(batch, axis=0, dtype=np.float64, ddof=1))
     min_samples = min(map(len, traces))
     s = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         s = np.add(s, t.samples[:min_samples])
-    s = (1 / len(traces)) * s
+    s = s / len(traces)
     ts = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         d = np.subtract(t.samples[:min_samples], s)
@@ -106,11 +120,15 @@ def average_and_variance(*traces) -> Optional[Tuple[CombinedTrace, CombinedTrace
     if len(traces) == 1:
         return (CombinedTrace(traces[0].samples.copy()),
                 CombinedTrace(np.zeros(len(traces[0]), dtype=np.float64)))
+    batch = _batch(traces)
+    if batch is not None:
+        return (CombinedTrace(np.mean(batch, axis=0, dtype=np.float64)),
+                CombinedTrace(np.var(batch, axis=0, dtype=np.float64, ddof=1)))
     min_samples = min(map(len, traces))
     s = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         s = np.add(s, t.samples[:min_samples])
-    s = (1 / len(traces)) * s
+    s = s / len(traces)
     ts = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
         d = np.subtract(t.samples[:min_samples], s)
@@ -132,6 +150,9 @@ def add(*traces: Trace) -> Optional[CombinedTrace]:
         return None
     if len(traces) == 1:
         return CombinedTrace(traces[0].samples.copy())
+    batch = _batch(traces)
+    if batch is not None:
+        return CombinedTrace(np.asarray(np.sum(batch, axis=0, dtype=np.float64)))
     min_samples = min(map(len, traces))
     s = np.zeros(min_samples, dtype=np.float64)
     for t in traces:
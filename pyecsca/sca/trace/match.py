@@ -1,38 +1,143 @@
 """
 This module provides functions for matching a pattern within a trace to it.
 """
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from scipy.signal import find_peaks
+from scipy.fft import rfft, irfft, next_fast_len
+from scipy.signal import find_peaks, correlate
 from public import public
-from typing import List
+from typing import List, Sequence, Optional, Iterable, Tuple
 
 from .process import normalize
 from .edit import trim
 from .trace import Trace
 
 
+def _suppress(pairs: Iterable[Tuple[int, float]], distance: int) -> List[int]:
+    """
+    Non-maximum suppression of peaks: take the peaks in the order of decreasing score and keep those
+    further than `distance` from all of the already kept ones.
+
+    :param pairs: The peaks with their scores.
+    :param distance: The distance to suppress.
+    :return: The kept peaks, in the order of decreasing score.
+    """
+    result: List[int] = []
+    kept: List[int] = []
+    for peak, _ in sorted(pairs, key=lambda it: it[1], reverse=True):
+        i = bisect_left(kept, peak)
+        if i < len(kept) and kept[i] - peak <= distance:
+            continue
+        if i > 0 and peak - kept[i - 1] <= distance:
+            continue
+        insort(kept, peak)
+        result.append(peak)
+    return result
+
+
+def _find_matches(correlation: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the peaks of the `correlation` above the `threshold`, including those at its edges.
+
+    :return: The peaks and their heights.
+    """
+    padded = np.concatenate(([-np.inf], correlation, [-np.inf]))
+    peaks, props = find_peaks(padded, height=threshold)
+    return peaks - 1, props["peak_heights"]
+
+
 @public
 def match_pattern(trace: Trace, pattern: Trace, threshold: float = 0.8) -> List[int]:
     normalized = normalize(trace)
     pattern_samples = normalize(pattern).samples
-    correlation = np.correlate(normalized.samples, pattern_samples, "same")
+    correlation = correlate(normalized.samples, pattern_samples, "same")
     correlation = (correlation - np.mean(correlation)) / (np.max(correlation))
     peaks, props = find_peaks(correlation, prominence=(threshold, None))
-    pairs = sorted(zip(peaks, props["prominences"]), key=lambda it: it[1], reverse=True)
     half = len(pattern_samples) // 2
-    filtered_peaks: List[int] = []
-    for peak, prominence in pairs:
-        if not filtered_peaks:
-            filtered_peaks.append(peak - half)
-        else:
-            for other_peak in filtered_peaks:
-                if abs((peak - half) - other_peak) <= len(pattern_samples):
-                    break
-            else:
-                filtered_peaks.append(peak - half)
-    return filtered_peaks
+    return _suppress(zip(peaks - half, props["prominences"]), len(pattern_samples))
 
 
 @public
 def match_part(trace: Trace, offset: int, length: int) -> List[int]:
     return match_pattern(trace, trim(trace, offset, offset + length))
+
+
+@public
+def normalized_correlation(trace: Trace, *patterns: Trace) -> List[np.ndarray]:
+    """
+    Compute the normalized cross-correlation of the `patterns` with the `trace`, at every offset
+    at which a pattern fits within the trace.
+
+    The correlation is computed using FFT, the spectrum of the trace is computed once and shared
+    by all of the patterns. Each window of the trace is normalized separately (by its own mean and
+    standard deviation), so the result is the Pearson correlation coefficient of the pattern and the
+    window, in [-1, 1].
+
+    :param trace: The trace to match the patterns in.
+    :param patterns: The patterns, not longer than the trace.
+    :return: The correlations, one per pattern, at the offsets `0` to `len(trace) - len(pattern)`.
+    """
+    samples = np.asarray(trace.samples, dtype=np.float64)
+    # Centering the trace limits the cancellation in the window variances computed from the sums.
+    samples = samples - np.mean(samples)
+    n = len(samples)
+    if any(len(pattern) > n for pattern in patterns):
+        raise ValueError("Pattern longer than the trace.")
+    size = next_fast_len(n, real=True)
+    spectrum = rfft(samples, size)
+    sums = np.concatenate(([0.0], np.cumsum(samples)))
+    sums_sq = np.concatenate(([0.0], np.cumsum(samples ** 2)))
+    result = []
+    for pattern in patterns:
+        m = len(pattern)
+        pattern_samples = np.asarray(pattern.samples, dtype=np.float64)
+        pattern_samples = pattern_samples - np.mean(pattern_samples)
+        pattern_norm = np.sqrt(np.sum(pattern_samples ** 2))
+        # The pattern is zero-mean, so correlating it with the raw windows equals correlating it
+        # with the zero-mean windows.
+        numerator = irfft(spectrum * rfft(pattern_samples[::-1], size), size)[m - 1:n]
+        window_sum = sums[m:] - sums[:-m]
+        window_var = np.maximum(sums_sq[m:] - sums_sq[:-m] - window_sum ** 2 / m, 0)
+        denominator = np.sqrt(window_var) * pattern_norm
+        correlation = np.zeros_like(numerator)
+        np.divide(numerator, denominator, out=correlation, where=denominator > 1e-12 * max(pattern_norm, 1))
+        result.append(correlation)
+    return result
+
+
+@public
+def match_patterns(trace: Trace, *patterns: Trace, threshold: float = 0.8) -> List[List[int]]:
+    """
+    Match the `patterns` within the `trace` using the :py:func:`normalized_correlation`.
+
+    Overlapping matches of a pattern are suppressed, only the best of them is kept.
+
+    :param trace: The trace to match the patterns in.
+    :param patterns: The patterns.
+    :param threshold: The minimal correlation of a match.
+    :return: The offsets of the matches of each pattern, sorted.
+    """
+    result = []
+    for pattern, correlation in zip(patterns, normalized_correlation(trace, *patterns)):
+        peaks, heights = _find_matches(correlation, threshold)
+        result.append(sorted(_suppress(zip(peaks, heights), len(pattern) - 1)))
+    return result
+
+
+@public
+def match_traces(traces: Sequence[Trace], *patterns: Trace, threshold: float = 0.8,
+                 workers: Optional[int] = None) -> List[List[List[int]]]:
+    """
+    Match the `patterns` within each of the `traces` in parallel, see :py:func:`match_patterns`.
+
+    :param traces: The traces, e.g. a trace set.
+    :param patterns: The patterns.
+    :param threshold: The minimal correlation of a match.
+    :param workers: The number of threads, the number of CPUs if `None`.
+    :return: The matches of each pattern per trace.
+    """
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(lambda trace: match_patterns(trace, *patterns, threshold=threshold),
+                                 traces))
@@ -1,5 +1,12 @@
+"""
+This module provides functions for processing the samples of traces. All of them also accept
+an :py:class:`ArrayTraceSet <pyecsca.sca.trace_set.array.ArrayTraceSet>` and process all its
+traces at once.
+"""
 import numpy as np
 from public import public
+from scipy.ndimage import minimum_filter1d, maximum_filter1d
+from typing import Optional
 
 from .trace import Trace
 
@@ -47,6 +54,45 @@ def rolling_window(samples: np.ndarray, window: int) -> np.ndarray:
     return np.lib.stride_tricks.as_strided(samples, shape=shape, strides=strides)
 
 
+def _rolling_sum(samples: np.ndarray, window: int) -> np.ndarray:
+    """Sum the `samples` in a rolling `window` along the last axis, using a cumulative sum."""
+    sums = np.cumsum(samples, axis=-1, dtype=np.float64)
+    result = sums[..., window - 1:].copy()
+    result[..., 1:] -= sums[..., :-window]
+    return result
+
+
+def _centered(samples: np.ndarray) -> np.ndarray:
+    """Center floating-point `samples`, to limit the error accumulating in their cumulative sum."""
+    if np.issubdtype(samples.dtype, np.floating):
+        return samples - np.mean(samples, axis=-1, keepdims=True)
+    return samples
+
+
+def _rolling(samples: np.ndarray, window: int, statistic: str) -> np.ndarray:
+    if window < 1 or window > samples.shape[-1]:
+        raise ValueError("Invalid window.")
+    if statistic == "mean":
+        centered = _centered(samples)
+        result = _rolling_sum(centered, window) / window
+        if centered is not samples:
+            result += np.mean(samples, axis=-1, keepdims=True)
+        return result.astype(samples.dtype, copy=False)
+    elif statistic == "var":
+        centered = _centered(samples)
+        mean = _rolling_sum(centered, window) / window
+        mean_sq = _rolling_sum(np.square(centered, dtype=np.float64), window) / window
+        return np.maximum(mean_sq - mean ** 2, 0)
+    elif statistic == "rms":
+        return np.sqrt(_rolling_sum(np.square(samples, dtype=np.float64), window) / window)
+    elif statistic in ("min", "max"):
+        func = minimum_filter1d if statistic == "min" else maximum_filter1d
+        start = window // 2
+        return func(samples, window, axis=-1)[..., start:start + samples.shape[-1] - window + 1]
+    else:
+        raise ValueError(f"Unknown rolling statistic: {statistic}.")
+
+
 @public
 def rolling_mean(trace: Trace, window: int) -> Trace:
     """
@@ -56,8 +102,92 @@ def rolling_mean(trace: Trace, window: int) -> Trace:
     :param window:
     :return:
     """
-    return trace.with_samples(np.mean(rolling_window(trace.samples, window), -1).astype(
-            dtype=trace.samples.dtype, copy=False))
+    return trace.with_samples(_rolling(trace.samples, window, "mean"))
+
+
+@public
+def rolling_variance(trace: Trace, window: int) -> Trace:
+    """
+    Compute the rolling (population) variance of `trace` using `window`. Shortens the trace by `window` - 1.
+
+    :param trace:
+    :param window:
+    :return:
+    """
+    return trace.with_samples(_rolling(trace.samples, window, "var"))
+
+
+@public
+def rolling_rms(trace: Trace, window: int) -> Trace:
+    """
+    Compute the rolling root mean square of `trace` using `window`. Shortens the trace by `window` - 1.
+
+    :param trace:
+    :param window:
+    :return:
+    """
+    return trace.with_samples(_rolling(trace.samples, window, "rms"))
+
+
+@public
+def rolling_min(trace: Trace, window: int) -> Trace:
+    """
+    Compute the rolling minimum of `trace` using `window`. Shortens the trace by `window` - 1.
+
+    :param trace:
+    :param window:
+    :return:
+    """
+    return trace.with_samples(_rolling(trace.samples, window, "min"))
+
+
+@public
+def rolling_max(trace: Trace, window: int) -> Trace:
+    """
+    Compute the rolling maximum of `trace` using `window`. Shortens the trace by `window` - 1.
+
+    :param trace:
+    :param window:
+    :return:
+    """
+    return trace.with_samples(_rolling(trace.samples, window, "max"))
+
+
+@public
+class RollingStatistic(object):
+    """
+    A rolling statistic ("mean", "var", "rms", "min" or "max") of a capture processed in chunks.
+
+    The last `window` - 1 samples of each chunk are carried over to the next one, so the results of
+    the chunks concatenated equal the result of the whole capture.
+    """
+    window: int
+    statistic: str
+    tail: Optional[np.ndarray] = None
+
+    def __init__(self, window: int, statistic: str = "mean"):
+        if statistic not in ("mean", "var", "rms", "min", "max"):
+            raise ValueError(f"Unknown rolling statistic: {statistic}.")
+        self.window = window
+        self.statistic = statistic
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Process the next chunk of the capture, along its last axis.
+
+        :param chunk: The chunk of samples.
+        :return: The statistic for the windows ending in the chunk.
+        """
+        samples = chunk if self.tail is None else np.concatenate((self.tail, chunk), axis=-1)
+        self.tail = samples[..., samples.shape[-1] - min(self.window - 1, samples.shape[-1]):].copy()
+        if samples.shape[-1] < self.window:
+            dtype = np.float64 if self.statistic in ("var", "rms") else samples.dtype
+            return np.empty(samples.shape[:-1] + (0,), dtype=dtype)
+        return _rolling(samples, self.window, self.statistic)
+
+    def reset(self):
+        """Reset the state, to start processing a new capture."""
+        self.tail = None
 
 
 @public
@@ -73,7 +203,7 @@ def offset(trace: Trace, offset) -> Trace:
 
 
 def root_mean_square(trace: Trace):
-    return np.sqrt(np.mean(np.square(trace.samples)))
+    return np.sqrt(np.mean(np.square(trace.samples), axis=-1, keepdims=True))
 
 
 @public
@@ -90,10 +220,11 @@ def recenter(trace: Trace) -> Trace:
 
 @public
 def normalize(trace: Trace) -> Trace:
-    return trace.with_samples((trace.samples - np.mean(trace.samples)) / np.std(trace.samples))
+    centered = trace.samples - np.mean(trace.samples, axis=-1, keepdims=True)
+    return trace.with_samples(centered / np.std(trace.samples, axis=-1, keepdims=True))
 
 
 @public
 def normalize_wl(trace: Trace) -> Trace:
-    return trace.with_samples((trace.samples - np.mean(trace.samples)) / (
-            np.std(trace.samples) * len(trace.samples)))
+    return trace.with_samples((trace.samples - np.mean(trace.samples, axis=-1, keepdims=True)) / (
+            np.std(trace.samples, axis=-1, keepdims=True) * trace.samples.shape[-1]))
@@ -1,10 +1,20 @@
 import numpy as np
 from public import public
-from scipy.signal import decimate
+from scipy.signal import decimate, cheby1, firwin, sosfilt, sosfilt_zi, lfilter, lfilter_zi
+from typing import Optional
 
 from .trace import Trace
 
 
+def _windows(samples: np.ndarray, factor: int) -> np.ndarray:
+    """
+    View the `samples` as non-intersecting windows of `factor` samples along the last axis,
+    dropping the samples that do not fill a whole window.
+    """
+    length = samples.shape[-1] - (samples.shape[-1] % factor)
+    return samples[..., :length].reshape(samples.shape[:-1] + (-1, factor))
+
+
 @public
 def downsample_average(trace: Trace, factor: int = 2) -> Trace:
     """
@@ -15,9 +25,7 @@ def downsample_average(trace: Trace, factor: int = 2) -> Trace:
     :param factor:
     :return:
     """
-    resized = np.resize(trace.samples, len(trace.samples) - (len(trace.samples) % factor))
-    result_samples = resized.reshape(-1, factor).mean(axis=1).astype(trace.samples.dtype, copy=False)
-    return trace.with_samples(result_samples)
+    return trace.with_samples(downsample_batch(trace.samples, factor, "average"))
 
 
 @public
@@ -44,9 +52,7 @@ def downsample_max(trace: Trace, factor: int = 2) -> Trace:
     :param factor:
     :return:
     """
-    resized = np.resize(trace.samples, len(trace.samples) - (len(trace.samples) % factor))
-    result_samples = resized.reshape(-1, factor).max(axis=1).astype(trace.samples.dtype, copy=False)
-    return trace.with_samples(result_samples)
+    return trace.with_samples(downsample_batch(trace.samples, factor, "max"))
 
 
 @public
@@ -59,9 +65,7 @@ def downsample_min(trace: Trace, factor: int = 2) -> Trace:
     :param factor:
     :return:
     """
-    resized = np.resize(trace.samples, len(trace.samples) - (len(trace.samples) % factor))
-    result_samples = resized.reshape(-1, factor).min(axis=1).astype(trace.samples.dtype, copy=False)
-    return trace.with_samples(result_samples)
+    return trace.with_samples(downsample_batch(trace.samples, factor, "min"))
 
 
 @public
@@ -75,3 +79,96 @@ def downsample_decimate(trace: Trace, factor: int = 2) -> Trace:
     """
     result_samples = decimate(trace.samples, factor)
     return trace.with_samples(result_samples)
+
+
+@public
+def downsample_batch(samples: np.ndarray, factor: int = 2, method: str = "average",
+                     offset: int = 0) -> np.ndarray:
+    """
+    Downsample a batch of samples, e.g. an (N × S) array of N traces, along the last axis.
+
+    The windows are views of the samples, only the result is allocated.
+
+    :param samples: The samples.
+    :param factor: The downsampling factor.
+    :param method: The method, one of "average", "pick", "max", "min" or "decimate", see
+                   the respective `downsample_*` functions.
+    :param offset: The offset of the picked samples, for the "pick" method.
+    :return: The downsampled samples.
+    """
+    if method == "average":
+        return _windows(samples, factor).mean(axis=-1).astype(samples.dtype, copy=False)
+    elif method == "pick":
+        return samples[..., offset::factor].copy()
+    elif method == "max":
+        return _windows(samples, factor).max(axis=-1)
+    elif method == "min":
+        return _windows(samples, factor).min(axis=-1)
+    elif method == "decimate":
+        return decimate(samples, factor, axis=-1)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}.")
+
+
+@public
+class StreamingDecimator(object):
+    """
+    A decimator of a continuous capture processed in chunks, which keeps the state of the
+    anti-aliasing filter and the phase of the downsampling across chunks.
+
+    The filters are the same as in :py:func:`scipy.signal.decimate`, but applied causally (forward
+    only), so the output is delayed by the group delay of the filter, unlike the zero-phase
+    :py:func:`downsample_decimate`. The output of the chunks concatenated does not depend on how the
+    capture was split into them.
+    """
+    factor: int
+    ftype: str
+    sos: Optional[np.ndarray] = None
+    taps: Optional[np.ndarray] = None
+    zi: Optional[np.ndarray] = None
+    phase: int = 0
+
+    def __init__(self, factor: int = 2, ftype: str = "iir", n: Optional[int] = None):
+        """
+        :param factor: The downsampling factor.
+        :param ftype: The type of the anti-aliasing filter, "iir" (Chebyshev type I) or "fir".
+        :param n: The order of the filter, 8 for "iir" and 20 times the factor for "fir" by default.
+        """
+        self.factor = factor
+        self.ftype = ftype
+        if ftype == "iir":
+            self.sos = cheby1(n if n is not None else 8, 0.05, 0.8 / factor, output="sos")
+        elif ftype == "fir":
+            self.taps = firwin((n if n is not None else 20 * factor) + 1, 1. / factor, window="hamming")
+        else:
+            raise ValueError(f"Unknown filter type: {ftype}.")
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Process the next chunk of the capture, along its last axis (so the chunk may contain
+        several channels).
+
+        :param chunk: The chunk of samples.
+        :return: The decimated samples.
+        """
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if self.zi is None:
+            # Start from the steady state of the first sample, avoiding the step response.
+            first = chunk[..., :1] if chunk.shape[-1] else np.zeros(chunk.shape[:-1] + (1,))
+            if self.sos is not None:
+                zi = sosfilt_zi(self.sos)
+                self.zi = zi.reshape((zi.shape[0],) + (1,) * (chunk.ndim - 1) + (2,)) * first[np.newaxis, ...]
+            else:
+                self.zi = lfilter_zi(self.taps, 1.0) * first
+        if self.sos is not None:
+            filtered, self.zi = sosfilt(self.sos, chunk, axis=-1, zi=self.zi)
+        else:
+            filtered, self.zi = lfilter(self.taps, 1.0, chunk, axis=-1, zi=self.zi)
+        result = filtered[..., self.phase::self.factor]
+        self.phase = (self.phase - chunk.shape[-1]) % self.factor
+        return result
+
+    def reset(self):
+        """Reset the state, to start processing a new capture."""
+        self.zi = None
+        self.phase = 0
@@ -0,0 +1,226 @@
+"""
+This module provides segmentation of traces into the operations they contain (e.g. the formula
+calls in a scalar multiplication), found by matching patterns of the operations.
+"""
+import hashlib
+from bisect import bisect_left
+from pathlib import Path
+from typing import List, Optional, Iterable, Iterator, Tuple, Union, Dict, Mapping
+
+import numpy as np
+from public import public
+
+from .match import normalized_correlation, _find_matches
+from .trace import Trace
+
+SEGMENT_DTYPE = np.dtype([("start", np.int64), ("end", np.int64), ("pattern", np.int16)])
+"""
+The data type of segment boundaries:
+
+ - `start`: The index of the first sample of the segment.
+ - `end`: The index after the last sample of the segment.
+ - `pattern`: The index of the pattern that matched the segment.
+"""
+
+
+@public
+def find_segments(trace: Trace, *patterns: Trace, threshold: float = 0.8,
+                  contiguous: bool = False) -> np.ndarray:
+    """
+    Find the segments of the `trace` matching the `patterns`, using the
+    :py:func:`normalized_correlation <pyecsca.sca.trace.match.normalized_correlation>`.
+
+    The segments do not overlap, out of overlapping matches (of any of the patterns) the one with the
+    highest correlation is kept.
+
+    :param trace: The trace to segment.
+    :param patterns: The patterns of the operations, e.g. a doubling and an addition.
+    :param threshold: The minimal correlation of a match.
+    :param contiguous: Whether to extend each segment up to the start of the next one.
+    :return: The segments, an array of :py:data:`SEGMENT_DTYPE`, sorted by their start.
+    """
+    candidates: List[Tuple[float, int, int]] = []
+    for i, correlation in enumerate(normalized_correlation(trace, *patterns)):
+        peaks, heights = _find_matches(correlation, threshold)
+        candidates.extend(zip(heights, peaks, [i] * len(peaks)))
+    candidates.sort(key=lambda it: it[0], reverse=True)
+    starts: List[int] = []
+    ends: List[int] = []
+    indices: List[int] = []
+    for _, start, i in candidates:
+        end = start + len(patterns[i])
+        pos = bisect_left(starts, start)
+        if pos > 0 and ends[pos - 1] > start:
+            continue
+        if pos < len(starts) and starts[pos] < end:
+            continue
+        starts.insert(pos, start)
+        ends.insert(pos, end)
+        indices.insert(pos, i)
+    segments = np.empty(len(starts), dtype=SEGMENT_DTYPE)
+    segments["start"] = starts
+    segments["end"] = ends
+    segments["pattern"] = indices
+    if contiguous and len(segments) > 1:
+        segments["end"][:-1] = segments["start"][1:]
+    return segments
+
+
+@public
+def stack_segments(trace: Trace, segments: np.ndarray, length: Optional[int] = None) -> np.ndarray:
+    """
+    Stack the `segments` of the `trace` into a 2-D array, one segment per row.
+
+    Segments of a different length than `length` are linearly resampled to it.
+
+    :param trace: The trace.
+    :param segments: The segments, as returned by :py:func:`find_segments`.
+    :param length: The length of the stacked segments, the median length of the segments if `None`.
+    :return: The stacked segments.
+    """
+    lengths = segments["end"] - segments["start"]
+    if length is None:
+        length = int(np.median(lengths)) if len(segments) else 0
+    dtype = trace.samples.dtype if (lengths == length).all() else np.float64
+    result = np.empty((len(segments), length), dtype=dtype)
+    target = np.linspace(0, 1, length)
+    for i, (start, end, _) in enumerate(segments):
+        samples = trace.samples[start:end]
+        if len(samples) == length:
+            result[i] = samples
+        else:
+            result[i] = np.interp(target, np.linspace(0, 1, len(samples)), samples)
+    return result
+
+
+@public
+class Segmenter(object):
+    """
+    A segmentation of traces into the operations matched by patterns, see :py:func:`find_segments`.
+
+    The boundaries of the segments can be cached in a file (e.g. next to the trace set), so that
+    the matching is done only once per trace set. The cached segments are stored per a digest of the
+    trace samples, so a trace is only served from the cache if its samples are unchanged.
+    """
+    patterns: Tuple[Trace, ...]
+    threshold: float
+    contiguous: bool
+    length: Optional[int]
+
+    def __init__(self, *patterns: Trace, threshold: float = 0.8, contiguous: bool = False,
+                 length: Optional[int] = None):
+        """
+        :param patterns: The patterns of the operations.
+        :param threshold: The minimal correlation of a match.
+        :param contiguous: Whether to extend each segment up to the start of the next one.
+        :param length: The length of the stacked segments, the median length per trace if `None`.
+        """
+        self.patterns = patterns
+        self.threshold = threshold
+        self.contiguous = contiguous
+        self.length = length
+
+    @property
+    def key(self) -> str:
+        """A key identifying the parameters of the segmentation, used to validate the cache."""
+        h = hashlib.sha256()
+        for pattern in self.patterns:
+            h.update(np.ascontiguousarray(pattern.samples, dtype=np.float64).tobytes())
+            h.update(b"|")
+        h.update(f"{self.threshold}:{self.contiguous}".encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def digest(trace: Trace) -> str:
+        """
+        Compute a digest of the samples of the `trace`, identifying its segments in the cache.
+
+        :param trace: The trace.
+        :return: The digest of the shape, data type and contents of the samples.
+        """
+        samples = np.ascontiguousarray(trace.samples)
+        h = hashlib.sha256(f"{samples.shape}:{samples.dtype.str}|".encode())
+        h.update(samples.data)
+        return h.hexdigest()
+
+    def segments(self, trace: Trace) -> np.ndarray:
+        """
+        Find the segments of the `trace`.
+
+        :param trace: The trace.
+        :return: The segments, an array of :py:data:`SEGMENT_DTYPE`.
+        """
+        return find_segments(trace, *self.patterns, threshold=self.threshold,
+                             contiguous=self.contiguous)
+
+    def stack(self, trace: Trace, segments: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Stack the segments of the `trace`.
+
+        :param trace: The trace.
+        :param segments: The segments of the trace, found if `None`.
+        :return: The stacked segments.
+        """
+        if segments is None:
+            segments = self.segments(trace)
+        return stack_segments(trace, segments, self.length)
+
+    def process(self, traces: Iterable[Trace],
+                cache: Optional[Union[str, Path]] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Segment the `traces` one by one.
+
+        If the `cache` file exists and was created by a segmentation with the same parameters, the
+        segments of the traces with the same samples (see :py:meth:`digest`) are read from it, the
+        rest are found and the cache file is written once all of the traces are processed.
+
+        :param traces: The traces, e.g. a lazily read trace set.
+        :param cache: The path of the cache file (an `.npz` file), or `None`.
+        :return: A generator of the segments and the stacked segments of each trace.
+        """
+        cached = (self.load(cache) if cache is not None else None) or {}
+        found: Dict[str, np.ndarray] = {}
+        missed = False
+        for trace in traces:
+            digest = self.digest(trace)
+            if digest in cached:
+                segments = cached[digest]
+            else:
+                segments = self.segments(trace)
+                missed = True
+            found[digest] = segments
+            yield segments, self.stack(trace, segments)
+        if cache is not None and missed:
+            self.save(cache, found)
+
+    def load(self, path: Union[str, Path]) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Load cached segments.
+
+        :param path: The path of the cache file.
+        :return: The segments of the traces by their :py:meth:`digest`, or `None` if the cache is
+                 missing or stale.
+        """
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != self.key:
+                    return None
+                offsets = data["offsets"]
+                return {str(digest): data["segments"][start:end]
+                        for digest, start, end in zip(data["digests"], offsets[:-1], offsets[1:])}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, path: Union[str, Path], segments: Mapping[str, np.ndarray]):
+        """
+        Save segments into a cache file.
+
+        :param path: The path of the cache file.
+        :param segments: The segments of the traces by their :py:meth:`digest`.
+        """
+        values = list(segments.values())
+        offsets = np.cumsum([0] + [len(s) for s in values])
+        all_segments = np.concatenate(values) if values else np.empty(0, dtype=SEGMENT_DTYPE)
+        with open(path, "wb") as f:
+            np.savez(f, key=np.array(self.key), digests=np.array(list(segments.keys()), dtype=str),
+                     segments=all_segments, offsets=offsets)
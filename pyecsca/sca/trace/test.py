@@ -9,12 +9,20 @@ from .combine import average_and_variance
 from .edit import trim
 
 
+def _stack(traces: Sequence[Trace]) -> np.ndarray:
+    from ..trace_set.array import batch_samples
+    batch = batch_samples(traces)
+    if batch is not None:
+        return batch
+    return np.stack([trace.samples for trace in traces])
+
+
 def ttest_func(first_set: Sequence[Trace], second_set: Sequence[Trace],
                equal_var: bool) -> Optional[CombinedTrace]:
     if not first_set or not second_set or len(first_set) == 0 or len(second_set) == 0:
         return None
-    first_stack = np.stack([first.samples for first in first_set])
-    second_stack = np.stack([second.samples for second in second_set])
+    first_stack = _stack(first_set)
+    second_stack = _stack(second_set)
     result = ttest_ind(first_stack, second_stack, axis=0, equal_var=equal_var)
     return CombinedTrace(result[0])
 
@@ -88,8 +96,8 @@ def ks_test(first_set: Sequence[Trace], second_set: Sequence[Trace]) -> Optional
     """
     if not first_set or not second_set or len(first_set) == 0 or len(second_set) == 0:
         return None
-    first_stack = np.stack([first.samples for first in first_set])
-    second_stack = np.stack([second.samples for second in second_set])
+    first_stack = _stack(first_set)
+    second_stack = _stack(second_set)
     results = np.empty(len(first_set[0].samples), dtype=first_set[0].samples.dtype)
     for i in range(len(first_set[0].samples)):
         results[i] = ks_2samp(first_stack[..., i], second_stack[..., i])[0]
@@ -1,5 +1,6 @@
 import weakref
-from typing import Any, Mapping, Sequence
+from collections.abc import MutableMapping
+from typing import Any, Mapping, Sequence, Dict, Set, Iterator, Optional
 from copy import copy, deepcopy
 
 from numpy import ndarray
@@ -7,6 +8,117 @@ import numpy as np
 from public import public
 
 
+_SHARED_TYPES = (type(None), bool, int, float, complex, str, bytes, frozenset, range, np.generic, ndarray)
+
+
+def _is_shared(value: Any) -> bool:
+    """Whether the metadata `value` is shared without a copy (it is immutable, or an array)."""
+    if isinstance(value, tuple):
+        return all(map(_is_shared, value))
+    return isinstance(value, _SHARED_TYPES)
+
+
+def _unshare(value: Any) -> Any:
+    return value if _is_shared(value) else deepcopy(value)
+
+
+@public
+class CopyOnWriteMeta(MutableMapping):
+    """
+    Trace metadata that shares a read-only `base` mapping with other traces and keeps
+    all changes in a local delta.
+
+    Mutable values from the base (e.g. lists or dicts) are copied into the delta when they are
+    first accessed, so in-place changes to them do not leak between the traces sharing the base.
+    Immutable values and arrays are shared without a copy: assign a new array to a key instead
+    of modifying it in place, which would be visible in all of the traces sharing it.
+    """
+    _base: Mapping[str, Any]
+    _local: Dict[str, Any]
+    _deleted: Set[str]
+
+    def __init__(self, base: Optional[Mapping[str, Any]] = None):
+        self._base = base if base is not None else {}
+        self._local = {}
+        self._deleted = set()
+
+    def derive(self) -> "CopyOnWriteMeta":
+        """
+        Create new metadata with the same contents that shares the base with this one.
+
+        :return: The derived metadata.
+        """
+        if self._deleted:
+            base = {k: v for k, v in self._base.items() if k not in self._deleted}
+        elif self._local:
+            base = dict(self._base)
+        else:
+            return CopyOnWriteMeta(self._base)
+        for key, value in self._local.items():
+            base[key] = _unshare(value)
+        self._base = base
+        self._deleted = set()
+        return CopyOnWriteMeta(base)
+
+    def _contents(self) -> Dict[str, Any]:
+        result = {k: v for k, v in self._base.items() if k not in self._deleted}
+        result.update(self._local)
+        return result
+
+    def __getitem__(self, key):
+        if key in self._local:
+            return self._local[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        value = self._base[key]
+        if not _is_shared(value):
+            value = deepcopy(value)
+            self._local[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._local[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._local.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key):
+        return key in self._local or (key in self._base and key not in self._deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._base:
+            if key not in self._deleted and key not in self._local:
+                yield key
+        yield from self._local
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if isinstance(other, CopyOnWriteMeta):
+            return self._contents() == other._contents()
+        if isinstance(other, Mapping):
+            return self._contents() == dict(other.items())
+        return NotImplemented
+
+    def __copy__(self):
+        result = CopyOnWriteMeta(self._base)
+        result._local = copy(self._local)
+        result._deleted = copy(self._deleted)
+        return result
+
+    def __deepcopy__(self, memodict={}):
+        return CopyOnWriteMeta(deepcopy(self._contents(), memo=memodict))
+
+    def __repr__(self):
+        return f"CopyOnWriteMeta({self._contents()!r})"
+
+
 @public
 class Trace(object):
     """A trace, which has some samples and metadata."""
@@ -64,7 +176,24 @@ class Trace(object):
         return np.array_equal(self.samples, other.samples) and self.meta == other.meta
 
     def with_samples(self, samples: ndarray) -> "Trace":
-        return Trace(samples, deepcopy(self.meta))
+        """
+        Create a new trace with `samples` and the metadata of this trace.
+
+        The metadata is shared copy-on-write (see :py:class:`CopyOnWriteMeta`), so changes to the
+        metadata of either trace (except in-place changes to arrays) are not visible in the other
+        one. The metadata of this trace is not modified.
+
+        :param samples: The samples of the new trace.
+        :return: The new trace.
+        """
+        meta: Mapping[str, Any]
+        if isinstance(self.meta, CopyOnWriteMeta):
+            meta = self.meta.derive()
+        elif isinstance(self.meta, dict):
+            meta = CopyOnWriteMeta({key: _unshare(value) for key, value in self.meta.items()})
+        else:
+            meta = deepcopy(self.meta)
+        return Trace(samples, meta)
 
     def __copy__(self):
         return Trace(copy(self.samples), copy(self.meta), copy(self.trace_set))
@@ -5,3 +5,5 @@ from .inspector import *
 from .chipwhisperer import *
 from .pickle import *
 from .hdf5 import *
+from .array import *
+from .native import *
@@ -0,0 +1,200 @@
+from collections.abc import MutableMapping
+from typing import Mapping, Optional, Sequence, Any, Iterator, Dict, Union
+
+import numpy as np
+from public import public
+
+from .base import TraceSet
+from ..trace import Trace
+
+
+def _column(values: Sequence[Any]) -> np.ndarray:
+    if all(isinstance(value, (int, float, bool, np.number, np.bool_, np.ndarray)) for value in values):
+        try:
+            column = np.asarray(values)
+            if column.dtype != object:
+                return column
+        except ValueError:
+            pass
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+def _fits(value: Any, dtype: np.dtype) -> bool:
+    """Whether `value` can be stored in a column of `dtype` without wrapping around or changing kind."""
+    array = np.asarray(value)
+    if np.can_cast(array.dtype, dtype, casting="safe"):
+        return True
+    if dtype.kind in "iu" and array.dtype.kind in "biu":
+        info = np.iinfo(dtype)
+        return array.size == 0 or (int(array.min()) >= info.min and int(array.max()) <= info.max)
+    return dtype.kind in "fc" and array.dtype.kind in "biuf"
+
+
+@public
+class ArrayTraceMeta(MutableMapping):
+    """The metadata of one trace of an :py:class:`ArrayTraceSet`, a row view into its meta columns."""
+    trace_set: "ArrayTraceSet"
+    index: int
+
+    def __init__(self, trace_set: "ArrayTraceSet", index: int):
+        self.trace_set = trace_set
+        self.index = index
+
+    @property
+    def _columns(self) -> Dict[str, np.ndarray]:
+        return self.trace_set.meta
+
+    def __getitem__(self, key):
+        return self._columns[key][self.index]
+
+    def __setitem__(self, key, value):
+        if key not in self._columns:
+            self._columns[key] = np.full(len(self.trace_set), None, dtype=object)
+        column = self._columns[key]
+        if column.dtype != object and not _fits(value, column.dtype):
+            column = column.astype(object)
+            self._columns[key] = column
+        column[self.index] = value
+
+    def __delitem__(self, key):
+        raise TypeError("Cannot delete meta columns from a single trace of an ArrayTraceSet.")
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._columns
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memodict={}):
+        return {key: np.copy(value) if isinstance(value, np.ndarray) else value for key, value in self.items()}
+
+    def __repr__(self):
+        return f"ArrayTraceMeta({dict(self)!r})"
+
+
+@public
+class ArrayTraceSet(TraceSet):
+    """
+    A trace set of equal-length traces, stored in a single contiguous (N x S) array of samples,
+    with the metadata stored columnar (one array of length N per key).
+
+    Indexing and iteration produce lightweight :py:class:`Trace` views into the array. The
+    functions in :py:mod:`combine <pyecsca.sca.trace.combine>` and :py:mod:`test <pyecsca.sca.trace.test>`
+    recognize sets of these views and work on the array directly, the functions in
+    :py:mod:`process <pyecsca.sca.trace.process>` can be applied to the whole set at once.
+    """
+    samples: np.ndarray
+    meta: Dict[str, np.ndarray]
+
+    def __init__(self, samples: np.ndarray,
+                 meta: Optional[Mapping[str, Union[Sequence[Any], np.ndarray]]] = None,
+                 **kwargs):
+        if samples.ndim != 2:
+            raise ValueError("ArrayTraceSet samples need to be two-dimensional (traces x samples).")
+        if meta is None:
+            meta = {}
+        columns = {}
+        for key, values in meta.items():
+            if len(values) != len(samples):
+                raise ValueError(f"Meta column {key} has a wrong length.")
+            columns[key] = values if isinstance(values, np.ndarray) else _column(values)
+        super().__init__(**kwargs)
+        self.samples = samples
+        self.meta = columns
+
+    @classmethod
+    def from_traces(cls, *traces: Trace, dtype=None, **kwargs) -> "ArrayTraceSet":
+        """
+        Create an array trace set by stacking `traces`, which need to have the same length.
+        Meta keys missing in some traces are filled with `None`.
+
+        :param traces: The traces.
+        :param dtype: The dtype of the samples array, if `None` it is inferred from the traces.
+        :param kwargs: Additional trace set attributes.
+        :return: The array trace set.
+        """
+        if not traces:
+            return cls(np.empty((0, 0), dtype=dtype), **kwargs)
+        samples = np.stack([trace.samples for trace in traces])
+        if dtype is not None:
+            samples = samples.astype(dtype, copy=False)
+        keys: Dict[str, None] = {}
+        for trace in traces:
+            keys.update(dict.fromkeys(trace.meta.keys()))
+        meta = {key: _column([trace.meta.get(key) for trace in traces]) for key in keys}
+        return cls(samples, meta, **kwargs)
+
+    def __len__(self):
+        return self.samples.shape[0]
+
+    def __getitem__(self, index) -> Trace:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]  # type: ignore
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError
+        return Trace(self.samples[index], ArrayTraceMeta(self, index), trace_set=self)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def rows(self, traces: Sequence[Trace]) -> Optional[np.ndarray]:
+        """
+        Get the row indices of `traces` in this set, if they are all views into it.
+
+        :param traces: The traces.
+        :return: The indices or `None` if some of the traces are not views into this set.
+        """
+        indices = np.empty(len(traces), dtype=np.intp)
+        for i, trace in enumerate(traces):
+            meta = trace.meta
+            if not isinstance(meta, ArrayTraceMeta) or meta.trace_set is not self:
+                return None
+            indices[i] = meta.index
+        return indices
+
+    def with_samples(self, samples: np.ndarray) -> "ArrayTraceSet":
+        """
+        Create a new array trace set with `samples` and the metadata of this one.
+
+        :param samples: The new (N x S') samples.
+        :return: The new array trace set.
+        """
+        kwargs = {key: getattr(self, key) for key in self._keys}
+        return ArrayTraceSet(samples, {key: column.copy() for key, column in self.meta.items()}, **kwargs)
+
+    def __repr__(self):
+        args = ", ".join([f"{key}={getattr(self, key)!r}" for key in self._keys])
+        return f"ArrayTraceSet(samples={self.samples.shape}, {args})"
+
+
+@public
+def batch_samples(traces: Sequence[Trace]) -> Optional[np.ndarray]:
+    """
+    Get the (N x S) samples of `traces` without restacking, if they are an :py:class:`ArrayTraceSet`
+    or all views into one.
+
+    :param traces: The traces.
+    :return: The samples or `None`.
+    """
+    if isinstance(traces, ArrayTraceSet):
+        return traces.samples
+    if not traces:
+        return None
+    batch = traces[0].trace_set
+    if not isinstance(batch, ArrayTraceSet):
+        return None
+    rows = batch.rows(traces)
+    if rows is None:
+        return None
+    if len(rows) == len(batch) and np.array_equal(rows, np.arange(len(batch))):
+        return batch.samples
+    return batch.samples[rows]
@@ -1,9 +1,9 @@
 from configparser import ConfigParser
 from io import RawIOBase, BufferedIOBase
-from itertools import zip_longest
-from os.path import exists, isfile, join, basename, dirname
+from os import listdir
+from os.path import exists, isfile, isdir, join, basename, dirname
 from pathlib import Path
-from typing import Union, BinaryIO
+from typing import Union, BinaryIO, Optional, List, Dict
 
 import numpy as np
 from public import public
@@ -14,55 +14,170 @@ from ..trace import Trace
 
 @public
 class ChipWhispererTraceSet(TraceSet):
-    """ChipWhisperer trace set (native) format."""
+    """
+    ChipWhisperer trace set (native) format.
+
+    A lazily read trace set keeps the numeric data files memory-mapped, its traces are created on
+    access, with samples being row views into the mapped traces file. A project directory with
+    several trace segments is read as one concatenated trace set.
+    """
+    _segments: Optional[List[Dict[str, Optional[np.ndarray]]]]
+    _offsets: Optional[np.ndarray]
+
+    def __init__(self, *traces: Trace, **kwargs):
+        super().__init__(*traces, **kwargs)
+        self._segments = None
+        self._offsets = None
 
     @classmethod
-    def read(cls,
-             input: Union[str, Path, bytes, BinaryIO]) -> "ChipWhispererTraceSet":
-        if isinstance(input, (str, Path)):
-            traces, kwargs = ChipWhispererTraceSet.__read(input)
-            return ChipWhispererTraceSet(*traces, **kwargs)
-        else:
+    def read(cls, input: Union[str, Path, bytes, BinaryIO],
+             lazy: bool = False) -> "ChipWhispererTraceSet":
+        """
+        Read a ChipWhisperer trace set.
+
+        :param input: The path of the config file (`config_<name>.cfg`) of one trace segment,
+                      or of a directory with trace segments.
+        :param lazy: Whether to memory-map the data files and create the traces on access.
+        :return: The trace set.
+        """
+        if not isinstance(input, (str, Path)):
             raise ValueError
+        segments = []
+        for full_path in ChipWhispererTraceSet.__config_paths(str(input)):
+            path, name = ChipWhispererTraceSet._split_path(full_path)
+            data = ChipWhispererTraceSet.__read_data(path, name, "r" if lazy else None)
+            config = ChipWhispererTraceSet._read_config(path, name)
+            segments.append((data, config))
+        if not segments:
+            raise ValueError(f"No ChipWhisperer trace segments in {input}.")
+        first, config = segments[0]
+        kwargs = {"knownkey": first["knownkey"], **config}
+        if not lazy:
+            traces = []
+            for data, _ in segments:
+                traces.extend(ChipWhispererTraceSet.__traces(data))
+            return ChipWhispererTraceSet(*traces, **kwargs)
+        result = ChipWhispererTraceSet(**kwargs)
+        result._segments = [data for data, _ in segments]
+        result._offsets = np.cumsum([0] + [len(data["traces"]) if data["traces"] is not None else 0
+                                           for data, _ in segments])
+        return result
 
     @classmethod
     def inplace(cls, input: Union[str, Path, bytes, BinaryIO]) -> "ChipWhispererTraceSet":
         raise NotImplementedError
 
+    def __len__(self):
+        if self._offsets is None:
+            return super().__len__()
+        return int(self._offsets[-1])
+
+    def __getitem__(self, index) -> Trace:
+        if self._segments is None:
+            return super().__getitem__(index)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]  # type: ignore
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError
+        segment = int(np.searchsorted(self._offsets, index, side="right")) - 1  # type: ignore
+        data = self._segments[segment]
+        traces = data["traces"]
+        assert traces is not None
+        i = index - int(self._offsets[segment])  # type: ignore
+        return Trace(traces[i], ChipWhispererTraceSet.__meta(data, i), trace_set=self)
+
+    def __iter__(self):
+        if self._segments is None:
+            yield from super().__iter__()
+        else:
+            for i in range(len(self)):
+                yield self[i]
+
     def write(self, output: Union[str, Path, BinaryIO]):
-        raise NotImplementedError
+        """
+        Save this trace set into the ChipWhisperer native format, the `output` is the path of the
+        config file (`config_<name>.cfg`), the data files are stored next to it.
 
-    @classmethod
-    def __read(cls, full_path):
+        :param output: An output path.
+        """
+        if not isinstance(output, (str, Path)):
+            raise TypeError
+        path, name = ChipWhispererTraceSet._split_path(output)
+        np.save(join(path, name + "traces.npy"), np.stack([trace.samples for trace in self]))
+        for meta_key, type in ChipWhispererTraceSet._meta_types.items():
+            values = [trace.meta.get(meta_key) for trace in self]
+            if all(value is None for value in values):
+                continue
+            try:
+                data = np.stack(values)
+            except (ValueError, TypeError):
+                data = np.empty(len(values), dtype=object)
+                for i, value in enumerate(values):
+                    data[i] = value
+            np.save(join(path, name + type + ".npy"), data)
+        kwargs = {key: getattr(self, key) for key in self._keys}
+        ChipWhispererTraceSet._write_config(path, name, kwargs)
+
+    _meta_types = {"key": "keylist", "textin": "textin", "textout": "textout"}
+
+    @staticmethod
+    def _split_path(full_path):
         file_name = basename(full_path)
         if not file_name.startswith("config_") or not file_name.endswith(".cfg"):
             raise ValueError
-        path = dirname(full_path)
-        name = file_name[7:-4]
-        data = ChipWhispererTraceSet.__read_data(path, name)
-        traces = []
-        for samples, key, textin, textout in zip_longest(data["traces"], data["keylist"],
-                                                         data["textin"], data["textout"]):
-            traces.append(
-                    Trace(samples, {"key": key, "textin": textin, "textout": textout}))
-        del data["traces"]
-        del data["keylist"]
-        del data["textin"]
-        del data["textout"]
-        config = ChipWhispererTraceSet.__read_config(path, name)
-        return traces, {**data, **config}
+        return dirname(full_path), file_name[7:-4]
+
+    @staticmethod
+    def _write_config(path, name, kwargs):
+        if "knownkey" in kwargs and kwargs["knownkey"] is not None:
+            np.save(join(path, name + "knownkey.npy"), kwargs["knownkey"])
+        config = ConfigParser()
+        values = {key: value for key, value in kwargs.items()
+                  if key != "knownkey" and not key.startswith("_")}
+        config["Trace Config"] = {key: str(value) for key, value in values.items()
+                                  if isinstance(value, (str, int, float))}
+        with open(join(path, "config_" + name + ".cfg"), "w") as f:
+            config.write(f)
+
+    @staticmethod
+    def __config_paths(full_path):
+        if not isdir(full_path):
+            return [full_path]
+        return sorted(join(full_path, file_name) for file_name in listdir(full_path)
+                      if file_name.startswith("config_") and file_name.endswith(".cfg"))
+
+    @staticmethod
+    def __meta(data, i):
+        meta = {}
+        for meta_key, type in ChipWhispererTraceSet._meta_types.items():
+            column = data[type]
+            meta[meta_key] = column[i] if column is not None and i < len(column) else None
+        return meta
+
+    @staticmethod
+    def __traces(data):
+        if data["traces"] is None:
+            return []
+        return [Trace(samples, ChipWhispererTraceSet.__meta(data, i))
+                for i, samples in enumerate(data["traces"])]
 
     @classmethod
-    def __read_data(cls, path, name):
+    def __read_data(cls, path, name, mmap_mode=None):
         types = {"keylist": None, "knownkey": None, "textin": None, "textout": None, "traces": None}
         for type in types.keys():
             type_path = join(path, name + type + ".npy")
             if exists(type_path) and isfile(type_path):
-                types[type] = np.load(type_path, allow_pickle=True)
+                try:
+                    types[type] = np.load(type_path, mmap_mode=mmap_mode)
+                except ValueError:
+                    # Object arrays cannot be memory-mapped.
+                    types[type] = np.load(type_path, allow_pickle=True)
         return types
 
     @classmethod
-    def __read_config(cls, path, name):
+    def _read_config(cls, path, name):
         config_path = join(path, "config_" + name + ".cfg")
         if exists(config_path) and isfile(config_path):
             config = ConfigParser()
@@ -0,0 +1,506 @@
+"""
+This module provides out-of-core conversion of trace sets between the supported formats.
+
+The traces are streamed from the input to the output in chunks of bounded size, optionally
+converting their dtype and downsampling them on the way. Run it as::
+
+    python -m pyecsca.sca.trace_set.convert input output [options]
+"""
+import sys
+import uuid
+import warnings
+from argparse import ArgumentParser
+from os.path import basename, join
+from pathlib import Path
+from time import perf_counter
+from typing import (Union, Optional, Iterator, List, Mapping, Any, Callable, Tuple, MutableMapping,
+                    Sequence)
+
+import h5py
+import numpy as np
+from public import public
+
+from .chipwhisperer import ChipWhispererTraceSet
+from .hdf5 import HDF5Meta
+from .inspector import InspectorTraceSet, SampleCoding
+from .native import NativeTraceSet, _PREAMBLE, _write_preamble, _write_footer
+from .pickle import PickleTraceSet
+from .array import _column
+from ..trace import (Trace, downsample_average, downsample_pick, downsample_max, downsample_min,
+                     downsample_decimate)
+
+FORMATS = ("inspector", "hdf5", "chipwhisperer", "pickle", "native")
+
+DOWNSAMPLERS: Mapping[str, Callable[[Trace, int], Trace]] = {
+    "average": downsample_average,
+    "pick": downsample_pick,
+    "max": downsample_max,
+    "min": downsample_min,
+    "decimate": downsample_decimate
+}
+
+
+def guess_format(path: Union[str, Path]) -> str:
+    """
+    Guess the trace set format from the file name.
+
+    :param path: The path.
+    :return: The format name, one of :py:data:`FORMATS`.
+    """
+    if Path(path).is_dir():
+        # A ChipWhisperer project directory with trace segments.
+        return "chipwhisperer"
+    name = basename(str(path)).lower()
+    if name.endswith(".trs"):
+        return "inspector"
+    if name.endswith(".h5") or name.endswith(".hdf5"):
+        return "hdf5"
+    if name.startswith("config_") and name.endswith(".cfg"):
+        return "chipwhisperer"
+    if name.endswith(".pickle") or name.endswith(".pkl"):
+        return "pickle"
+    if name.endswith(".traces"):
+        return "native"
+    raise ValueError(f"Unknown trace set format of {path}.")
+
+
+class TraceSetReader(object):
+    """A streaming reader of a trace set."""
+    kwargs: MutableMapping[str, Any]
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[Trace]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InspectorReader(TraceSetReader):
+
+    def __init__(self, path: Union[str, Path]):
+        self.file = open(path, "rb")
+        self.kwargs = InspectorTraceSet._read_header(self.file)
+
+    def __len__(self):
+        return self.kwargs["num_traces"]
+
+    def __iter__(self):
+        for _ in range(len(self)):
+            trace = InspectorTraceSet._read_trace(self.file, self.kwargs)
+            trace.samples = InspectorTraceSet._scale(trace.samples, self.kwargs["y_scale"])
+            yield trace
+
+    def close(self):
+        self.file.close()
+
+
+class HDF5Reader(TraceSetReader):
+
+    def __init__(self, path: Union[str, Path]):
+        self.file = h5py.File(str(path), mode="r")
+        self.kwargs = dict(self.file.attrs)
+        ordering = self.kwargs.pop("_ordering", None)
+        self.ordering = list(ordering) if ordering is not None else list(self.file.keys())
+
+    def __len__(self):
+        return len(self.ordering)
+
+    def __iter__(self):
+        for key in self.ordering:
+            dataset = self.file[key]
+            yield Trace(dataset[()], dict(HDF5Meta(dataset.attrs)))
+
+    def close(self):
+        self.file.close()
+
+
+class ChipWhispererReader(TraceSetReader):
+
+    def __init__(self, path: Union[str, Path]):
+        self.trace_set = ChipWhispererTraceSet.read(path, lazy=True)
+        self.kwargs = {key: getattr(self.trace_set, key) for key in self.trace_set._keys}
+
+    def __len__(self):
+        return len(self.trace_set)
+
+    def __iter__(self):
+        for trace in self.trace_set:
+            meta = {key: np.array(value) if value is not None else None for key, value in trace.meta.items()}
+            yield Trace(np.array(trace.samples), meta)
+
+
+class NativeReader(TraceSetReader):
+
+    def __init__(self, path: Union[str, Path]):
+        self.trace_set = NativeTraceSet.read(path, lazy=True)
+        self.kwargs = {key: getattr(self.trace_set, key) for key in self.trace_set._keys}
+
+    def __len__(self):
+        return len(self.trace_set)
+
+    def __iter__(self):
+        for trace in self.trace_set:
+            yield Trace(np.array(trace.samples), dict(trace.meta))
+
+
+class PickleReader(TraceSetReader):
+    """Pickled trace sets are a single object graph and are read whole."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.trace_set = PickleTraceSet.read(path)
+        self.kwargs = {key: getattr(self.trace_set, key) for key in self.trace_set._keys}
+
+    def __len__(self):
+        return len(self.trace_set)
+
+    def __iter__(self):
+        yield from self.trace_set
+
+
+class TraceSetWriter(object):
+    """A streaming writer of a trace set."""
+
+    def append(self, traces: Sequence[Trace]):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+def _sample_coding(dtype: np.dtype) -> SampleCoding:
+    """Get the Inspector sample coding able to hold the samples of `dtype` (up to 32-bit integers)."""
+    if dtype.kind == "f":
+        return SampleCoding.Float16 if dtype.itemsize == 2 else SampleCoding.Float32
+    elif dtype.kind == "i":
+        return SampleCoding(min(dtype.itemsize, 4))
+    elif dtype.kind == "u":
+        return SampleCoding(min(dtype.itemsize * 2, 4))
+    raise TypeError(f"Samples of dtype {dtype} cannot be stored in an Inspector trace set.")
+
+
+class InspectorWriter(TraceSetWriter):
+    """
+    Writes the samples in the smallest sample coding that holds their dtype (unsigned integers are
+    widened, as the codings are signed), integer samples that do not fit 32 bits are rejected.
+    """
+
+    def __init__(self, path: Union[str, Path], num_traces: int, kwargs: Mapping[str, Any]):
+        self.file = open(path, "wb")
+        self.num_traces = num_traces
+        self.kwargs = {key: value for key, value in kwargs.items()
+                       if key in (tag[0] for tag in InspectorTraceSet._tag_parsers.values())}
+        self.trace_set: Optional[InspectorTraceSet] = None
+
+    def __header(self, trace: Trace):
+        kwargs = dict(self.kwargs)
+        kwargs["num_traces"] = self.num_traces
+        kwargs["num_samples"] = len(trace)
+        kwargs["sample_coding"] = _sample_coding(trace.samples.dtype)
+        # The samples are already scaled, by the reader or by the source format.
+        kwargs["y_scale"] = 1
+        kwargs.setdefault("title_space", 0)
+        kwargs.setdefault("data_space", 0)
+        self.trace_set = InspectorTraceSet(**kwargs)
+        self.trace_set._write_header(self.file)
+
+    def append(self, traces: Sequence[Trace]):
+        for trace in traces:
+            if self.trace_set is None:
+                self.__header(trace)
+            dtype = trace.samples.dtype
+            coding = self.trace_set.sample_coding.dtype()  # type: ignore
+            if dtype.kind in "ui" and not np.can_cast(dtype, coding):
+                info = np.iinfo(coding)
+                if len(trace) and (trace.samples.min() < info.min or trace.samples.max() > info.max):
+                    raise ValueError(f"Samples do not fit the {coding} sample coding.")
+            elif dtype.kind not in "uif":
+                raise TypeError(f"Samples of dtype {dtype} cannot be stored in an Inspector trace set.")
+            self.trace_set._write_trace(self.file, trace)  # type: ignore
+
+    def close(self):
+        self.file.close()
+
+
+class HDF5Writer(TraceSetWriter):
+
+    def __init__(self, path: Union[str, Path], num_traces: int, kwargs: Mapping[str, Any]):
+        self.file = h5py.File(str(path), "w")
+        self.kwargs = kwargs
+        self.ordering: List[str] = []
+
+    def append(self, traces: Sequence[Trace]):
+        for trace in traces:
+            key = str(uuid.uuid4())
+            dataset = self.file.create_dataset(key, data=trace.samples)
+            if trace.meta:
+                meta = HDF5Meta(dataset.attrs)
+                for k, v in trace.meta.items():
+                    meta[k] = v
+            self.ordering.append(key)
+
+    def close(self):
+        for key, value in self.kwargs.items():
+            try:
+                self.file.attrs[key] = value
+            except (TypeError, ValueError):
+                warnings.warn(f"Skipping trace set attribute {key} not storable in HDF5.")
+        self.file.attrs["_ordering"] = self.ordering
+        self.file.close()
+
+
+class ChipWhispererWriter(TraceSetWriter):
+    """
+    Writes the data files as memory-mapped .npy files, created at the first trace that has the
+    corresponding value. Columns of Python objects cannot be memory-mapped and are kept in memory.
+    """
+
+    def __init__(self, path: Union[str, Path], num_traces: int, kwargs: Mapping[str, Any]):
+        self.path, self.name = ChipWhispererTraceSet._split_path(str(path))
+        self.num_traces = num_traces
+        self.kwargs = kwargs
+        self.arrays: MutableMapping[str, np.ndarray] = {}
+        self.index = 0
+
+    def __store(self, type: str, value: Any):
+        if isinstance(value, np.ndarray) and value.dtype == object and value.ndim == 0:
+            value = value.item()
+        if value is None:
+            return
+        if type not in self.arrays:
+            value = np.asarray(value)
+            if value.dtype == object:
+                self.arrays[type] = np.full(self.num_traces, None, dtype=object)
+            else:
+                self.arrays[type] = np.lib.format.open_memmap(join(self.path, self.name + type + ".npy"),
+                                                              mode="w+", dtype=value.dtype,
+                                                              shape=(self.num_traces, *value.shape))
+        self.arrays[type][self.index] = value
+
+    def append(self, traces: Sequence[Trace]):
+        for trace in traces:
+            self.__store("traces", trace.samples)
+            for meta_key, type in ChipWhispererTraceSet._meta_types.items():
+                self.__store(type, trace.meta.get(meta_key))
+            self.index += 1
+
+    def close(self):
+        for type, array in self.arrays.items():
+            if isinstance(array, np.memmap):
+                array.flush()
+            else:
+                np.save(join(self.path, self.name + type + ".npy"), array)
+        self.arrays = {}
+        ChipWhispererTraceSet._write_config(self.path, self.name, self.kwargs)
+
+
+class NativeWriter(TraceSetWriter):
+    """Writes the samples as they come, the metadata columns are kept in memory until closed."""
+
+    def __init__(self, path: Union[str, Path], num_traces: int, kwargs: Mapping[str, Any]):
+        self.file = open(path, "wb")
+        self.kwargs = kwargs
+        self.meta: MutableMapping[str, List[Any]] = {}
+        self.dtype: Optional[np.dtype] = None
+        self.num_samples = 0
+        self.index = 0
+        self.file.write(bytes(_PREAMBLE.size))
+
+    def append(self, traces: Sequence[Trace]):
+        for trace in traces:
+            if self.dtype is None:
+                self.dtype = trace.samples.dtype
+                self.num_samples = len(trace)
+            elif len(trace) != self.num_samples:
+                raise ValueError("Traces in a native trace set need to have the same length.")
+            self.file.write(np.ascontiguousarray(trace.samples, dtype=self.dtype).tobytes())
+            for key in trace.meta.keys():
+                if key not in self.meta:
+                    self.meta[key] = [None] * self.index
+            for key, values in self.meta.items():
+                values.append(trace.meta.get(key))
+            self.index += 1
+
+    def close(self):
+        footer_offset = self.file.tell()
+        _write_footer(self.file, {key: _column(values) for key, values in self.meta.items()}, self.kwargs)
+        self.file.seek(0)
+        _write_preamble(self.file, self.dtype if self.dtype is not None else np.dtype("f4"), self.index,
+                        self.num_samples, footer_offset)
+        self.file.close()
+
+
+class PickleWriter(TraceSetWriter):
+    """Pickled trace sets are a single object graph and are written whole."""
+
+    def __init__(self, path: Union[str, Path], num_traces: int, kwargs: Mapping[str, Any]):
+        self.path = path
+        self.kwargs = kwargs
+        self.traces: List[Trace] = []
+
+    def append(self, traces: Sequence[Trace]):
+        self.traces.extend(traces)
+
+    def close(self):
+        PickleTraceSet(*self.traces, **self.kwargs).write(self.path)
+        self.traces = []
+
+
+READERS = {
+    "inspector": InspectorReader,
+    "hdf5": HDF5Reader,
+    "chipwhisperer": ChipWhispererReader,
+    "pickle": PickleReader,
+    "native": NativeReader
+}
+
+WRITERS = {
+    "inspector": InspectorWriter,
+    "hdf5": HDF5Writer,
+    "chipwhisperer": ChipWhispererWriter,
+    "pickle": PickleWriter,
+    "native": NativeWriter
+}
+
+
+@public
+class ConversionStats(object):
+    """Statistics of a trace set conversion."""
+    traces: int
+    samples_read: int
+    bytes_read: int
+    bytes_written: int
+    duration: float
+
+    def __init__(self):
+        self.traces = 0
+        self.samples_read = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.duration = 0.0
+
+    @property
+    def traces_per_second(self) -> float:
+        return self.traces / self.duration if self.duration else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_read / (self.duration * 1e6) if self.duration else 0.0
+
+    def __str__(self):
+        return (f"{self.traces} traces, {self.bytes_read / 1e6:.2f} MB in {self.duration:.2f} s "
+                f"({self.traces_per_second:.1f} traces/s, {self.megabytes_per_second:.2f} MB/s)")
+
+    def __repr__(self):
+        return f"ConversionStats({self})"
+
+
+def _chunks(reader: TraceSetReader, chunk_size: int) -> Iterator[List[Trace]]:
+    chunk = []
+    for trace in reader:
+        chunk.append(trace)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@public
+def convert(input: Union[str, Path], output: Union[str, Path],
+            input_format: Optional[str] = None, output_format: Optional[str] = None,
+            chunk_size: int = 1000, dtype=None, downsample: Optional[Tuple[str, int]] = None,
+            progress: Optional[Callable[[ConversionStats], None]] = None) -> ConversionStats:
+    """
+    Convert a trace set between formats, streaming the traces in chunks of `chunk_size`.
+
+    Only the chunk of traces being converted is kept in memory, with the exception of the
+    pickle format, which can only be read and written whole.
+
+    :param input: The input path (for ChipWhisperer the path of the config file).
+    :param output: The output path (for ChipWhisperer the path of the config file).
+    :param input_format: The input format, guessed from the path if `None`.
+    :param output_format: The output format, guessed from the path if `None`.
+    :param chunk_size: How many traces to convert at once.
+    :param dtype: The dtype to convert the samples to, if any.
+    :param downsample: The downsampling method (see :py:data:`DOWNSAMPLERS`) and factor, if any.
+    :param progress: A callback called with the running statistics after each chunk.
+    :return: The statistics of the conversion.
+    """
+    if input_format is None:
+        input_format = guess_format(input)
+    if output_format is None:
+        output_format = guess_format(output)
+    if input_format not in READERS or output_format not in WRITERS:
+        raise ValueError(f"Unsupported conversion {input_format} -> {output_format}.")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size needs to be positive.")
+    downsampler = None
+    if downsample is not None:
+        method, factor = downsample
+        downsampler = DOWNSAMPLERS[method]
+
+    stats = ConversionStats()
+    start = perf_counter()
+    reader = READERS[input_format](input)
+    try:
+        writer = WRITERS[output_format](output, len(reader), reader.kwargs)
+        try:
+            for chunk in _chunks(reader, chunk_size):
+                converted = []
+                for trace in chunk:
+                    stats.samples_read += len(trace)
+                    stats.bytes_read += trace.samples.nbytes
+                    if downsampler is not None:
+                        trace = downsampler(trace, factor)
+                    if dtype is not None:
+                        trace.samples = trace.samples.astype(dtype, copy=False)
+                    stats.bytes_written += trace.samples.nbytes
+                    converted.append(trace)
+                writer.append(converted)
+                stats.traces += len(converted)
+                stats.duration = perf_counter() - start
+                if progress is not None:
+                    progress(stats)
+        finally:
+            writer.close()
+    finally:
+        reader.close()
+    stats.duration = perf_counter() - start
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = ArgumentParser(prog="python -m pyecsca.sca.trace_set.convert",
+                            description="Convert trace sets between formats, out-of-core.")
+    parser.add_argument("input", help="The input trace set (for ChipWhisperer the config_<name>.cfg file).")
+    parser.add_argument("output", help="The output trace set (for ChipWhisperer the config_<name>.cfg file).")
+    parser.add_argument("-f", "--from", dest="input_format", choices=FORMATS,
+                        help="The input format, guessed from the file name if not given.")
+    parser.add_argument("-t", "--to", dest="output_format", choices=FORMATS,
+                        help="The output format, guessed from the file name if not given.")
+    parser.add_argument("-c", "--chunk-size", type=int, default=1000,
+                        help="The number of traces kept in memory at once.")
+    parser.add_argument("-d", "--dtype", help="The dtype to convert the samples to (e.g. float32, int16).")
+    parser.add_argument("--downsample", type=int, metavar="FACTOR", help="The downsampling factor.")
+    parser.add_argument("--downsample-method", choices=list(DOWNSAMPLERS.keys()), default="average",
+                        help="The downsampling method.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not report progress.")
+    args = parser.parse_args(argv)
+
+    def progress(stats: ConversionStats):
+        print(f"\r{stats}", end="", file=sys.stderr, flush=True)
+
+    downsample = (args.downsample_method, args.downsample) if args.downsample else None
+    stats = convert(args.input, args.output, args.input_format, args.output_format, args.chunk_size,
+                    np.dtype(args.dtype) if args.dtype else None, downsample,
+                    None if args.quiet else progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
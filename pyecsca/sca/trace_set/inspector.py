@@ -156,13 +156,21 @@ class InspectorTraceSet(TraceSet):
         else:
             raise TypeError
         for trace in traces:
-            new = InspectorTraceSet.__scale(trace.samples, tags["y_scale"])
+            new = InspectorTraceSet._scale(trace.samples, tags["y_scale"])
             del trace.samples
             trace.samples = new
         return InspectorTraceSet(*traces, **tags)
 
     @classmethod
     def __read(cls, file):
+        tags = InspectorTraceSet._read_header(file)
+        result = []
+        for _ in range(tags["num_traces"]):
+            result.append(InspectorTraceSet._read_trace(file, tags))
+        return result, tags
+
+    @staticmethod
+    def _read_header(file) -> dict:
         tags = {}
         while True:
             tag = ord(file.read(1))
@@ -178,20 +186,21 @@ class InspectorTraceSet(TraceSet):
                 break
             else:
                 continue
-        result = []
-        for _ in range(tags["num_traces"]):
-            title = None if "title_space" not in tags else Parsers.read_str(
-                    file.read(tags["title_space"]))
-            data = None if "data_space" not in tags else file.read(tags["data_space"])
-            dtype = tags["sample_coding"].dtype()
-            try:
-                samples = np.fromfile(file, dtype, tags["num_samples"])
-            except UnsupportedOperation:
-                samples = np.frombuffer(
-                        file.read(dtype.itemsize * tags["num_samples"]), dtype,
-                        tags["num_samples"])
-            result.append(Trace(samples, {"title": title, "data": data}))
-        return result, tags
+        return tags
+
+    @staticmethod
+    def _read_trace(file, tags: dict) -> Trace:
+        title = None if "title_space" not in tags else Parsers.read_str(
+                file.read(tags["title_space"]))
+        data = None if "data_space" not in tags else file.read(tags["data_space"])
+        dtype = tags["sample_coding"].dtype()
+        try:
+            samples = np.fromfile(file, dtype, tags["num_samples"])
+        except UnsupportedOperation:
+            samples = np.frombuffer(
+                    file.read(dtype.itemsize * tags["num_samples"]), dtype,
+                    tags["num_samples"])
+        return Trace(samples, {"title": title, "data": data})
 
     @classmethod
     def inplace(cls, input: Union[str, Path, bytes, BinaryIO]) -> "TraceSet":
@@ -212,6 +221,11 @@ class InspectorTraceSet(TraceSet):
             raise TypeError
 
     def __write(self, file):
+        self._write_header(file)
+        for trace in self._traces:
+            self._write_trace(file, trace)
+
+    def _write_header(self, file):
         for tag, tag_tuple in self._tag_parsers.items():
             tag_name, tag_len, _, tag_writer = tag_tuple
             if tag_name not in self._keys:
@@ -230,20 +244,20 @@ class InspectorTraceSet(TraceSet):
             file.write(value_bytes)
         file.write(b"\x5f\x00")
 
-        for trace in self._traces:
-            if self.title_space != 0 and trace.meta["title"] is not None:
-                file.write(Parsers.write_str(trace.meta["title"]))
-            if self.data_space != 0 and trace.meta["data"] is not None:
-                file.write(trace.meta["data"])
-            unscaled = InspectorTraceSet.__unscale(trace.samples, self.y_scale, self.sample_coding)
-            try:
-                unscaled.tofile(file)
-            except UnsupportedOperation:
-                file.write(unscaled.tobytes())
-            del unscaled
+    def _write_trace(self, file, trace: Trace):
+        if self.title_space != 0 and trace.meta["title"] is not None:
+            file.write(Parsers.write_str(trace.meta["title"]))
+        if self.data_space != 0 and trace.meta["data"] is not None:
+            file.write(trace.meta["data"])
+        unscaled = InspectorTraceSet.__unscale(trace.samples, self.y_scale, self.sample_coding)
+        try:
+            unscaled.tofile(file)
+        except UnsupportedOperation:
+            file.write(unscaled.tobytes())
+        del unscaled
 
     @staticmethod
-    def __scale(samples: np.ndarray, factor: float):
+    def _scale(samples: np.ndarray, factor: float):
         return samples.astype("f4") * factor
 
     @staticmethod
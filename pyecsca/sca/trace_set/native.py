@@ -0,0 +1,299 @@
+"""
+This module provides a native binary trace set format.
+
+A native trace set file consists of a fixed-size preamble, a contiguous block of the samples of all
+traces (in C order, with a fixed dtype) and a footer. The footer is an `.npz` archive with the
+trace set attributes and the columnar trace metadata. It does not use pickle, so it is safe to load,
+the sample block can be memory-mapped, and traces can be appended to it in place.
+
++------------+---------------------------------------------------------------+
+| Offset     | Content                                                       |
++============+===============================================================+
+| 0          | Magic `\\x93PYECSCA`.                                          |
++------------+---------------------------------------------------------------+
+| 8          | Format version (uint16), 6 bytes of padding.                  |
++------------+---------------------------------------------------------------+
+| 16         | Sample dtype (numpy dtype string, 8 bytes, zero padded).      |
++------------+---------------------------------------------------------------+
+| 24         | Number of traces, number of samples and the footer offset     |
+|            | (uint64 each), 16 bytes of padding.                           |
++------------+---------------------------------------------------------------+
+| 64         | The samples.                                                  |
++------------+---------------------------------------------------------------+
+| footer     | The `.npz` footer.                                            |
++------------+---------------------------------------------------------------+
+
+All integers are little-endian.
+"""
+import json
+import struct
+from io import BytesIO, RawIOBase, BufferedIOBase, UnsupportedOperation
+from pathlib import Path
+from typing import Union, BinaryIO, Mapping, Any, Optional, Dict, Tuple
+
+import numpy as np
+from public import public
+
+from .array import ArrayTraceSet, _column
+from ..trace import Trace
+
+MAGIC = b"\x93PYECSCA"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sH6x8sQQQ16x")
+
+
+def _write_preamble(file, dtype: np.dtype, num_traces: int, num_samples: int, footer_offset: int):
+    file.write(_PREAMBLE.pack(MAGIC, VERSION, dtype.str.encode("ascii"), num_traces, num_samples,
+                              footer_offset))
+
+
+def _read_preamble(file) -> Tuple[np.dtype, int, int, int]:
+    data = file.read(_PREAMBLE.size)
+    if len(data) != _PREAMBLE.size:
+        raise ValueError("Not a native trace set, file too short.")
+    magic, version, dtype, num_traces, num_samples, footer_offset = _PREAMBLE.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("Not a native trace set, wrong magic.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported native trace set version {version}.")
+    return np.dtype(dtype.rstrip(b"\x00").decode("ascii")), num_traces, num_samples, footer_offset
+
+
+def _encode_column(key: str, column: np.ndarray) -> Dict[str, np.ndarray]:
+    if column.dtype != object:
+        return {"meta/" + key: column}
+    present = np.array([value is not None for value in column], dtype=bool)
+    values = [value for value in column if value is not None]
+    if values and any(all(isinstance(value, kind) for value in values) for kind in (str, bytes)):
+        dense = np.array(values)
+    else:
+        dense = _column(values) if values else np.empty(0)
+    if dense.dtype == object:
+        raise TypeError(f"Meta column {key} cannot be stored in a native trace set.")
+    return {"meta/" + key: dense, "present/" + key: present}
+
+
+def _decode_column(key: str, arrays: Mapping[str, np.ndarray]) -> np.ndarray:
+    dense = arrays["meta/" + key]
+    if "present/" + key not in arrays:
+        return dense
+    present = arrays["present/" + key]
+    column = np.full(len(present), None, dtype=object)
+    for i, value in zip(np.flatnonzero(present), dense):
+        column[i] = value
+    return column
+
+
+def _write_footer(file, meta: Mapping[str, np.ndarray], attrs: Mapping[str, Any]):
+    arrays: Dict[str, Any] = {}
+    for key, column in meta.items():
+        arrays.update(_encode_column(key, column))
+    json_attrs = {}
+    for key, value in attrs.items():
+        if isinstance(value, np.ndarray):
+            arrays["attr/" + key] = value
+        else:
+            if isinstance(value, np.generic):
+                value = value.item()
+            try:
+                json.dumps(value)
+            except TypeError:
+                raise TypeError(f"Attribute {key} cannot be stored in a native trace set.")
+            json_attrs[key] = value
+    arrays["attrs"] = np.array(json.dumps(json_attrs))
+    np.savez(file, **arrays)
+
+
+def _read_footer(data: bytes) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    with np.load(BytesIO(data), allow_pickle=False) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    attrs = json.loads(str(arrays.pop("attrs")))
+    meta: Dict[str, np.ndarray] = {}
+    for name, value in arrays.items():
+        kind, key = name.split("/", 1)
+        if kind == "attr":
+            attrs[key] = value
+        elif kind == "meta":
+            meta[key] = _decode_column(key, arrays)
+    return meta, attrs
+
+
+@public
+class NativeTraceSet(ArrayTraceSet):
+    """
+    A trace set in the native pyecsca binary format, an :py:class:`ArrayTraceSet` stored in a file.
+
+    Unlike :py:class:`PickleTraceSet <pyecsca.sca.trace_set.pickle.PickleTraceSet>`, it stores the
+    samples as one contiguous block and the metadata in columns, it can be memory-mapped and is safe
+    to read from untrusted sources. The metadata values need to be representable as non-object numpy
+    arrays (numbers, strings, bytes or equal-shape arrays of those) or `None`.
+    """
+    _file: Optional[BinaryIO]
+    _footer_offset: int
+
+    def __init__(self, samples: np.ndarray, meta: Optional[Mapping[str, Any]] = None, **kwargs):
+        super().__init__(samples, meta, **kwargs)
+        self._file = None
+        self._footer_offset = 0
+
+    @classmethod
+    def read(cls, input: Union[str, Path, bytes, BinaryIO], lazy: bool = False) -> "NativeTraceSet":
+        """
+        Read a native trace set from a file path, bytes or file-like object.
+
+        :param input: Input file path, bytes or file-like object.
+        :param lazy: Whether to memory-map the samples instead of reading them, only for file paths.
+        :return: The trace set.
+        """
+        if isinstance(input, bytes):
+            with BytesIO(input) as r:
+                return NativeTraceSet.__read(r)
+        elif isinstance(input, (str, Path)):
+            with open(input, "rb") as f:
+                return NativeTraceSet.__read(f, input if lazy else None)
+        elif isinstance(input, (RawIOBase, BufferedIOBase, BinaryIO)):
+            return NativeTraceSet.__read(input)
+        raise TypeError
+
+    @classmethod
+    def inplace(cls, input: Union[str, Path, bytes, BinaryIO]) -> "NativeTraceSet":
+        """
+        Open a native trace set for modification in place, its samples are memory-mapped and
+        :py:meth:`append` and :py:meth:`extend` write to the file, along with the metadata, so the
+        file is consistent after each call. :py:meth:`save` or :py:meth:`close` write the metadata
+        modified otherwise.
+
+        :param input: Input file path.
+        :return: The trace set.
+        """
+        if not isinstance(input, (str, Path)):
+            raise TypeError
+        file = open(input, "r+b")
+        result = NativeTraceSet.__read(file, input, "r+")
+        result._file = file
+        return result
+
+    @classmethod
+    def __read(cls, file, mmap_path=None, mmap_mode="r") -> "NativeTraceSet":
+        dtype, num_traces, num_samples, footer_offset = _read_preamble(file)
+        shape = (num_traces, num_samples)
+        samples: np.ndarray
+        if mmap_path is not None and num_traces * num_samples != 0:
+            samples = np.memmap(mmap_path, dtype=dtype, mode=mmap_mode, offset=_PREAMBLE.size,
+                                shape=shape)
+        else:
+            count = num_traces * num_samples
+            try:
+                samples = np.fromfile(file, dtype, count)
+            except UnsupportedOperation:
+                samples = np.frombuffer(file.read(dtype.itemsize * count), dtype, count)
+            samples = samples.reshape(shape)
+        file.seek(footer_offset)
+        meta, attrs = _read_footer(file.read())
+        result = NativeTraceSet(samples, meta, **attrs)
+        result._footer_offset = footer_offset
+        return result
+
+    def append(self, value: Trace) -> Trace:
+        """
+        Append a trace, writing its samples to the file if the trace set is open in place.
+
+        :param value: The trace.
+        :return: The appended trace, a view into this trace set.
+        """
+        self.extend(value)
+        return self[len(self) - 1]
+
+    def extend(self, *traces: Trace):
+        """
+        Append several traces at once, this is faster than appending them one by one.
+
+        If the trace set is open in place, the samples are written to the file, followed by the
+        metadata and the preamble, so the file is consistent (and readable) after the call.
+
+        :param traces: The traces.
+        """
+        if not traces:
+            return
+        num_samples = self.samples.shape[1] if len(self) else len(traces[0])
+        if any(len(trace) != num_samples for trace in traces):
+            raise ValueError("Traces in a native trace set need to have the same length.")
+        dtype = self.samples.dtype if len(self) else traces[0].samples.dtype
+        new = np.stack([trace.samples for trace in traces]).astype(dtype, copy=False)
+        old_len = len(self)
+        if self._file is not None:
+            self._file.seek(_PREAMBLE.size + old_len * num_samples * dtype.itemsize)
+            self._file.write(np.ascontiguousarray(new).tobytes())
+            self._file.flush()
+            self._footer_offset = self._file.tell()
+            self.samples = np.memmap(self._file.name, dtype=dtype, mode="r+", offset=_PREAMBLE.size,
+                                     shape=(old_len + len(new), num_samples))
+        else:
+            self.samples = np.concatenate([self.samples.reshape(-1, num_samples).astype(dtype, copy=False), new])
+        keys = dict.fromkeys(self.meta.keys())
+        for trace in traces:
+            keys.update(dict.fromkeys(trace.meta.keys()))
+        for key in keys:
+            values = _column([trace.meta.get(key) for trace in traces])
+            if key not in self.meta:
+                column = np.full(old_len, None, dtype=object)
+            else:
+                column = self.meta[key]
+            if column.dtype != object and values.dtype != object and values.shape[1:] == column.shape[1:]:
+                self.meta[key] = np.concatenate([column, values])
+            else:
+                merged = np.empty(old_len + len(values), dtype=object)
+                merged[:old_len] = list(column)
+                merged[old_len:] = list(values)
+                self.meta[key] = merged
+        if self._file is not None:
+            self.save()
+
+    def write(self, output: Union[str, Path, BinaryIO]):
+        """
+        Save this trace set into a file.
+
+        :param output: An output path or file-like object.
+        """
+        if isinstance(output, (str, Path)):
+            with open(output, "wb") as f:
+                self.__write(f)
+        elif isinstance(output, (RawIOBase, BufferedIOBase, BinaryIO)):
+            self.__write(output)
+        else:
+            raise TypeError
+
+    def __write(self, file):
+        samples = np.ascontiguousarray(self.samples)
+        _write_preamble(file, samples.dtype, samples.shape[0], samples.shape[1],
+                        _PREAMBLE.size + samples.nbytes)
+        try:
+            samples.tofile(file)
+        except UnsupportedOperation:
+            file.write(samples.tobytes())
+        _write_footer(file, self.meta, {key: getattr(self, key) for key in self._keys})
+
+    def save(self):
+        """Write the metadata and attributes of a trace set opened in place."""
+        if self._file is None:
+            return
+        if isinstance(self.samples, np.memmap):
+            self.samples.flush()
+        self._file.seek(self._footer_offset)
+        _write_footer(self._file, self.meta, {key: getattr(self, key) for key in self._keys})
+        self._file.truncate()
+        self._file.seek(0)
+        _write_preamble(self._file, self.samples.dtype, self.samples.shape[0], self.samples.shape[1],
+                        self._footer_offset)
+        self._file.flush()
+
+    def close(self):
+        """Save and close a trace set opened in place."""
+        if self._file is not None:
+            self.save()
+            self._file.close()
+            self._file = None
+
+    def __repr__(self):
+        args = ", ".join([f"{key}={getattr(self, key)!r}" for key in self._keys])
+        return f"NativeTraceSet(samples={self.samples.shape}, {args})"
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+from struct import pack, unpack
+from sys import stdin, stdout
+
+if __name__ == "__main__":
+    while True:
+        header = stdin.buffer.read(4)
+        if len(header) < 4:
+            break
+        data = stdin.buffer.read(unpack("<I", header)[0])
+        stdout.buffer.write(pack("<I", len(data)) + data[::-1])
+        stdout.buffer.flush()
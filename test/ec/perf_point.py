@@ -0,0 +1,36 @@
+"""
+Micro-benchmark of the per-call cost of point conversions and affine arithmetic.
+
+Run as `python -m test.ec.perf_point [number]` from the repository root.
+"""
+import sys
+from timeit import Timer
+
+from pyecsca.ec.params import get_params
+from pyecsca.ec.point import batch_to_affine
+
+
+def bench(name: str, stmt, number: int, per: int = 1):
+    times = Timer(stmt).repeat(repeat=5, number=number)
+    print(f"{name:<32} {min(times) / (number * per) * 1e6:10.2f} us")
+
+
+def main(number: int = 1000):
+    params = get_params("secg", "secp256r1", "jacobian")
+    curve = params.curve
+    generator = params.generator
+    affine = generator.to_affine()
+    double = curve.affine_double(affine)
+    points = [generator] * 100
+
+    bench("to_affine", lambda: generator.to_affine(), number)
+    bench("batch_to_affine (per point)", lambda: batch_to_affine(points), number // 100 or 1, 100)
+    bench("to_model", lambda: affine.to_model(curve.coordinate_model, curve), number)
+    bench("is_on_curve", lambda: curve.is_on_curve(affine), number)
+    bench("affine_add", lambda: curve.affine_add(affine, double), number)
+    bench("affine_double", lambda: curve.affine_double(affine), number)
+    bench("affine_multiply", lambda: curve.affine_multiply(affine, params.order - 1), number // 100 or 1)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
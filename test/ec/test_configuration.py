@@ -30,7 +30,7 @@ class ConfigurationTests(TestCase):
         model = ShortWeierstrassModel()
         coords = model.coordinates["projective"]
         configs = list(all_configurations(model=model, coords=coords, **self.base_independents()))
-        self.assertEqual(len(configs), 1960)
+        self.assertEqual(len(configs), 2800)
 
     def test_mult_class(self):
         model = ShortWeierstrassModel()
@@ -5,6 +5,7 @@ from pyecsca.ec.curve import EllipticCurve
 from pyecsca.ec.params import get_params
 from pyecsca.ec.mod import Mod
 from pyecsca.ec.model import MontgomeryModel
+from pyecsca.ec.mult import LTRMultiplier
 from pyecsca.ec.point import Point, InfinityPoint
 
 
@@ -13,6 +14,7 @@ class CurveTests(TestCase):
         self.secp128r1 = get_params("secg", "secp128r1", "projective")
         self.base = self.secp128r1.generator
         self.affine_base = self.base.to_affine()
+        self.coords = self.secp128r1.curve.coordinate_model
         self.curve25519 = get_params("other", "Curve25519", "xz")
         self.ed25519 = get_params("other", "Ed25519", "projective")
 
@@ -50,6 +52,11 @@ class CurveTests(TestCase):
 
     def test_affine_add(self):
         self.assertIsNotNone(self.secp128r1.curve.affine_add(self.affine_base, self.affine_base))
+        # The base formulas are incomplete, degenerate inputs give the point (0, 0).
+        degenerate = self.secp128r1.curve.affine_add(self.affine_base,
+                                                     self.secp128r1.curve.affine_negate(self.affine_base))
+        self.assertEqual(degenerate.x, 0)
+        self.assertEqual(degenerate.y, 0)
 
     def test_affine_double(self):
         self.assertIsNotNone(self.secp128r1.curve.affine_double(self.affine_base))
@@ -64,6 +71,13 @@ class CurveTests(TestCase):
         expected = self.secp128r1.curve.affine_add(expected, self.affine_base)
         expected = self.secp128r1.curve.affine_double(expected)
         self.assertEqual(self.secp128r1.curve.affine_multiply(self.affine_base, 10), expected)
+        mult = LTRMultiplier(self.coords.formulas["add-2007-bl"], self.coords.formulas["dbl-2007-bl"])
+        mult.init(self.secp128r1, self.base)
+        for scalar in (1, 2, 3, 17, 0xcafebabe, self.secp128r1.order - 2):
+            expected = mult.multiply(scalar).to_affine()
+            for width in (1, 3, 5):
+                self.assertEqual(self.secp128r1.curve.affine_multiply(self.affine_base, scalar, width),
+                                 expected)
 
     def test_affine_neutral(self):
         self.assertIsNone(self.secp128r1.curve.affine_neutral)
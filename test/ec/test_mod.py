@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from pyecsca.ec.mod import Mod, gcd, extgcd, Undefined, miller_rabin
+from pyecsca.ec.mod import (Mod, gcd, extgcd, Undefined, miller_rabin, batch_inverse, SquareRoot,
+                            batch_sqrt)
 
 
 class ModTests(TestCase):
@@ -10,6 +11,18 @@ class ModTests(TestCase):
         self.assertEqual(extgcd(15, 0), (1, 0, 15))
         self.assertEqual(extgcd(15, 20), (-1, 1, 5))
 
+    def test_batch_inverse(self):
+        n = 0xfffffffdffffffffffffffffffffffff
+        elements = [Mod(3, n), Mod(0, n), Mod(0xabcdef, n), Mod(n - 1, n), Mod(0, n)]
+        self.assertListEqual(batch_inverse(elements), [element.inverse() for element in elements])
+        self.assertListEqual(batch_inverse([]), [])
+        # Not invertible elements modulo a composite do not affect the others.
+        elements = [Mod(2, 15), Mod(3, 15), Mod(0, 15), Mod(7, 15)]
+        self.assertListEqual(batch_inverse(elements), [element.inverse() for element in elements])
+        self.assertEqual(batch_inverse(elements)[0], Mod(8, 15))
+        with self.assertRaises(ValueError):
+            batch_inverse([Mod(2, 15), Mod(2, 17)])
+
     def test_miller_rabin(self):
         self.assertTrue(miller_rabin(2))
         self.assertTrue(miller_rabin(3))
@@ -29,6 +42,31 @@ class ModTests(TestCase):
         self.assertIn(Mod(0xffffffff00000001000000000000000000000000fffffffffffffffffffffffc, p).sqrt(), (0x9add512515b70d9ec471151c1dec46625cd18b37bde7ca7fb2c8b31d7033599d, 0x6522aed9ea48f2623b8eeae3e213b99da32e74c9421835804d374ce28fcca662))
         q = 0x75d44fee9a71841ae8403c0c251fbad
         self.assertIn(Mod(0x591e0db18cf1bd81a11b2985a821eb3, q).sqrt(), (0x113b41a1a2b73f636e73be3f9a3716e, 0x64990e4cf7ba44b779cc7dcc8ae8a3f))
+        with self.assertRaises(ValueError):
+            Mod(11, 31).sqrt()
+        with self.assertRaises(NotImplementedError):
+            Mod(4, 15).sqrt()
+        for n, method in ((2, "trivial"), (31, "3 mod 4"), (29, "5 mod 8"), (97, "tonelli-shanks"),
+                          (0xffffffffffffffffffffffffffffffff000000000000000000000001, "tonelli-shanks")):
+            root = SquareRoot.of(n)
+            self.assertIs(SquareRoot.of(n), root)
+            self.assertEqual(root.method, method)
+            for x in range(min(n, 200)):
+                if root.is_residue(x):
+                    self.assertEqual(pow(root.sqrt(x), 2, n), x)
+                else:
+                    self.assertRaises(ValueError, root.sqrt, x)
+
+    def test_batch_sqrt(self):
+        n = 0xffffffffffffffffffffffffffffffff000000000000000000000001
+        elements = [Mod(4, n), Mod(0, n), Mod(11, n), Mod(0xabcdef, n)]
+        roots = batch_sqrt(elements)
+        for element, root in zip(elements, roots):
+            if element.is_residue():
+                self.assertEqual(root ** 2, element)
+            else:
+                self.assertIsNone(root)
+        self.assertListEqual(batch_sqrt([]), [])
 
     def test_eq(self):
         self.assertEqual(Mod(1, 7), 1)
@@ -11,3 +11,22 @@ class CurveModelTests(TestCase):
         self.assertGreater(len(MontgomeryModel().coordinates), 0)
         self.assertGreater(len(EdwardsModel().coordinates), 0)
         self.assertGreater(len(TwistedEdwardsModel().coordinates), 0)
+
+    def test_compiled(self):
+        model = ShortWeierstrassModel()
+        code = model.compiled("base_addition")
+        self.assertIs(ShortWeierstrassModel().compiled("base_addition"), code)
+        self.assertIsNot(model.compiled("base_doubling"), code)
+        self.assertIsNot(MontgomeryModel().compiled("base_addition"), code)
+        coords = model.coordinates["jacobian"]
+        self.assertIs(coords.satisfying_ops, coords.satisfying_ops)
+        self.assertEqual(len(coords.satisfying_ops), len(coords.satisfying))
+
+    def test_function(self):
+        model = ShortWeierstrassModel()
+        func = model.function("base_addition")
+        self.assertIs(ShortWeierstrassModel().function("base_addition"), func)
+        # (1, 1) + (2, 3) on y^2 = x^3 + 3x + 1 over GF(7), the slope is 2.
+        self.assertEqual(func(x1=1, y1=1, x2=2, y2=3, a=3, b=1, p=7), (1, 6))
+        self.assertEqual(model.function("base_negation")(x1=1, y1=1, p=7), (1, 6))
+        self.assertEqual(func(x1=1, y1=1, x2=1, y2=6, a=3, b=1, p=7), (0, 0))
@@ -2,11 +2,13 @@ from unittest import TestCase
 
 from parameterized import parameterized
 
+from pyecsca.ec.context import local, DefaultContext
 from pyecsca.ec.params import get_params
 from pyecsca.ec.mult import (LTRMultiplier, RTLMultiplier, LadderMultiplier, BinaryNAFMultiplier,
                              WindowNAFMultiplier, SimpleLadderMultiplier,
                              DifferentialLadderMultiplier,
-                             CoronMultiplier)
+                             CoronMultiplier, CombMultiplier, BGMWMultiplier, ScalarMultiplier,
+                             ShamirMultiplier, StrausMultiplier, PippengerMultiplier)
 from pyecsca.ec.point import InfinityPoint
 from .utils import cartesian
 
@@ -150,6 +152,142 @@ class ScalarMultiplierTests(TestCase):
         res_precompute = mult.multiply(157*789)
         self.assertPointEquality(res_precompute, res, scale)
 
+    @parameterized.expand(cartesian([
+        ("comb", CombMultiplier, {}),
+        ("comb_always", CombMultiplier, {"always": True}),
+        ("bgmw", BGMWMultiplier, {})
+    ], [
+        ("add-1998-cmo", "dbl-1998-cmo", 3, "z"),
+        ("add-1998-cmo", "dbl-1998-cmo", 4, None),
+        ("add-2016-rcb", "dbl-2016-rcb", 5, None)
+    ]))
+    def test_fixed_base(self, name, mult_class, kwargs, add, dbl, width, scale):
+        formulas = self.get_formulas(self.coords, add, dbl, scale)
+        mult = mult_class(*formulas[:2], width, *formulas[2:], **kwargs)
+        mult.init(self.secp128r1, self.base)
+        res = mult.multiply(157*789)
+        other = mult.multiply(157)
+        mult.init(self.secp128r1, other)
+        other = mult.multiply(789)
+        self.assertPointEquality(res, other, scale)
+        mult.init(self.secp128r1, self.base)
+        self.assertEqual(InfinityPoint(self.coords), mult.multiply(0))
+        with self.assertRaises(ValueError):
+            mult.multiply(1 << (self.secp128r1.order.bit_length() + width))
+
+    def test_fixed_base_cache(self):
+        ScalarMultiplier.precomputation_cache.clear()
+        mult = CombMultiplier(self.coords.formulas["add-1998-cmo"], self.coords.formulas["dbl-1998-cmo"], 4,
+                              self.coords.formulas["z"])
+        mult.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 1)
+        res = mult.multiply(2355498743)
+        other = CombMultiplier(self.coords.formulas["add-1998-cmo"], self.coords.formulas["dbl-1998-cmo"], 4,
+                               self.coords.formulas["z"])
+        other.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 1)
+        self.assertEqual(other.multiply(2355498743), res)
+        wider = CombMultiplier(self.coords.formulas["add-1998-cmo"], self.coords.formulas["dbl-1998-cmo"], 5,
+                               self.coords.formulas["z"])
+        wider.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 2)
+        self.assertEqual(wider.multiply(2355498743), res)
+        with local(DefaultContext()) as ctx:
+            other.init(self.secp128r1, self.base)
+        self.assertGreater(len(ctx.actions), 0)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 2)
+
+    def test_precomputation_cache(self):
+        ScalarMultiplier.precomputation_cache.clear()
+        formulas = self.get_formulas(self.coords, "add-1998-cmo", "dbl-1998-cmo", "neg", "z")
+        mult = WindowNAFMultiplier(*formulas[:3], 4, *formulas[3:], precompute_negation=True)
+        mult.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 1)
+        res = mult.multiply(2355498743)
+        mult.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 1)
+        self.assertEqual(mult.multiply(2355498743), res)
+        other = WindowNAFMultiplier(*formulas[:3], 4, *formulas[3:])
+        other.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 2)
+        self.assertEqual(other.multiply(2355498743), res)
+        with local(DefaultContext()) as ctx:
+            mult.init(self.secp128r1, self.base)
+        self.assertGreater(len(ctx.actions), 0)
+        naf = BinaryNAFMultiplier(*formulas)
+        naf.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 2)
+        self.assertEqual(naf.multiply(2355498743), res)
+
+        ScalarMultiplier.precomputation_cache.clear()
+        uncached = WindowNAFMultiplier(*formulas[:3], 4, *formulas[3:])
+        uncached.cache_precomputation = False
+        uncached.init(self.secp128r1, self.base)
+        self.assertEqual(len(ScalarMultiplier.precomputation_cache), 0)
+        self.assertEqual(uncached.multiply(2355498743), res)
+
+    @parameterized.expand([
+        ("Shamir", ShamirMultiplier, ("add-1998-cmo", "dbl-1998-cmo"), {}),
+        ("Straus", StrausMultiplier, ("add-1998-cmo", "dbl-1998-cmo", "neg"), {"width": 4}),
+        ("Pippenger", PippengerMultiplier, ("add-1998-cmo", "dbl-1998-cmo"), {}),
+        ("Pippenger3", PippengerMultiplier, ("add-1998-cmo", "dbl-1998-cmo"), {"width": 3}),
+        ("StrausComplete", StrausMultiplier, ("add-2016-rcb", "dbl-2016-rcb", "neg"), {"width": 3})
+    ])
+    def test_multi_scalar(self, name, mult_class, formulas, kwargs):
+        single = LTRMultiplier(*self.get_formulas(self.coords, *formulas[:2]))
+        points = []
+        for k in (3, 157, 789, 2355498743):
+            single.init(self.secp128r1, self.base)
+            points.append(single.multiply(k))
+        scalars = (325385790209017329644351321912443757746, 2355498743, 0, 1 << 100)
+
+        mult = mult_class(*self.get_formulas(self.coords, *formulas), **kwargs)
+        for count in (1, 2, 4):
+            mult.init(self.secp128r1, *points[:count])
+            res = mult.multiply(*scalars[:count])
+            single.init(self.secp128r1, points[0])
+            partial = single.multiply(scalars[0])
+            for point, scalar in zip(points[1:count], scalars[1:count]):
+                single.init(self.secp128r1, point)
+                partial = single._add(partial, single.multiply(scalar))
+            self.assertTrue(res.equals(partial))
+        self.assertEqual(mult.multiply(0, 0, 0, 0), self.secp128r1.curve.neutral)
+        # Equal points and intermediate sums equal to precomputed multiples (points[0] is 3 * base).
+        mult.init(self.secp128r1, self.base, self.base, points[0])
+        single.init(self.secp128r1, self.base)
+        self.assertTrue(mult.multiply(5, 7, 4).equals(single.multiply(24)))
+        self.assertTrue(mult.multiply(1, 2, 1).equals(single.multiply(6)))
+        mult.init(self.secp128r1, self.base, self.base)
+        self.assertEqual(mult.multiply(1, self.secp128r1.order - 1), self.secp128r1.curve.neutral)
+        with self.assertRaises(ValueError):
+            mult.multiply(1, 2, 3)
+        with self.assertRaises(ValueError):
+            mult.init(self.secp128r1)
+        # The neutral sum is not scaled.
+        scaled = mult_class(*self.get_formulas(self.coords, *formulas), scl=self.coords.formulas["z"],
+                            **kwargs)
+        scaled.init(self.secp128r1, self.base, self.base)
+        self.assertEqual(scaled.multiply(0, 0), self.secp128r1.curve.neutral)
+        self.assertEqual(scaled.multiply(1, self.secp128r1.order - 1), self.secp128r1.curve.neutral)
+
+    @parameterized.expand([
+        ("jacobian", "secg", "secp128r1", "jacobian", "add-1998-cmo", "dbl-1998-cmo"),
+        ("xyzz", "secg", "secp128r1", "xyzz", "add-2008-s", "dbl-2008-s-1"),
+        ("modified", "secg", "secp128r1", "modified", "add-1998-cmo-2", "dbl-1998-cmo-2"),
+        ("edwards", "other", "E-222", "projective", "add-2007-bl", "dbl-2007-bl"),
+        ("twisted", "other", "Ed25519", "extended", "add-2008-hwcd", "dbl-2008-hwcd")
+    ])
+    def test_multi_scalar_models(self, name, category, curve, coords, add, dbl):
+        params = get_params(category, curve, coords)
+        formulas = self.get_formulas(params.curve.coordinate_model, add, dbl)
+        mult = ShamirMultiplier(*formulas)
+        mult.init(params, params.generator, params.generator)
+        single = LTRMultiplier(*formulas)
+        single.init(params, params.generator)
+        self.assertTrue(mult.multiply(1, 1).equals(single.multiply(2)))
+        self.assertTrue(mult.multiply(5, 7).equals(single.multiply(12)))
+        self.assertEqual(mult.multiply(1, params.order - 1), params.curve.neutral)
+
     @parameterized.expand(cartesian([
         ("10", 10),
         ("2355498743", 2355498743),
@@ -222,6 +360,24 @@ class ScalarMultiplierTests(TestCase):
         res_coron = coron.multiply(num)
         self.assertEqual(res_coron, res_ltr)
 
+        comb = CombMultiplier(self.coords.formulas[add],
+                              self.coords.formulas[dbl], 4,
+                              self.coords.formulas["z"])
+        with self.assertRaises(ValueError):
+            comb.multiply(1)
+        comb.init(self.secp128r1, self.base)
+        res_comb = comb.multiply(num)
+        self.assertEqual(res_comb, res_ltr)
+
+        bgmw = BGMWMultiplier(self.coords.formulas[add],
+                              self.coords.formulas[dbl], 4,
+                              self.coords.formulas["z"])
+        with self.assertRaises(ValueError):
+            bgmw.multiply(1)
+        bgmw.init(self.secp128r1, self.base)
+        res_bgmw = bgmw.multiply(num)
+        self.assertEqual(res_bgmw, res_ltr)
+
     def test_init_fail(self):
         mult = DifferentialLadderMultiplier(self.coords25519.formulas["dadd-1987-m"],
                                             self.coords25519.formulas["dbl-1987-m"],
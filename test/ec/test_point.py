@@ -4,7 +4,7 @@ from pyecsca.ec.coordinates import AffineCoordinateModel
 from pyecsca.ec.params import get_params
 from pyecsca.ec.mod import Mod
 from pyecsca.ec.model import ShortWeierstrassModel, MontgomeryModel
-from pyecsca.ec.point import Point, InfinityPoint
+from pyecsca.ec.point import Point, InfinityPoint, batch_to_affine
 
 
 class PointTests(TestCase):
@@ -34,6 +34,36 @@ class PointTests(TestCase):
         affine = InfinityPoint(self.coords).to_affine()
         self.assertIsInstance(affine, InfinityPoint)
 
+    def test_batch_to_affine(self):
+        jacobian = get_params("secg", "secp128r1", "jacobian")
+        points = [self.base, InfinityPoint(self.coords), self.base.to_affine(), jacobian.generator]
+        for k in range(2, 6):
+            points.append(Point(self.coords, **{var: value * k for var, value in self.base.coords.items()}))
+        # Scaling formulas set Z to an integer.
+        points.append(Point(self.coords, X=self.base.coords["X"], Y=self.base.coords["Y"], Z=1))
+        affine = batch_to_affine(points)
+        self.assertEqual(len(affine), len(points))
+        X, Y, Z = (self.base.coords[var] for var in ("X", "Y", "Z"))
+        expected = Point(self.affine, x=X / Z, y=Y / Z)
+        for result in affine[:1] + affine[2:]:
+            self.assertEqual(result, expected)
+        X, Y, Z = (jacobian.generator.coords[var] for var in ("X", "Y", "Z"))
+        self.assertEqual(affine[3], Point(self.affine, x=X / Z**2, y=Y / Z**3))
+        self.assertIsInstance(affine[1], InfinityPoint)
+        self.assertListEqual(batch_to_affine([]), [])
+
+        # Points of curves over different primes in the same coordinate model.
+        secp256r1 = get_params("secg", "secp256r1", "projective")
+        mixed = batch_to_affine([self.base, secp256r1.generator])
+        self.assertEqual(mixed[0], expected)
+        self.assertEqual(mixed[1], secp256r1.generator.to_affine())
+        X, Y, Z = (secp256r1.generator.coords[var] for var in ("X", "Y", "Z"))
+        self.assertEqual(mixed[1], Point(self.affine, x=X / Z, y=Y / Z))
+
+        curve25519 = get_params("other", "Curve25519", "xz")
+        with self.assertRaises(NotImplementedError):
+            batch_to_affine([curve25519.generator])
+
     def test_to_model(self):
         affine = Point(self.affine, x=Mod(0xabcd, self.secp128r1.curve.prime),
                        y=Mod(0xef, self.secp128r1.curve.prime))
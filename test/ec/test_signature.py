@@ -4,7 +4,7 @@ from parameterized import parameterized
 
 from pyecsca.ec.params import get_params
 from pyecsca.ec.mod import Mod
-from pyecsca.ec.mult import LTRMultiplier
+from pyecsca.ec.mult import LTRMultiplier, StrausMultiplier, ShamirMultiplier, PippengerMultiplier
 from pyecsca.ec.signature import (Signature, SignatureResult, ECDSA_NONE, ECDSA_SHA1, ECDSA_SHA224,
                                   ECDSA_SHA256, ECDSA_SHA384, ECDSA_SHA512)
 
@@ -76,6 +76,77 @@ class SignatureTests(TestCase):
         self.assertTrue(verifier.verify_data(sig_other, self.msg))
         self.assertEqual(sig_one, sig_other)
 
+    @parameterized.expand([
+        ("Shamir", lambda add, dbl, neg: ShamirMultiplier(add, dbl)),
+        ("Straus", lambda add, dbl, neg: StrausMultiplier(add, dbl, neg, 4)),
+        ("Pippenger", lambda add, dbl, neg: PippengerMultiplier(add, dbl))
+    ])
+    def test_multi_scalar(self, name, make_mult):
+        neg = self.secp128r1.curve.coordinate_model.formulas["neg"]
+        mult = make_mult(self.add, self.dbl, neg)
+        signer = ECDSA_SHA256(self.mult, self.secp128r1, privkey=self.priv)
+        sig = signer.sign_data(self.msg)
+        verifier = ECDSA_SHA256(mult, self.secp128r1, pubkey=self.pub, privkey=self.priv)
+        self.assertTrue(verifier.verify_data(sig, self.msg))
+        self.assertFalse(verifier.verify_data(sig, b"something else"))
+        self.assertTrue(verifier.verify_data(verifier.sign_data(self.msg), self.msg))
+
+    @parameterized.expand([
+        ("LTR", lambda add, dbl, neg, scl: LTRMultiplier(add, dbl, scl)),
+        ("Shamir", lambda add, dbl, neg, scl: ShamirMultiplier(add, dbl, scl)),
+        ("Straus", lambda add, dbl, neg, scl: StrausMultiplier(add, dbl, neg, 4, scl)),
+        ("Pippenger", lambda add, dbl, neg, scl: PippengerMultiplier(add, dbl, scl=scl))
+    ])
+    def test_forged_infinity(self, name, make_mult):
+        # With Q = G and r = -z, u1 * G + u2 * Q is the point at infinity.
+        model = self.secp128r1.curve.coordinate_model
+        digest = bytes([5]) * 16
+        sig = SignatureResult(-int.from_bytes(digest, byteorder="big") % self.secp128r1.order, 1)
+        for scl in (None, model.formulas["z"]):
+            mult = make_mult(self.add, self.dbl, model.formulas["neg"], scl)
+            verifier = ECDSA_NONE(mult, self.secp128r1, add=self.add, pubkey=self.secp128r1.generator)
+            self.assertFalse(verifier.verify_hash(sig, digest))
+
+    @parameterized.expand([
+        ("LTR", lambda add, dbl, neg: LTRMultiplier(add, dbl)),
+        ("Straus", lambda add, dbl, neg: StrausMultiplier(add, dbl, neg, 4))
+    ])
+    def test_batch(self, name, make_mult):
+        neg = self.secp128r1.curve.coordinate_model.formulas["neg"]
+        signer = ECDSA_NONE(self.mult, self.secp128r1, privkey=self.priv)
+        other_priv = Mod(0xcafebabe, self.secp128r1.order)
+        other_signer = ECDSA_NONE(self.mult, self.secp128r1, privkey=other_priv)
+        self.mult.init(self.secp128r1, self.secp128r1.generator)
+        other_pub = self.mult.multiply(int(other_priv))
+        signatures, digests, pubkeys, points = [], [], [], []
+        for i in range(12):
+            digest = bytes([i + 1]) * 16
+            nonce = 0x1234 + (i % 10)
+            if i % 3 == 0:
+                signatures.append(other_signer.sign_hash(digest, nonce=nonce))
+                pubkeys.append(other_pub)
+            else:
+                signatures.append(signer.sign_hash(digest, nonce=nonce))
+                pubkeys.append(self.pub)
+            digests.append(digest)
+            self.mult.init(self.secp128r1, self.secp128r1.generator)
+            points.append(self.mult.multiply(nonce))
+        points[4] = None
+        points[6] = points[6].to_affine().to_model(self.secp128r1.curve.coordinate_model,
+                                                   self.secp128r1.curve)
+        verifier = ECDSA_NONE(make_mult(self.add, self.dbl, neg), self.secp128r1, pubkey=self.pub)
+        self.assertEqual(verifier.verify_batch(signatures, digests, pubkeys, points), [True] * 12)
+
+        signatures[2] = SignatureResult(signatures[2].r, signatures[2].s + 1)
+        signatures[4] = SignatureResult(signatures[4].r, signatures[4].s + 1)
+        digests[11] = bytes([0xff]) * 16
+        expected = [i not in (2, 4, 11) for i in range(12)]
+        self.assertEqual(verifier.verify_batch(signatures, digests, pubkeys, points), expected)
+        self.assertEqual(verifier.verify_batch(signatures, digests, pubkeys), expected)
+        self.assertEqual(verifier.verify_batch(signatures[1:3], digests[1:3]), [True, False])
+        with self.assertRaises(ValueError):
+            verifier.verify_batch(signatures, digests[1:])
+
     def test_der(self):
         sig = SignatureResult(0xaaaaa, 0xbbbbb)
         self.assertEqual(sig, SignatureResult.from_DER(sig.to_DER()))
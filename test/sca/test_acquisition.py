@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+import numpy as np
+
+from pyecsca.sca import Acquisition
+from pyecsca.sca.trace_set.convert import TraceSetWriter
+from .utils import CountingScope
+
+
+class ListWriter(TraceSetWriter):
+
+    def __init__(self):
+        self.traces = []
+        self.closed = False
+
+    def append(self, traces):
+        self.traces.extend(traces)
+
+    def close(self):
+        self.closed = True
+
+
+class AcquisitionTests(TestCase):
+
+    def test_run(self):
+        writer = ListWriter()
+        acquisition = Acquisition(CountingScope(), "A", lambda i: {"index": i}, 10, batch_size=3)
+        stats = acquisition.run(writer)
+        self.assertTrue(writer.closed)
+        self.assertEqual(stats.traces, 10)
+        self.assertEqual(len(stats.stages["target"].durations), 10)
+        self.assertEqual(sum(stats.stages["target"].histogram(4)[0]), 10)
+        self.assertEqual([trace.meta["index"] for trace in writer.traces], list(range(10)))
+        self.assertTrue(np.array_equal([trace.samples[0] for trace in writer.traces], np.arange(1, 11)))
+
+    def test_error(self):
+        def operation(i):
+            if i == 5:
+                raise ValueError
+        writer = ListWriter()
+        with self.assertRaises(ValueError):
+            Acquisition(CountingScope(), "A", operation, 10, batch_size=2).run(writer)
+        self.assertTrue(writer.closed)
+        self.assertLess(len(writer.traces), 10)
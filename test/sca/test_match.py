@@ -2,7 +2,8 @@ from unittest import TestCase
 
 import numpy as np
 
-from pyecsca.sca import Trace, match_pattern, match_part, pad
+from pyecsca.sca import (Trace, match_pattern, match_part, pad, normalized_correlation, match_patterns,
+                         match_traces)
 from .utils import Plottable
 
 
@@ -26,3 +27,28 @@ class MatchingTests(Plottable):
         filtered = match_pattern(base, pattern, 0.9)
         self.assertListEqual(filtered, [7, 19])
         self.plot(base=base, pattern1=pad(pattern, (filtered[0], 0)), pattern2=pad(pattern, (filtered[1], 0)))
+
+    def test_normalized_correlation(self):
+        base = Trace(np.random.default_rng(1).normal(size=200))
+        pattern = Trace(base.samples[50:70].copy())
+        correlation, = normalized_correlation(base, pattern)
+        self.assertEqual(len(correlation), 181)
+        self.assertAlmostEqual(correlation[50], 1)
+        self.assertAlmostEqual(correlation[13], np.corrcoef(base.samples[13:33], pattern.samples)[0, 1])
+        self.assertTrue((np.abs(correlation) <= 1 + 1e-9).all())
+        with self.assertRaises(ValueError):
+            normalized_correlation(pattern, base)
+
+    def test_match_patterns(self):
+        rng = np.random.default_rng(2)
+        first = rng.normal(size=30)
+        second = rng.normal(size=20)
+        samples = rng.normal(size=500) * 0.1
+        samples[40:70] += first
+        samples[300:330] += 2 * first + 5
+        samples[150:170] += second
+        base = Trace(samples)
+        matches = match_patterns(base, Trace(first), Trace(second), threshold=0.9)
+        self.assertListEqual(matches, [[40, 300], [150]])
+        self.assertListEqual(match_traces([base, base], Trace(first), threshold=0.9, workers=2),
+                             [[[40, 300]], [[40, 300]]])
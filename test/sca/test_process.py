@@ -1,7 +1,8 @@
 from unittest import TestCase
 
 import numpy as np
-from pyecsca.sca import Trace, absolute, invert, threshold, rolling_mean, offset, recenter, normalize, normalize_wl
+from pyecsca.sca import (Trace, absolute, invert, threshold, rolling_mean, offset, recenter, normalize, normalize_wl,
+                         rolling_variance, rolling_rms, rolling_min, rolling_max, RollingStatistic)
 
 
 class ProcessTests(TestCase):
@@ -33,6 +34,28 @@ class ProcessTests(TestCase):
         self.assertEqual(result.samples[1], 42)
         self.assertEqual(result.samples[2], 196)
 
+    def test_rolling(self):
+        samples = np.random.default_rng(5).normal(size=(3, 200))
+        windows = np.lib.stride_tricks.sliding_window_view(samples, 7, axis=-1)
+        trace = Trace(samples)
+        np.testing.assert_allclose(rolling_mean(trace, 7).samples, windows.mean(axis=-1))
+        np.testing.assert_allclose(rolling_variance(trace, 7).samples, windows.var(axis=-1))
+        np.testing.assert_allclose(rolling_rms(trace, 7).samples, np.sqrt(np.mean(windows ** 2, axis=-1)))
+        np.testing.assert_equal(rolling_min(trace, 7).samples, windows.min(axis=-1))
+        np.testing.assert_equal(rolling_max(trace, 7).samples, windows.max(axis=-1))
+        with self.assertRaises(ValueError):
+            rolling_mean(trace, 201)
+
+    def test_rolling_streaming(self):
+        samples = np.random.default_rng(6).normal(size=(2, 500))
+        for statistic, func in (("mean", rolling_mean), ("var", rolling_variance), ("max", rolling_max)):
+            rolling = RollingStatistic(10, statistic)
+            chunks = [rolling.process(samples[:, start:start + size])
+                      for start, size in ((0, 5), (5, 100), (105, 3), (108, 392))]
+            np.testing.assert_allclose(np.concatenate(chunks, axis=-1), func(Trace(samples), 10).samples)
+        with self.assertRaises(ValueError):
+            RollingStatistic(10, "median")
+
     def test_offset(self):
         result = offset(self._trace, 5)
         self.assertIsNotNone(result)
@@ -1,7 +1,8 @@
 from unittest import TestCase
 
 import numpy as np
-from pyecsca.sca import Trace, downsample_average, downsample_pick, downsample_decimate, downsample_max, downsample_min
+from pyecsca.sca import (Trace, downsample_average, downsample_pick, downsample_decimate, downsample_max, downsample_min,
+                         downsample_batch, StreamingDecimator)
 from .utils import Plottable
 
 
@@ -55,3 +56,26 @@ class SamplingTests(Plottable):
         self.assertIsInstance(result, Trace)
         self.assertEqual(len(result.samples), 15)
         self.plot(trace, result)
+
+    def test_downsample_batch(self):
+        samples = np.arange(300, dtype=np.dtype("i2")).reshape(3, 100)
+        for method, func in (("average", downsample_average), ("max", downsample_max), ("min", downsample_min),
+                             ("pick", downsample_pick), ("decimate", downsample_decimate)):
+            result = downsample_batch(samples, 3, method)
+            self.assertEqual(result.shape[0], 3)
+            for row, expected in zip(result, samples):
+                self.assertTrue(np.allclose(row, func(Trace(expected), 3).samples))
+        with self.assertRaises(ValueError):
+            downsample_batch(samples, 2, "median")
+
+    def test_streaming_decimator(self):
+        samples = np.random.default_rng(4).normal(size=(2, 1001))
+        for ftype in ("iir", "fir"):
+            decimator = StreamingDecimator(4, ftype)
+            whole = decimator.process(samples)
+            self.assertEqual(whole.shape, (2, 251))
+            decimator.reset()
+            chunks = [decimator.process(samples[:, start:start + 97]) for start in range(0, 1001, 97)]
+            self.assertTrue(np.allclose(np.concatenate(chunks, axis=-1), whole))
+        with self.assertRaises(ValueError):
+            StreamingDecimator(2, "other")
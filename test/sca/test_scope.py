@@ -0,0 +1,101 @@
+from time import perf_counter
+from unittest import TestCase, SkipTest
+
+import numpy as np
+
+from pyecsca.sca.scope import SampleType, WaitType, has_picoscope
+from .utils import CountingScope
+
+
+class FakePS(object):
+    """A fake picoscope instrument, returning segments counting up from the segment index."""
+    CHANNELS = {"A": 0, "B": 1}
+
+    def __init__(self):
+        self.calls = []
+
+    def setSamplingFrequency(self, frequency, samples):
+        return frequency, samples
+
+    def memorySegments(self, segments):
+        self.calls.append(("memorySegments", segments))
+        return 100
+
+    def setNoOfCaptures(self, captures):
+        self.calls.append(("setNoOfCaptures", captures))
+
+    def runBlock(self):
+        self.calls.append(("runBlock",))
+
+    def isReady(self):
+        return True
+
+    def getDataRawBulk(self, channel, numSamples, fromSegment, toSegment):
+        segments = toSegment - fromSegment + 1
+        data = np.add.outer(np.arange(fromSegment, toSegment + 1), np.arange(numSamples)).astype(np.int16)
+        return data, numSamples, np.zeros(segments, dtype=np.int16)
+
+    def rawToV(self, channel, dataRaw, dataV, dtype=np.float64):
+        dataV[:] = dataRaw / 2
+        return dataV
+
+
+class ScopeTests(TestCase):
+
+    def test_emulated_segments(self):
+        scope = CountingScope()
+        self.assertEqual(scope.setup_segments(3, ["A"], SampleType.Raw, np.int16), 3)
+        scope.arm_batch()
+        self.assertFalse(scope.capture_batch())
+        for _ in range(3):
+            self.assertTrue(scope.capture_segment())
+        self.assertTrue(scope.capture_batch())
+        self.assertEqual(scope.arms, 3)
+        batch = scope.retrieve_batch("A")
+        self.assertEqual(batch.shape, (3, 4))
+        self.assertEqual(batch.dtype, np.int16)
+        self.assertTrue(np.array_equal(batch[:, 0], [1, 2, 3]))
+        self.assertIsNone(scope.retrieve_batch("B"))
+
+    def test_wait(self):
+        scope = CountingScope()
+        self.assertEqual(scope.wait_type, WaitType.Poll)
+        self.assertEqual(scope.setup_wait(WaitType.Event), WaitType.Backoff)
+        for type in (WaitType.Poll, WaitType.Backoff):
+            scope.setup_wait(type)
+            ready_at = perf_counter() + 0.005
+            self.assertTrue(scope._wait_ready(lambda: perf_counter() >= ready_at, 1000, ready_at))
+            self.assertFalse(scope._wait_ready(lambda: False, 5))
+
+    def test_picoscope_alt_batch(self):
+        if not has_picoscope:
+            raise SkipTest("picoscope is not installed.")
+        from pyecsca.sca.scope.picoscope_alt import PicoScopeAlt
+        ps = FakePS()
+        scope = PicoScopeAlt(ps)
+        scope.setup_frequency(1000, 2, 3)
+        self.assertEqual(scope.setup_segments(4, ["A"], SampleType.Raw, np.int16), 4)
+        self.assertIn(("memorySegments", 4), ps.calls)
+        self.assertIn(("setNoOfCaptures", 4), ps.calls)
+        scope.arm_batch()
+        self.assertTrue(scope.capture_segment())
+        self.assertTrue(scope.capture_batch())
+        batch = scope.retrieve_batch("A")
+        self.assertEqual(batch.shape, (4, 5))
+        self.assertEqual(batch.dtype, np.int16)
+        self.assertTrue(np.array_equal(batch[:, 0], [0, 1, 2, 3]))
+        self.assertIsNone(scope.retrieve_batch("B"))
+        scope.setup_segments(4, ["A"], SampleType.Volt, np.float32)
+        volts = scope.retrieve_batch("A")
+        self.assertEqual(volts.dtype, np.float32)
+        self.assertTrue(np.allclose(volts, batch / 2))
+        # A single-shot arm leaves the rapid block mode, the next batch returns to it.
+        del ps.calls[:]
+        scope.arm()
+        self.assertEqual(ps.calls, [("memorySegments", 1), ("setNoOfCaptures", 1), ("runBlock",)])
+        del ps.calls[:]
+        scope.arm()
+        self.assertEqual(ps.calls, [("runBlock",)])
+        del ps.calls[:]
+        scope.arm_batch()
+        self.assertEqual(ps.calls, [("memorySegments", 4), ("setNoOfCaptures", 4), ("runBlock",)])
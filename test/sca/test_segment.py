@@ -0,0 +1,68 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+
+from pyecsca.sca import Trace, find_segments, stack_segments, Segmenter
+
+
+class SegmentationTests(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.dbl = rng.normal(size=40)
+        self.add = rng.normal(size=30)
+        self.ops = [0, 0, 1, 0, 1, 1, 0]
+        samples = []
+        for op in self.ops:
+            samples.append(rng.normal(size=5) * 0.05)
+            samples.append((self.dbl if op == 0 else self.add) + rng.normal(size=40 if op == 0 else 30) * 0.05)
+        self.trace = Trace(np.concatenate(samples))
+
+    def test_find(self):
+        segments = find_segments(self.trace, Trace(self.dbl), Trace(self.add), threshold=0.9)
+        self.assertListEqual(list(segments["pattern"]), self.ops)
+        self.assertEqual(segments["start"][0], 5)
+        self.assertEqual(segments["end"][0], 45)
+        self.assertTrue((segments["end"][:-1] <= segments["start"][1:]).all())
+        contiguous = find_segments(self.trace, Trace(self.dbl), Trace(self.add), threshold=0.9,
+                                   contiguous=True)
+        self.assertTrue((contiguous["end"][:-1] == contiguous["start"][1:]).all())
+
+    def test_stack(self):
+        segments = find_segments(self.trace, Trace(self.dbl), Trace(self.add), threshold=0.9)
+        stacked = stack_segments(self.trace, segments, 40)
+        self.assertEqual(stacked.shape, (len(self.ops), 40))
+        self.assertTrue(np.allclose(stacked[0], self.trace.samples[5:45]))
+        dbls = stack_segments(self.trace, segments[segments["pattern"] == 0])
+        self.assertEqual(dbls.shape, (4, 40))
+        self.assertEqual(dbls.dtype, self.trace.samples.dtype)
+
+    def test_cache(self):
+        segmenter = Segmenter(Trace(self.dbl), Trace(self.add), threshold=0.9, length=35)
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "segments.npz")
+            first = list(segmenter.process([self.trace, self.trace], cache=path))
+            self.assertEqual(len(first), 2)
+            self.assertEqual(first[0][1].shape, (len(self.ops), 35))
+            cached = segmenter.load(path)
+            self.assertEqual(len(cached), 1)
+            self.assertTrue((cached[segmenter.digest(self.trace)] == first[1][0]).all())
+            second = list(segmenter.process([self.trace, self.trace], cache=path))
+            self.assertTrue((second[0][0] == first[0][0]).all())
+            other = Segmenter(Trace(self.dbl), threshold=0.9)
+            self.assertIsNone(other.load(path))
+
+    def test_cache_stale_traces(self):
+        segmenter = Segmenter(Trace(self.dbl), Trace(self.add), threshold=0.9)
+        shifted = Trace(np.concatenate((np.zeros(7), self.trace.samples)))
+        self.assertNotEqual(segmenter.digest(shifted), segmenter.digest(self.trace))
+        self.assertNotEqual(segmenter.digest(Trace(self.trace.samples.astype(np.float32))),
+                            segmenter.digest(self.trace))
+        with TemporaryDirectory() as tmpdir:
+            path = join(tmpdir, "segments.npz")
+            list(segmenter.process([self.trace], cache=path))
+            (segments, _), = segmenter.process([shifted], cache=path)
+            self.assertEqual(segments["start"][0], 12)
+            self.assertIn(segmenter.digest(shifted), segmenter.load(path))
@@ -2,7 +2,10 @@ from copy import copy
 from os.path import realpath, dirname, join
 from typing import Optional
 from unittest import TestCase, SkipTest
+from unittest.mock import patch
 
+from smartcard.CardConnection import CardConnection
+from smartcard.Exceptions import CardConnectionException
 from smartcard.pcsc.PCSCExceptions import BaseSCardException
 
 from pyecsca.ec.key_agreement import ECDH_SHA1
@@ -12,10 +15,12 @@ from pyecsca.ec.mult import LTRMultiplier
 from pyecsca.ec.params import DomainParameters, get_params
 from pyecsca.ec.point import Point
 from pyecsca.ec.signature import SignatureResult, ECDSA_SHA1
-from pyecsca.sca.target import BinaryTarget, SimpleSerialTarget, SimpleSerialMessage, has_pyscard
+from pyecsca.sca.target import (BinaryTarget, BinaryTargetPool, SimpleSerialTarget, SimpleSerialMessage,
+                                CommandAPDU, ResponseAPDU, has_pyscard)
 from pyecsca.sca.target.ectester import (KeyAgreementEnum, SignatureEnum, KeypairEnum, KeyBuildEnum,
                                          KeyClassEnum, CurveEnum, ParameterEnum, RunModeEnum,
-                                         KeyEnum, TransformationEnum)
+                                         KeyEnum, TransformationEnum, InstructionEnum, ChunkingException,
+                                         ECDHResponse, ECDSAResponse)
 
 if has_pyscard:
     from pyecsca.sca.target.ectester import ECTesterTarget
@@ -39,6 +44,42 @@ class BinaryTargetTests(TestCase):
         self.assertEqual(resp["r"].data, "01020304")
         target.disconnect()
 
+    def test_pipelined(self):
+        target_path = join(dirname(realpath(__file__)), "..", "data", "target.py")
+        target = TestTarget(["python", target_path])
+        target.flow_control = True
+        target.connect()
+        resps = target.send_cmds([SimpleSerialMessage("d", "")] * 5, 500, depth=3)
+        self.assertEqual(len(resps), 5)
+        for resp in resps:
+            self.assertIn("z", resp)
+            self.assertEqual(resp["r"].data, "01020304")
+        target.disconnect()
+
+    def test_framed(self):
+        target_path = join(dirname(realpath(__file__)), "..", "data", "framed_target.py")
+        target = BinaryTarget(["python", target_path])
+        target.connect()
+        target.write_frame(b"abc")
+        self.assertEqual(target.read_frame(500), b"cba")
+        target.write_frames([b"\x00\x01", b"", b"xyz"])
+        self.assertEqual(target.read_frame(500), b"\x01\x00")
+        self.assertEqual(target.read_frame(500), b"")
+        self.assertEqual(target.read_frame(500), b"zyx")
+        with self.assertRaises(TimeoutError):
+            target.read_frame(50)
+        target.disconnect()
+
+    def test_pool(self):
+        target_path = join(dirname(realpath(__file__)), "..", "data", "target.py")
+        pool = BinaryTargetPool(lambda: TestTarget(["python", target_path]), 3)
+        pool.connect()
+        resps = pool.map(lambda target, cmd: target.send_cmd(cmd, 500), [SimpleSerialMessage("d", "")] * 10)
+        self.assertEqual(len(resps), 10)
+        for resp in resps:
+            self.assertEqual(resp["r"].data, "01020304")
+        pool.disconnect()
+
     def test_debug(self):
         target_path = join(dirname(realpath(__file__)), "..", "data", "target.py")
         target = TestTarget(["python", target_path], debug_output=True)
@@ -56,6 +97,142 @@ class BinaryTargetTests(TestCase):
         target.disconnect()
 
 
+class FakeConnection(object):
+
+    def __init__(self, responses, t0_only=False):
+        self.responses = list(responses)
+        self.t0_only = t0_only
+        self.sent = []
+
+    def connect(self, protocol):
+        if self.t0_only and protocol == CardConnection.T1_protocol:
+            raise CardConnectionException()
+
+    def transmit(self, apdu):
+        self.sent.append(apdu)
+        return self.responses.pop(0)
+
+
+class FakeReader(object):
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def createConnection(self):
+        return self.connection
+
+
+class ECTesterFakeTargetTests(TestCase):
+
+    def setUp(self):
+        if not has_pyscard:
+            raise SkipTest("No pyscard.")
+        self.ticks = 0
+
+    def fake_clock(self):
+        self.ticks += 10
+        return self.ticks
+
+    def target(self, responses, t0_only=False):
+        target = ECTesterTarget(FakeReader(FakeConnection(responses, t0_only)))
+        target.connect()
+        return target
+
+    @staticmethod
+    def ok(param: Optional[bytes] = None):
+        data = bytes([0x90, 0x00])
+        if param is not None:
+            data += len(param).to_bytes(2, "big") + param
+        return list(data), 0x90, 0x00
+
+    def test_send_apdus(self):
+        target = self.target([([1, 2], 0x90, 0x00), ([], 0x6a, 0x82), ([3], 0x90, 0x00)])
+        apdus = [CommandAPDU(0xb0, 0x01, 0, 0, bytes([1])), CommandAPDU(0xb0, 0x02, 0, 0),
+                 CommandAPDU(0xb0, 0x01, 0, 0, bytes([1]))]
+        resps = target.send_apdus(apdus)
+        self.assertEqual(target.connection.sent, [list(bytes(apdu)) for apdu in apdus])
+        self.assertEqual(resps, [ResponseAPDU(bytes([1, 2]), 0x9000), ResponseAPDU(bytes(), 0x6a82),
+                                 ResponseAPDU(bytes([3]), 0x9000)])
+
+    def test_send_apdus_chunked(self):
+        target = self.target([([], 0x90, 0x00), ([], 0x90, 0x00), ([], 0x61, 0x02),
+                              ([1, 2], 0x90, 0x00)], t0_only=True)
+        self.assertTrue(target.chunking)
+        apdu = CommandAPDU(0xb0, 0x01, 0, 0, bytes(300))
+        resp = target.send_apdu(apdu)
+        data = bytes(apdu)
+        self.assertEqual(target.connection.sent,
+                         [list(bytes(CommandAPDU(0xb0, InstructionEnum.INS_BUFFER, 0, 0, data[:255]))),
+                          list(bytes(CommandAPDU(0xb0, InstructionEnum.INS_BUFFER, 0, 0, data[255:]))),
+                          list(bytes(CommandAPDU(0xb0, InstructionEnum.INS_PERFORM, 0, 0))),
+                          [0x00, 0xc0, 0x00, 0x00, 0x02]])
+        self.assertEqual(resp, ResponseAPDU(bytes([1, 2]), 0x9000))
+
+        target = self.target([([], 0x6a, 0x80)], t0_only=True)
+        with self.assertRaises(ChunkingException):
+            target.send_apdu(CommandAPDU(0xb0, 0x01, 0, 0, bytes([1])))
+
+    def test_send_apdus_timed(self):
+        target = self.target([self.ok(), self.ok()])
+        apdus = [CommandAPDU(0xb0, 0x01, 0, 0)] * 2
+        with patch("pyecsca.sca.target.ectester.perf_counter_ns", self.fake_clock):
+            timed = target.send_apdus(apdus, timed=True)
+        self.assertEqual([resp.time for resp in timed], [10, 10])
+
+        target = self.target([self.ok(), self.ok()])
+        self.assertEqual([resp.time for resp in target.send_apdus(apdus)], [None, None])
+
+    def test_batch(self):
+        target = self.target([self.ok(bytes([1])), self.ok(bytes([2])), self.ok(bytes([3])),
+                              self.ok()])
+        batch = target.batch()
+        batch.ecdh(KeypairEnum.KEYPAIR_LOCAL, KeypairEnum.KEYPAIR_REMOTE, True,
+                   TransformationEnum.NONE, KeyAgreementEnum.ALG_EC_SVDP_DH, count=2)
+        batch.ecdsa(KeypairEnum.KEYPAIR_LOCAL, True, SignatureEnum.ALG_ECDSA_SHA, b"data")
+        batch.ecdsa_verify(KeypairEnum.KEYPAIR_LOCAL, SignatureEnum.ALG_ECDSA_SHA, b"sig", b"data")
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(target.connection.sent, [])
+        with patch("pyecsca.sca.target.ectester.perf_counter_ns", self.fake_clock):
+            resps = batch.perform(timed=True)
+        ecdh = target._ecdh_apdu(KeypairEnum.KEYPAIR_LOCAL, KeypairEnum.KEYPAIR_REMOTE, True,
+                                 TransformationEnum.NONE, KeyAgreementEnum.ALG_EC_SVDP_DH)
+        ecdsa = target._ecdsa_apdu(KeypairEnum.KEYPAIR_LOCAL, True, SignatureEnum.ALG_ECDSA_SHA, b"data")
+        verify = target._ecdsa_verify_apdu(KeypairEnum.KEYPAIR_LOCAL, SignatureEnum.ALG_ECDSA_SHA,
+                                           b"sig", b"data")
+        self.assertEqual(target.connection.sent,
+                         [list(bytes(ecdh)), list(bytes(ecdh)), list(bytes(ecdsa)), list(bytes(verify))])
+        self.assertEqual([type(resp) for resp in resps],
+                         [ECDHResponse, ECDHResponse, ECDSAResponse, ECDSAResponse])
+        self.assertTrue(all(resp.success for resp in resps))
+        self.assertEqual([resps[0].secret, resps[1].secret, resps[2].signature],
+                         [bytes([1]), bytes([2]), bytes([3])])
+        self.assertIsNone(resps[3].signature)
+        self.assertEqual([resp.time for resp in resps], [10, 10, 10, 10])
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(batch.perform(), [])
+
+    def test_ecdh_repeat(self):
+        target = self.target([self.ok(bytes([i])) for i in range(3)])
+        with patch("pyecsca.sca.target.ectester.perf_counter_ns", self.fake_clock):
+            resps = target.ecdh_repeat(KeypairEnum.KEYPAIR_LOCAL, KeypairEnum.KEYPAIR_REMOTE, True,
+                                       TransformationEnum.NONE, KeyAgreementEnum.ALG_EC_SVDP_DH, 3)
+        apdu = target._ecdh_apdu(KeypairEnum.KEYPAIR_LOCAL, KeypairEnum.KEYPAIR_REMOTE, True,
+                                 TransformationEnum.NONE, KeyAgreementEnum.ALG_EC_SVDP_DH)
+        self.assertEqual(target.connection.sent, [list(bytes(apdu))] * 3)
+        self.assertEqual([resp.secret for resp in resps], [bytes([i]) for i in range(3)])
+        self.assertEqual([resp.time for resp in resps], [10, 10, 10])
+
+    def test_ecdsa_repeat(self):
+        target = self.target([self.ok(), ([0x6a, 0x80], 0x90, 0x00)])
+        with patch("pyecsca.sca.target.ectester.perf_counter_ns", self.fake_clock):
+            resps = target.ecdsa_repeat(KeypairEnum.KEYPAIR_LOCAL, False, SignatureEnum.ALG_ECDSA_SHA,
+                                        b"data", 2)
+        apdu = target._ecdsa_apdu(KeypairEnum.KEYPAIR_LOCAL, False, SignatureEnum.ALG_ECDSA_SHA, b"data")
+        self.assertEqual(target.connection.sent, [list(bytes(apdu))] * 2)
+        self.assertEqual([resp.success for resp in resps], [True, False])
+        self.assertEqual([resp.time for resp in resps], [10, 10])
+
+
 class ECTesterTargetTests(TestCase):
     reader: Optional[str] = None
     target: Optional[ECTesterTarget] = None
@@ -0,0 +1,52 @@
+from time import sleep
+from unittest import TestCase
+
+import numpy as np
+
+from pyecsca.sca.target import TimingHarness, TimingResult
+from pyecsca.sca.target.timing import TIMING_DTYPE
+
+
+class Reported(object):
+
+    def __init__(self, time):
+        self.time = time
+
+
+class TimingTests(TestCase):
+
+    def test_measure(self):
+        calls = []
+        harness = TimingHarness(lambda i: calls.append(i), warmup=3)
+        result = harness.measure(20)
+        self.assertEqual(len(calls), 23)
+        self.assertEqual(len(result), 20)
+        self.assertEqual(result.samples.dtype, TIMING_DTYPE)
+        self.assertEqual(list(result.samples["index"]), list(range(20)))
+        self.assertTrue((result.samples["time"] > 0).all())
+        self.assertTrue((result.samples["reported"] == -1).all())
+
+    def test_reported(self):
+        harness = TimingHarness(lambda i: Reported(1000 + i), warmup=0)
+        result = harness.measure(5)
+        self.assertEqual(list(result.samples["reported"]), [1000, 1001, 1002, 1003, 1004])
+        self.assertEqual(result.median("reported"), 1002)
+
+    def test_outliers(self):
+        harness = TimingHarness(lambda i: sleep(0.05) if i == 10 else None, warmup=0)
+        result = harness.measure(50).reject_outliers()
+        self.assertTrue(result.samples["outlier"][10])
+        self.assertEqual(len(result.inliers), 50 - int(result.samples["outlier"].sum()))
+        self.assertLess(result.median(), 0.05e9)
+        counts, edges = result.histogram(bins=10)
+        self.assertEqual(counts.sum(), len(result.inliers))
+        self.assertEqual(len(edges), 11)
+        self.assertIsInstance(result, TimingResult)
+
+    def test_outliers_zero_mad(self):
+        samples = np.zeros(10, dtype=TIMING_DTYPE)
+        samples["time"] = [100] * 8 + [101, 5000]
+        result = TimingResult(samples).reject_outliers()
+        self.assertListEqual(list(result.samples["outlier"]), [False] * 9 + [True])
+        samples["time"] = 100
+        self.assertFalse(TimingResult(samples).reject_outliers().samples["outlier"].any())
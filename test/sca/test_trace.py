@@ -10,3 +10,43 @@ class TraceTests(TestCase):
         self.assertIsNotNone(trace)
         self.assertIn("Trace", str(trace))
         self.assertIsNone(trace.trace_set)
+
+    def test_with_samples(self):
+        trace = Trace(np.array([10, 15, 24], dtype=np.dtype("i1")), {"plaintext": b"\x01", "list": [1, 2]})
+        other = trace.with_samples(np.array([1, 2], dtype=np.dtype("i1")))
+        self.assertEqual(other.meta, trace.meta)
+        self.assertIsInstance(trace.meta, dict)
+        self.assertIsNot(other.meta["list"], trace.meta["list"])
+        other.meta["plaintext"] = b"\x02"
+        other.meta["list"] = [1, 2, 3]
+        del other.meta["list"]
+        self.assertEqual(trace.meta["plaintext"], b"\x01")
+        self.assertEqual(trace.meta["list"], [1, 2])
+        self.assertNotIn("list", other.meta)
+        trace.meta["list"] = [1, 2, 4]
+        trace.meta["new"] = 5
+        self.assertNotIn("new", other.meta)
+        third = other.with_samples(trace.samples)
+        other.meta["plaintext"] = b"\x03"
+        self.assertEqual(third.meta, {"plaintext": b"\x02"})
+        self.assertEqual(len(other.meta), 1)
+
+    def test_with_samples_in_place(self):
+        samples = np.array([10, 15, 24], dtype=np.dtype("i1"))
+        key = np.arange(4)
+        trace = Trace(samples, {"resp": {"sw": 0x9000}, "pts": [1], "key": key})
+        child = trace.with_samples(samples[:2])
+        child.meta["resp"]["sw"] = 0x6a80
+        child.meta["pts"].append(2)
+        self.assertEqual(trace.meta["resp"], {"sw": 0x9000})
+        self.assertEqual(trace.meta["pts"], [1])
+        self.assertEqual(child.meta["pts"], [1, 2])
+        self.assertIs(child.meta["key"], key)
+        trace.meta["pts"].append(3)
+        grandchild = child.with_samples(samples[:1])
+        child.meta["pts"].append(4)
+        grandchild.meta["resp"]["sw"] = 0x6985
+        self.assertEqual(child.meta["pts"], [1, 2, 4])
+        self.assertEqual(child.meta["resp"], {"sw": 0x6a80})
+        self.assertEqual(grandchild.meta["pts"], [1, 2])
+        self.assertEqual(trace.meta["pts"], [1, 3])
@@ -1,4 +1,5 @@
 import os.path
+from io import BytesIO
 import shutil
 import tempfile
 from copy import deepcopy
@@ -7,7 +8,9 @@ from unittest import TestCase
 import numpy as np
 
 from pyecsca.sca import (TraceSet, InspectorTraceSet, ChipWhispererTraceSet, PickleTraceSet,
-                         HDF5TraceSet, Trace)
+                         HDF5TraceSet, ArrayTraceSet, NativeTraceSet, Trace, average, variance, absolute,
+                         student_ttest)
+from pyecsca.sca.trace_set.convert import convert, guess_format, InspectorWriter, HDF5Writer
 
 EXAMPLE_TRACES = [Trace(np.array([20, 40, 50, 50, 10], dtype=np.dtype("i1")), {"something": 5}),
                   Trace(np.array([1, 2, 3, 4, 5], dtype=np.dtype("i1"))),
@@ -61,6 +64,36 @@ class ChipWhispererTraceSetTests(TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(len(result), 2)
 
+    def test_save(self):
+        trace_set = ChipWhispererTraceSet.read("test/data/config_chipwhisperer_.cfg")
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, "config_out_.cfg")
+            trace_set.write(path)
+            result = ChipWhispererTraceSet.read(path)
+            self.assertEqual(len(result), 2)
+            self.assertTrue(np.array_equal(result[1].samples, trace_set[1].samples))
+            self.assertTrue(np.array_equal(result[1].meta["key"], trace_set[1].meta["key"]))
+
+    def test_load_lazy(self):
+        eager = ChipWhispererTraceSet.read("test/data/config_chipwhisperer_.cfg")
+        result = ChipWhispererTraceSet.read("test/data/config_chipwhisperer_.cfg", lazy=True)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(len(list(result)), 2)
+        self.assertIs(result[0].trace_set, result)
+        self.assertTrue(np.array_equal(result[-1].samples, eager[-1].samples))
+        self.assertTrue(np.array_equal(result[1].meta["key"], eager[1].meta["key"]))
+        self.assertEqual(result.scopename, eager.scopename)
+
+    def test_load_segments(self):
+        trace_set = ChipWhispererTraceSet.read("test/data/config_chipwhisperer_.cfg")
+        with tempfile.TemporaryDirectory() as dirname:
+            trace_set.write(os.path.join(dirname, "config_first_.cfg"))
+            trace_set.write(os.path.join(dirname, "config_second_.cfg"))
+            for lazy in (False, True):
+                result = ChipWhispererTraceSet.read(dirname, lazy=lazy)
+                self.assertEqual(len(result), 4)
+                self.assertTrue(np.array_equal(result[2].samples, trace_set[0].samples))
+
 
 class PickleTraceSetTests(TestCase):
 
@@ -120,3 +153,149 @@ class HDF5TraceSetTests(TestCase):
             trace_set.write(path)
             self.assertTrue(os.path.exists(path))
             self.assertIsNotNone(HDF5TraceSet.read(path))
+
+
+class NativeTraceSetTests(TestCase):
+
+    def test_save(self):
+        trace_set = NativeTraceSet.from_traces(*EXAMPLE_TRACES, **EXAMPLE_KWARGS)
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, "out.traces")
+            trace_set.write(path)
+            for lazy in (False, True):
+                result = NativeTraceSet.read(path, lazy=lazy)
+                self.assertEqual(len(result), 3)
+                self.assertEqual(result.thingy, "abc")
+                self.assertTrue(np.array_equal(result[2].samples, EXAMPLE_TRACES[2].samples))
+                self.assertEqual(result[0].meta["something"], 5)
+                self.assertIsNone(result[1].meta["something"])
+            with open(path, "rb") as f:
+                self.assertEqual(len(NativeTraceSet.read(f.read())), 3)
+
+    def test_inplace(self):
+        trace_set = NativeTraceSet.from_traces(*EXAMPLE_TRACES, **EXAMPLE_KWARGS)
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, "out.traces")
+            trace_set.write(path)
+            trace_set = NativeTraceSet.inplace(path)
+            trace_set.append(Trace(np.array([1, 1, 1, 1, 1], dtype=np.dtype("i1")), {"thing": "ring"}))
+            # The file is consistent without closing the trace set.
+            appended = NativeTraceSet.read(path)
+            self.assertEqual(len(appended), 4)
+            self.assertEqual(appended[3].meta["thing"], "ring")
+            trace_set[0].samples[0] = 0
+            trace_set.close()
+
+            result = NativeTraceSet.read(path)
+            self.assertEqual(len(result), 4)
+            self.assertEqual(result[0].samples[0], 0)
+            self.assertEqual(result[3].meta["thing"], "ring")
+            self.assertIsNone(result[0].meta["thing"])
+
+    def test_unsafe_meta(self):
+        trace_set = NativeTraceSet.from_traces(Trace(np.array([1, 2]), {"thing": object()}))
+        with self.assertRaises(TypeError):
+            trace_set.write(BytesIO())
+
+
+class ArrayTraceSetTests(TestCase):
+
+    def test_from_traces(self):
+        trace_set = ArrayTraceSet.from_traces(*EXAMPLE_TRACES, **EXAMPLE_KWARGS)
+        self.assertEqual(len(trace_set), 3)
+        self.assertEqual(trace_set.samples.shape, (3, 5))
+        self.assertEqual(trace_set.thingy, "abc")
+        self.assertEqual(trace_set[0], EXAMPLE_TRACES[0])
+        self.assertIsNone(trace_set[1].meta["something"])
+        self.assertIs(trace_set[2].trace_set, trace_set)
+        trace_set[1].meta["something"] = 3
+        self.assertEqual(trace_set.meta["something"][1], 3)
+        trace_set[2][0] = 1
+        self.assertEqual(trace_set.samples[2, 0], 1)
+
+    def test_meta_casting(self):
+        trace_set = ArrayTraceSet(np.zeros((2, 3)), {"small": np.array([1, 2], dtype=np.int8)})
+        trace_set[0].meta["small"] = np.int64(100)
+        self.assertEqual(trace_set.meta["small"].dtype, np.int8)
+        trace_set[1].meta["small"] = np.int64(300)
+        self.assertEqual(trace_set[1].meta["small"], 300)
+        self.assertEqual(trace_set[0].meta["small"], 100)
+
+    def test_combine(self):
+        trace_set = ArrayTraceSet.from_traces(*EXAMPLE_TRACES)
+        np.testing.assert_equal(average(*trace_set).samples, average(*EXAMPLE_TRACES).samples)
+        np.testing.assert_allclose(variance(*trace_set[1:]).samples, variance(*EXAMPLE_TRACES[1:]).samples)
+        np.testing.assert_equal(student_ttest(trace_set[:2], trace_set[1:]).samples,
+                                student_ttest(EXAMPLE_TRACES[:2], EXAMPLE_TRACES[1:]).samples)
+
+    def test_process(self):
+        trace_set = ArrayTraceSet.from_traces(*EXAMPLE_TRACES)
+        result = absolute(trace_set)
+        self.assertIsInstance(result, ArrayTraceSet)
+        self.assertEqual(result.samples.shape, (3, 5))
+
+
+class ConvertTests(TestCase):
+
+    def test_convert(self):
+        original = ChipWhispererTraceSet.read("test/data/config_chipwhisperer_.cfg")
+        with tempfile.TemporaryDirectory() as dirname:
+            h5 = os.path.join(dirname, "out.h5")
+            stats = convert("test/data/config_chipwhisperer_.cfg", h5, chunk_size=1)
+            self.assertEqual(stats.traces, 2)
+            cw = os.path.join(dirname, "config_out_.cfg")
+            convert(h5, cw)
+            result = ChipWhispererTraceSet.read(cw)
+            self.assertTrue(np.array_equal(result[1].samples, original[1].samples))
+            self.assertTrue(np.array_equal(result[1].meta["key"], original[1].meta["key"]))
+            self.assertEqual(result.scopename, original.scopename)
+            native = os.path.join(dirname, "out.traces")
+            convert(h5, native)
+            result = NativeTraceSet.read(native)
+            self.assertTrue(np.array_equal(result[1].samples, original[1].samples))
+
+            trs = os.path.join(dirname, "out.trs")
+            convert(h5, trs, dtype=np.float32, downsample=("average", 2))
+            result = InspectorTraceSet.read(trs)
+            self.assertEqual(len(result), 2)
+            self.assertEqual(len(result[0]), len(original[0]) // 2)
+            pickled = os.path.join(dirname, "out.pickle")
+            convert(trs, pickled)
+            self.assertEqual(len(PickleTraceSet.read(pickled)), 2)
+
+    def test_inspector_writer(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, "out.trs")
+            for samples in (np.array([0, 200, 255], dtype=np.uint8),
+                            np.array([0, 60000, 65535], dtype=np.uint16),
+                            np.array([-70000, 5, 2**24], dtype=np.int64)):
+                writer = InspectorWriter(path, 1, {})
+                writer.append([Trace(samples)])
+                writer.close()
+                result = InspectorTraceSet.read(path)
+                self.assertTrue(np.array_equal(result[0].samples, samples))
+            writer = InspectorWriter(path, 1, {})
+            with self.assertRaises(ValueError):
+                writer.append([Trace(np.array([0, 2**40], dtype=np.int64))])
+            writer.close()
+            writer = InspectorWriter(path, 1, {})
+            with self.assertRaises(TypeError):
+                writer.append([Trace(np.array([True, False]))])
+            writer.close()
+
+    def test_hdf5_writer_attributes(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, "out.h5")
+            writer = HDF5Writer(path, 1, {"thingy": "abc", "unstorable": {"a": 1}})
+            writer.append(EXAMPLE_TRACES[:1])
+            with self.assertWarns(UserWarning):
+                writer.close()
+            result = HDF5TraceSet.read(path)
+            self.assertEqual(result.thingy, "abc")
+            self.assertFalse(hasattr(result, "unstorable"))
+
+    def test_guess_format(self):
+        self.assertEqual(guess_format("a/b.trs"), "inspector")
+        self.assertEqual(guess_format("config_abc_.cfg"), "chipwhisperer")
+        with self.assertRaises(ValueError):
+            guess_format("a.txt")
@@ -1,10 +1,13 @@
 from os import mkdir, getenv, getcwd
 from os.path import join, exists, split
+from typing import Optional
 from unittest import TestCase
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 from pyecsca.sca import Trace
+from pyecsca.sca.scope import Scope, SampleType
 
 force_plot = True
 
@@ -50,3 +53,24 @@ class Plottable(TestCase):
             ax.plot(trace.samples, label=name)
         ax.legend(loc="best")
         plt.savefig(self.get_fname() + ".png")
+
+
+class CountingScope(Scope):
+    """A fake single-shot scope, capturing a trace of the count of arms."""
+
+    def __init__(self):
+        super().__init__()
+        self.arms = 0
+
+    @property
+    def channels(self):
+        return ["A", "B"]
+
+    def arm(self) -> None:
+        self.arms += 1
+
+    def capture(self, timeout: Optional[int] = None) -> bool:
+        return True
+
+    def retrieve(self, channel: str, type: SampleType, dtype=None) -> Optional[Trace]:
+        return Trace(np.full(4, self.arms, dtype=dtype))